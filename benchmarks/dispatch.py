@@ -0,0 +1,62 @@
+"""
+Per-invocation dispatch overhead of Handlers.sync_or_async for each event family.
+
+Usage: PYTHONPATH=. python benchmarks/dispatch.py [--number 100000]
+"""
+
+from fluxional.core.handlers import Handlers
+import argparse
+import json
+import timeit
+
+EVENTS = {
+    "http": {"httpMethod": "GET", "path": "/", "requestContext": {}},
+    "websocket": {"requestContext": {"routeKey": "$default", "connectionId": "id"}},
+    "storage": {
+        "Records": [{"eventSource": "aws:s3", "eventName": "ObjectCreated:Put"}]
+    },
+    "rate_schedule": {"schedule_type": "RateSchedule", "schedule_name": "task"},
+    "cron_schedule": {"schedule_type": "CronSchedule", "schedule_name": "task"},
+    "sqs": {
+        "Records": [
+            {
+                "eventSource": "aws:sqs",
+                "body": json.dumps({"event_name": "task", "data": {}}),
+            }
+        ]
+    },
+}
+
+
+def noop(event, context):
+    return True
+
+
+def build_handler():
+    handlers = Handlers()
+    handlers.add_api_handler(noop)
+    handlers.add_websocket_route_handler("$default", noop)
+    handlers.add_storage_handler("create", noop)
+    handlers._rate_schedule_handlers["task"] = noop
+    handlers._cron_schedule_handlers["task"] = noop
+    handlers._sqs_handlers["task"] = noop
+    return handlers.handler()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    handler = build_handler()
+
+    print(f"{'event':<16}{'ns/invocation':>16}")
+    for name, event in EVENTS.items():
+        seconds = min(
+            timeit.repeat(lambda: handler(event, None), number=args.number, repeat=5)
+        )
+        print(f"{name:<16}{seconds / args.number * 1e9:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Per-invocation cost of reading the environment, before (a fresh Environment()
+on every event) and after (the process wide Environment.snapshot()).
+
+Usage: PYTHONPATH=. python benchmarks/environment.py [--number 100000]
+"""
+
+from fluxional.core.tools import Environment
+import argparse
+import timeit
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    cases = {
+        "Environment()": Environment,
+        "Environment.snapshot()": Environment.snapshot,
+    }
+
+    print(f"{'case':<24}{'ns/invocation':>16}")
+    for name, func in cases.items():
+        seconds = min(timeit.repeat(func, number=args.number, repeat=5))
+        print(f"{name:<24}{seconds / args.number * 1e9:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Cold start cost of `from fluxional import Fluxional`, measured in fresh interpreters
+with -X importtime. The public api is lazy so the cost is the sum of every top level
+import of the package.
+
+Usage: PYTHONPATH=. python benchmarks/import_time.py [--runs 10] [--module fluxional]
+    [--attr Fluxional] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules that should never be imported on the runtime path
+HEAVY_MODULES = ["boto3", "botocore", "docker", "aws_cdk", "awscrt", "awsiot"]
+
+
+def measure(module: str, attr: str | None = None) -> tuple[float, list[str]]:
+    """Return the cumulative import time in ms and the heavy modules loaded"""
+    statement = f"from {module} import {attr}" if attr else f"import {module}"
+    code = (
+        f"import sys, json; {statement}; "
+        f"print(json.dumps([k for k in {HEAVY_MODULES!r} if k in sys.modules]))"
+    )
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=os.environ | {"PYTHONDONTWRITEBYTECODE": "1"},
+    )
+
+    cumulative_us = 0
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented, only count the top level ones
+        if not name.startswith("  ") and name.strip().split(".")[0] == module:
+            cumulative_us += int(cumulative)
+
+    return cumulative_us / 1000, json.loads(process.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--module", default="fluxional")
+    parser.add_argument("--attr", default="Fluxional")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    timings = []
+    heavy_modules: list[str] = []
+    for _ in range(args.runs):
+        ms, heavy_modules = measure(args.module, args.attr)
+        timings.append(ms)
+
+    result = {
+        "module": args.module,
+        "attr": args.attr,
+        "runs": args.runs,
+        "median_ms": round(statistics.median(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "heavy_modules": heavy_modules,
+    }
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        for key, value in result.items():
+            print(f"{key:<16}{value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,20 @@
-from fluxional.core import (
-    Fluxional,
-    Environment,
-    Extender,
-    Settings,
-    ApiEvent,
-    LambdaContext,
-    WsEvent,
-    Event,
-    Websocket,
-    TaskEvent,
-    StorageEvent,
-)
+from typing import TYPE_CHECKING, Any
+import importlib
+
+if TYPE_CHECKING:
+    from fluxional.core import (
+        Fluxional,
+        Environment,
+        Extender,
+        Settings,
+        ApiEvent,
+        LambdaContext,
+        WsEvent,
+        Event,
+        Websocket,
+        TaskEvent,
+        StorageEvent,
+    )
 
 __all__ = [
     "Fluxional",
@@ -28,3 +32,19 @@ __all__ = [
 
 
 __version__ = "0.1.11"
+
+
+# The public api is resolved on first access so that importing a submodule
+# (cli, deployment, dev) does not pay for the runtime and the other way around
+def __getattr__(name: str) -> Any:
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module("fluxional.core"), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -1,7 +1,8 @@
 import typer
 import os
 import sys
-from typing import Callable
+from typing import Callable, Optional
+from fluxional.core.settings import MIN_MEMORY_SIZE, MAX_MEMORY_SIZE
 
 from dotenv import load_dotenv
 
@@ -27,12 +28,14 @@ def deploy(
     handler: str,
     path: str = cwd,
     show_logs: bool = True,
+    force: bool = False,
 ):
     func = import_method_from_handler(handler=handler, path=path)
     func(
         {
             "fluxional_event": "cli_deploy",
             "show_logs": show_logs,
+            "force": force,
         },
         {"handler": handler},
     )
@@ -57,9 +60,78 @@ def sync(handler: str, path: str = cwd):
 
 
 @app.command()
-def dev(handler: str, path: str = cwd):
+def dev(handler: str, path: str = cwd, reload: bool = False):
     func = import_method_from_handler(handler=handler, path=path)
-    func({"fluxional_event": "cli_dev"}, {"handler": handler})
+    func(
+        {"fluxional_event": "cli_dev", "reload": reload},
+        {"handler": handler, "path": path},
+    )
+
+
+@app.command()
+def local(
+    handler: str,
+    path: str = cwd,
+    host: str = "127.0.0.1",
+    port: int = 3000,
+    storage_path: str = ".fluxional/storage",
+):
+    func = import_method_from_handler(handler=handler, path=path)
+    func(
+        {
+            "fluxional_event": "cli_local",
+            "host": host,
+            "port": port,
+            "storage_path": storage_path,
+        },
+        {"handler": handler, "path": path},
+    )
+
+
+def parse_memory_sizes(memory: str) -> list[int]:
+    """
+    Parse comma separated memory sizes in MB, ex: 128,512,1024
+    """
+    try:
+        sizes = [int(size) for size in memory.split(",") if size.strip()]
+    except ValueError:
+        raise typer.BadParameter("Memory sizes must be integers, ex: 128,512,1024")
+
+    if not sizes:
+        raise typer.BadParameter("At least one memory size is required")
+
+    for size in sizes:
+        if not MIN_MEMORY_SIZE <= size <= MAX_MEMORY_SIZE:
+            raise typer.BadParameter(
+                f"Memory sizes must be between {MIN_MEMORY_SIZE} and "
+                f"{MAX_MEMORY_SIZE} MB"
+            )
+
+    return sizes
+
+
+@app.command()
+def tune(
+    handler: str,
+    event: str,
+    path: str = cwd,
+    memory: str = "128,256,512,1024,1769,3008",
+    invocations: int = 10,
+    target: Optional[float] = None,
+):
+    memory_sizes = parse_memory_sizes(memory)
+
+    func = import_method_from_handler(handler=handler, path=path)
+    func(
+        {
+            "fluxional_event": "cli_tune",
+            "event": event,
+            "memory_sizes": memory_sizes,
+            "invocations": invocations,
+            "target": target,
+        },
+        {"handler": handler, "path": path},
+    )
 
 
 def run_command_line():
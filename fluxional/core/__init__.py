@@ -1,7 +1,11 @@
-from .core import Fluxional, Extender
-from .settings import Settings
-from .tools import Environment, Event, Websocket
-from .types import ApiEvent, LambdaContext, WsEvent, TaskEvent, StorageEvent
+from typing import TYPE_CHECKING, Any
+import importlib
+
+if TYPE_CHECKING:
+    from .core import Fluxional, Extender
+    from .settings import Settings
+    from .tools import Environment, Event, Websocket
+    from .types import ApiEvent, LambdaContext, WsEvent, TaskEvent, StorageEvent
 
 __all__ = [
     "Fluxional",
@@ -16,3 +20,33 @@ __all__ = [
     "TaskEvent",
     "StorageEvent",
 ]
+
+# Resolved on first access so that importing a single submodule (tools from the
+# dev runner, settings from the cli) does not load the handlers and the app
+_LAZY_IMPORTS = {
+    "Fluxional": ".core",
+    "Extender": ".core",
+    "Settings": ".settings",
+    "Environment": ".tools",
+    "Event": ".tools",
+    "Websocket": ".tools",
+    "ApiEvent": ".types",
+    "LambdaContext": ".types",
+    "WsEvent": ".types",
+    "TaskEvent": ".types",
+    "StorageEvent": ".types",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -1,21 +1,6 @@
+from __future__ import annotations
 from dataclasses import dataclass, asdict, field
-from .settings import Settings
-from .infrastructure.resources import (
-    ApiGateway,
-    LambdaFunction,
-    InfraResources,
-    LambdaPermission,
-    DynamoDB,
-    DynamoDbPermission,
-    WsGateway,
-    S3Bucket,
-    S3Permission,
-    RateSchedule,
-    CronSchedule,
-    SqsQueue,
-    SqsPermission,
-    AllPermission,
-)
+from .settings import LambdaSettings, Settings, MIN_MEMORY_SIZE, MAX_MEMORY_SIZE
 from .infrastructure.types import (
     DynamoDBBillingModeT,
     DynamoDBKeyT,
@@ -24,7 +9,41 @@ from .infrastructure.types import (
     RateDurationUnitT,
     DynamoDBGsiT,
 )
-from typing import TypedDict
+from typing import TypedDict, TYPE_CHECKING
+import re
+
+# Resources are only needed to build the infrastructure, they are
+# imported where used to keep them out of the lambda runtime path
+if TYPE_CHECKING:
+    from .infrastructure.resources import (
+        ApiGateway,
+        LambdaFunction,
+        InfraResources,
+        DynamoDB,
+        WsGateway,
+        S3Bucket,
+        SqsQueue,
+        AllPermission,
+    )
+
+
+def lambda_dockerfile(requirements: str) -> str:
+    """
+    Dockerfile of the image installing the given requirements, functions with
+    the same requirements share it
+    """
+    name = re.sub(r"[^A-Za-z0-9]+", "_", requirements).strip("_")
+    return f"Dockerfile.{name}"
+
+
+def lambda_layer(requirements: str | None, architecture: str = "x86_64") -> str:
+    """
+    Directory of the layer installing the given requirements, zip functions with
+    the same requirements and architecture share it
+    """
+    name = re.sub(r"[^A-Za-z0-9]+", "_", requirements or "").strip("_")
+    suffix = "" if architecture == "x86_64" else f"_{architecture}"
+    return f".fluxional/layers/{name or 'fluxional'}{suffix}"
 
 
 @dataclass(kw_only=True)
@@ -102,7 +121,35 @@ class App:
     schedule: Schedule = field(default_factory=Schedule)
     event: Event = field(default_factory=Event)
 
+    def _lambda_settings(self, settings: LambdaSettings) -> dict:
+        """
+        Arguments of a LambdaFunction, with its own image given requirements or
+        its requirements layer when packaged as a zip
+        """
+        if not MIN_MEMORY_SIZE <= settings.memory_size <= MAX_MEMORY_SIZE:
+            raise ValueError(
+                f"memory_size must be between {MIN_MEMORY_SIZE} and "
+                f"{MAX_MEMORY_SIZE} MB"
+            )
+
+        lambda_settings = asdict(settings)
+        if settings.packaging == "zip":
+            lambda_settings["layer"] = lambda_layer(
+                settings.requirements or self.settings.build.requirements_file,
+                settings.architecture,
+            )
+        elif settings.requirements and settings.dockerfile == "Dockerfile":
+            lambda_settings["dockerfile"] = lambda_dockerfile(settings.requirements)
+
+        return lambda_settings
+
     def _build_api(self, stack_name: str, resources: InfraResources):
+        from .infrastructure.resources import (
+            ApiGateway,
+            LambdaFunction,
+            LambdaPermission,
+        )
+
         # Check
         if not self.api.active:
             return
@@ -112,7 +159,7 @@ class App:
             id=self.settings.system.default_api_lambda_id,
             function_name=f"{stack_name}_{self.settings.system.default_api_lambda_id}",
             existing_resource=False,
-            **asdict(self.settings.build.api_lambda),
+            **self._lambda_settings(self.settings.build.api_lambda),
         )
 
         api_gateway = ApiGateway(
@@ -142,6 +189,12 @@ class App:
         resources[self.database.id] = self.database
 
     def _build_websockets(self, stack_name: str, resources: InfraResources):
+        from .infrastructure.resources import (
+            LambdaFunction,
+            LambdaPermission,
+            WsGateway,
+        )
+
         # Check
         if not self.websocket.routes:
             return
@@ -150,6 +203,7 @@ class App:
         websocket_lambda = LambdaFunction(
             id=self.settings.system.default_websocket_lambda_id,
             function_name=f"{stack_name}_{self.settings.system.default_websocket_lambda_id}",
+            **self._lambda_settings(self.settings.build.websocket_lambda),
         )
 
         websocket_api_gateway = WsGateway(
@@ -175,6 +229,7 @@ class App:
         self.websocket.websocket_lambda = websocket_lambda
 
     def _build_storage(self, stack_name: str, resources: InfraResources):
+        from .infrastructure.resources import LambdaFunction, LambdaPermission, S3Bucket
 
         # @TODO: May need to refractor the whole storage workflow
         # Check
@@ -197,7 +252,7 @@ class App:
                 id=self.settings.system.default_storage_lambda_id,
                 function_name=f"{stack_name}_{self.settings.system.default_storage_lambda_id}",
                 existing_resource=False,
-                **asdict(self.settings.build.storage_lambda),
+                **self._lambda_settings(self.settings.build.storage_lambda),
             )
 
             self.storage_bucket.permissions.append(
@@ -214,6 +269,12 @@ class App:
 
     def _build_rate_scheduled_tasks(self, stack_name: str, resources: InfraResources):
 
+        from .infrastructure.resources import (
+            LambdaFunction,
+            LambdaPermission,
+            RateSchedule,
+        )
+
         # Check
         if not self.schedule.rate_schedule:
             return
@@ -239,7 +300,7 @@ class App:
             id=self.settings.system.default_rate_schedule_task_lambda_id,
             function_name=f"{stack_name}_{self.settings.system.default_rate_schedule_task_lambda_id}",
             existing_resource=False,
-            **asdict(self.settings.build.scheduled_task_lambda),
+            **self._lambda_settings(self.settings.build.scheduled_task_lambda),
         )
 
         for schedule in rate_schedules:
@@ -259,6 +320,12 @@ class App:
         self.schedule.rate_schedule_lambda = lambda_
 
     def _build_cron_scheduled_tasks(self, stack_name: str, resources: InfraResources):
+        from .infrastructure.resources import (
+            LambdaFunction,
+            LambdaPermission,
+            CronSchedule,
+        )
+
         # Check
         if not self.schedule.cron_schedule:
             return
@@ -292,7 +359,7 @@ class App:
             id=self.settings.system.default_cron_schedule_task_lambda_id,
             function_name=f"{stack_name}_{self.settings.system.default_cron_schedule_task_lambda_id}",
             existing_resource=False,
-            **asdict(self.settings.build.scheduled_task_lambda),
+            **self._lambda_settings(self.settings.build.scheduled_task_lambda),
         )
 
         for schedule in cron_schedules:
@@ -312,16 +379,40 @@ class App:
         self.schedule.cron_schedule_lambda = lambda_
 
     def _build_events(self, stack_name: str, resources: InfraResources):
+        from .infrastructure.resources import LambdaFunction, LambdaPermission, SqsQueue
+
         # Check
         if not self.event.active:
             return
 
+        lambda_settings = self._lambda_settings(self.settings.build.event_lambda)
+        batch_size = lambda_settings.pop("batch_size")
+        max_batching_window = lambda_settings.pop("max_batching_window")
+        batch_concurrency = lambda_settings.pop("batch_concurrency")
+
+        if not 1 <= batch_size <= 10000:
+            raise ValueError("event_lambda.batch_size must be between 1 and 10000")
+
+        if not 0 <= max_batching_window <= 300:
+            raise ValueError(
+                "event_lambda.max_batching_window must be between 0 and 300 seconds"
+            )
+
+        if batch_concurrency < 1:
+            raise ValueError("event_lambda.batch_concurrency must be at least 1")
+
+        if batch_size > 10 and max_batching_window < 1:
+            raise ValueError(
+                "event_lambda.max_batching_window must be at least 1 second "
+                "when batch_size is greater than 10"
+            )
+
         # Resources
         event_lambda = LambdaFunction(
             id=self.settings.system.default_event_lambda_id,
             function_name=f"{stack_name}_{self.settings.system.default_event_lambda_id}",
             existing_resource=False,
-            **asdict(self.settings.build.event_lambda),
+            **lambda_settings,
         )
 
         queue = SqsQueue(
@@ -329,6 +420,8 @@ class App:
             queue_name=f"{stack_name}_{self.settings.system.default_event_queue_id}",
             # Visibility Timeout cannot be less than the lambda timeout
             visibility_timeout=self.settings.build.event_lambda.timeout,
+            batch_size=batch_size,
+            max_batching_window=max_batching_window,
         )
 
         queue.permissions.append(
@@ -357,6 +450,8 @@ class App:
             entity.permissions.insert(0, permission)
 
     def _build_db_permissions(self):
+        from .infrastructure.resources import DynamoDB, DynamoDbPermission
+
         ## DYNAMODB PERMISSIONS ##
         if self.database and isinstance(self.database, DynamoDB):
             permission = DynamoDbPermission(
@@ -425,6 +520,8 @@ class App:
             )
 
     def _build_storage_permissions(self):
+        from .infrastructure.resources import S3Permission
+
         if not self.storage_bucket:
             return
 
@@ -501,6 +598,8 @@ class App:
         )
 
     def _build_events_permissions(self):
+        from .infrastructure.resources import SqsPermission
+
         if not self.event.event_queue:
             return
 
@@ -607,6 +706,7 @@ class App:
         """
         Add a DynamoDB table to the application
         """
+        from .infrastructure.resources import DynamoDB
 
         dynamodb = DynamoDB(
             id=self.settings.system.default_dynamodb_id,
@@ -635,6 +735,7 @@ class App:
         """
         Add an Storage bucket to the application
         """
+        from .infrastructure.resources import S3Bucket
 
         safe = lambda x: x.replace("_", "-").lower()  # noqa
 
@@ -102,6 +102,7 @@ class Fluxional(LogicMixin):
         """
         from .infrastructure.base import Infrastructure
         from .infrastructure.resources import InfrastructureT, InfraSettings
+        from .tools import LookupKey
 
         # Resolve environment variables by attempting to find
         # it in the os if it is not a static value
@@ -127,6 +128,8 @@ class Fluxional(LogicMixin):
                     aws_account_id=self._settings.credentials.aws_account_id,
                     aws_region=self._settings.credentials.aws_region,
                     environment=environment | build_environment,
+                    lambda_handler=os.environ.get(LookupKey.lambda_handler),
+                    lambda_runtime=os.environ.get(LookupKey.lambda_runtime, "3.10"),
                 ),
                 resources=self._app.build_resources(),
             )
@@ -182,6 +185,9 @@ class Fluxional(LogicMixin):
                 extender._handlers._cron_schedule_handlers,
             )
 
+        self._handlers._startup_handlers.extend(extender._handlers._startup_handlers)
+        self._handlers._shutdown_handlers.extend(extender._handlers._shutdown_handlers)
+
         if extender._app.event.active:
             self._app.event = extender._app.event
             _append_only(
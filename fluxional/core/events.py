@@ -1,4 +1,5 @@
 from typing import Literal
+from .tools import Environment
 
 
 def is_http_event(event, context) -> bool:
@@ -57,9 +58,7 @@ def is_cron_schedule_event(event, context) -> bool:
 
 def is_dev_context(event, context) -> bool:
     """Check if the current context is a realtime lambda"""
-    from .tools import Environment
-
-    env = Environment()
+    env = Environment.snapshot()
 
     if env.fluxional_handler_context == "development":
         # Only support http events for now
@@ -114,3 +113,60 @@ def is_sqs_event(event, context) -> bool:
                 return True
 
     return False
+
+
+EVENT_KINDS = Literal[
+    "fluxional",
+    "http",
+    "websocket",
+    "storage",
+    "rate_schedule",
+    "cron_schedule",
+    "sqs",
+]
+
+_S3_ACTIONS_BY_EVENT_NAME: dict[str, S3_ACTIONS] = {
+    **{name: "create" for name in S3_BUCKET_CREATE_EVENTS},
+    **{name: "delete" for name in S3_BUCKET_DELETE_EVENTS},
+}
+
+_SCHEDULE_KINDS: dict[str, EVENT_KINDS] = {
+    "RateSchedule": "rate_schedule",
+    "CronSchedule": "cron_schedule",
+}
+
+
+def classify_event(event, context) -> tuple[EVENT_KINDS, str | None] | None:
+    """Fingerprint the event in a single pass and return its kind
+    together with the route key used to look up its handler.
+
+    The route key is the websocket route, the storage action or the
+    schedule name. Sqs events are keyed per record by the dispatcher."""
+    if "fluxional_event" in event:
+        return ("fluxional", None)
+
+    if "httpMethod" in event:
+        return ("http", None)
+
+    request_context = event.get("requestContext")
+    if request_context and "routeKey" in request_context:
+        return ("websocket", request_context["routeKey"])
+
+    records = event.get("Records")
+    if records:
+        record = records[0]
+        event_source = record.get("eventSource")
+
+        if event_source == "aws:s3":
+            action = _S3_ACTIONS_BY_EVENT_NAME.get(record.get("eventName"))
+            if action:
+                return ("storage", action)
+
+        elif event_source == "aws:sqs":
+            return ("sqs", None)
+
+    schedule_kind = _SCHEDULE_KINDS.get(event.get("schedule_type"))
+    if schedule_kind:
+        return (schedule_kind, event.get("schedule_name"))
+
+    return None
@@ -1,18 +1,19 @@
-from typing import Any
-from fluxional.types import HandlerFunctionT, AsyncHandlerFunctionT, AsyncTypeGuard
+from __future__ import annotations
+from typing import Any, Awaitable, Mapping, TYPE_CHECKING
+from types import MappingProxyType
+from fluxional.types import (
+    HandlerFunctionT,
+    AsyncHandlerFunctionT,
+    AsyncTypeGuard,
+    LifecycleFunctionT,
+)
 from fluxional.core.events import (
     is_http_event,
-    is_fluxional_event,
-    is_websocket_event,
     is_dev_context,
-    is_s3_bucket_create_event,
-    is_s3_bucket_delete_event,
-    is_rate_schedule_event,
-    is_cron_schedule_event,
-    is_sqs_event,
+    classify_event,
     S3_ACTIONS,
+    EVENT_KINDS,
 )
-from fluxional.core.app import App
 from fluxional.exceptions import NoHandlerFound
 from fluxional.utils import (
     default_aws_account_id,
@@ -21,16 +22,27 @@ from fluxional.utils import (
     default_aws_access_key_id,
 )
 from .settings import Settings
-import asyncio
+import atexit
+import inspect
+import signal
 import sys
-from uuid import uuid4
-import time
+import threading
 import os
 import json
+import traceback
+from uuid import uuid4
 from fluxional.core.tools import LookupKey
 from .types import LambdaContext
 
+# asyncio and the thread pool are only needed by async handlers and batches,
+# they are imported on first use to keep cold starts low
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from fluxional.core.app import App
+
 _HandlerFunctionT = HandlerFunctionT | AsyncHandlerFunctionT
+_RouteKeyT = tuple[EVENT_KINDS, str | None]
 
 
 class Handlers:
@@ -46,15 +58,31 @@ class Handlers:
         self._rate_schedule_handlers: dict[str, _HandlerFunctionT] = {}
         self._cron_schedule_handlers: dict[str, _HandlerFunctionT] = {}
         self._sqs_handlers: dict[str, _HandlerFunctionT] = {}
+        self._routes: Mapping[_RouteKeyT, _HandlerFunctionT] | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._startup_handlers: list[LifecycleFunctionT] = []
+        self._shutdown_handlers: list[LifecycleFunctionT] = []
+        self._started = False
 
     def _default_handlers(self) -> dict[str, HandlerFunctionT]:
         return {
             "deployment_handler": lambda event, context: deployment_handler(
-                event, context, settings=self._settings
+                event, context, settings=self._settings, app=self._app
             ),
             "cli_dev_handler": lambda event, context: cli_dev_handler(
                 event, context, settings=self._settings
             ),
+            "cli_tune_handler": lambda event, context: cli_tune_handler(
+                event, context, settings=self._settings
+            ),
+            "cli_local_handler": lambda event, context: cli_local_handler(
+                event,
+                context,
+                settings=self._settings,
+                app=self._app,
+                handler=self.sync_or_async,
+            ),
         }
 
     def _register_default_handlers(self) -> None:
@@ -66,6 +94,77 @@ class Handlers:
     def add_fluxional_handler(self, handler: _HandlerFunctionT):
         self._fluxional_handlers.append(handler)
 
+    def add_startup_handler(self, handler: LifecycleFunctionT) -> None:
+        self._startup_handlers.append(handler)
+
+    def add_shutdown_handler(self, handler: LifecycleFunctionT) -> None:
+        self._shutdown_handlers.append(handler)
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Return the event loop shared by every invocation of the container so that
+        loop bound resources (sessions, clients) survive warm invocations
+        """
+        if self._loop is None or self._loop.is_closed():
+            import asyncio
+
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+
+        return self._loop
+
+    def run_async(self, awaitable: Awaitable[Any]) -> Any:
+        return self.get_loop().run_until_complete(awaitable)
+
+    def _run_lifecycle_handler(self, handler: LifecycleFunctionT) -> None:
+        result = handler()
+
+        if inspect.isawaitable(result):
+            self.run_async(result)
+
+    def startup(self) -> None:
+        """Run the startup handlers once per container"""
+        if self._started:
+            return
+
+        self._started = True
+
+        try:
+            for handler in self._startup_handlers:
+                self._run_lifecycle_handler(handler)
+        except BaseException:
+            # The next invocation starts the app again
+            self._started = False
+            raise
+
+        atexit.register(self.shutdown)
+
+        # Lambda sends SIGTERM before shutting the container down
+        if (
+            self._shutdown_handlers
+            and threading.current_thread() is threading.main_thread()
+            and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
+        ):
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    def shutdown(self) -> None:
+        """Run the shutdown handlers and release the event loop and thread pool"""
+        if not self._started:
+            return
+
+        self._started = False
+
+        for handler in self._shutdown_handlers:
+            self._run_lifecycle_handler(handler)
+
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
     def get_result(self, handler: _HandlerFunctionT, event, context):
         result: Any = None
 
@@ -75,8 +174,7 @@ class Handlers:
 
         try:
             if AsyncTypeGuard.is_async(handler):
-                loop = asyncio.get_event_loop()
-                result = loop.run_until_complete(handler(event, context))
+                result = self.run_async(handler(event, context))
 
             else:
                 result = handler(event, context)
@@ -90,62 +188,163 @@ class Handlers:
         if exception is not None:
             raise exception
 
+    def compile_routes(self) -> Mapping[_RouteKeyT, _HandlerFunctionT]:
+        """
+        Build the frozen route table used to dispatch events, it is built again
+        once a handler is added
+        """
+        routes: dict[_RouteKeyT, _HandlerFunctionT] = {}
+
+        if self._http_handlers:
+            routes[("http", None)] = self._http_handlers[0]
+
+        for route, handler in self._websocket_handlers.items():
+            routes[("websocket", route)] = handler
+
+        for action, handler in self._storage_handlers.items():
+            routes[("storage", action)] = handler
+
+        for name, handler in self._rate_schedule_handlers.items():
+            routes[("rate_schedule", name)] = handler
+
+        for name, handler in self._cron_schedule_handlers.items():
+            routes[("cron_schedule", name)] = handler
+
+        for name, handler in self._sqs_handlers.items():
+            routes[("sqs", name)] = handler
+
+        return MappingProxyType(routes)
+
+    @property
+    def routes(self) -> Mapping[_RouteKeyT, _HandlerFunctionT]:
+        if self._routes is None:
+            self._routes = self.compile_routes()
+
+        return self._routes
+
+    def get_record_handler(self, record: dict) -> tuple[_HandlerFunctionT, Any]:
+        """Return the @flux.event handler of an sqs record and its data"""
+        body = json.loads(record["body"])
+        handler = self.routes.get(("sqs", body["event_name"]))
+
+        if handler is None:
+            raise NoHandlerFound(f"No handler found for event {body['event_name']}")
+
+        return handler, body["data"]
+
+    def process_record(self, record: dict, context) -> BaseException | None:
+        """Run the handler of a single sqs record and return its exception if any"""
+        try:
+            handler, data = self.get_record_handler(record)
+            self.get_result(handler, data, context)
+        except Exception as e:
+            return e
+
+        return None
+
+    def _get_executor(self, max_workers: int) -> ThreadPoolExecutor:
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        return self._executor
+
+    def process_records_concurrently(
+        self, records: list[dict], context, concurrency: int
+    ) -> list[BaseException | None]:
+        """
+        Run the records of a batch concurrently. Async handlers share the event
+        loop while sync handlers run on a bounded thread pool.
+        """
+        import asyncio
+
+        executor = self._get_executor(concurrency)
+
+        async def run(record: dict, semaphore: asyncio.Semaphore) -> Any:
+            handler, data = self.get_record_handler(record)
+
+            async with semaphore:
+                if AsyncTypeGuard.is_async(handler):
+                    return await handler(data, context)
+
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(executor, handler, data, context)
+
+        async def gather() -> list[Any]:
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(
+                *[run(record, semaphore) for record in records],
+                return_exceptions=True,
+            )
+
+        results = self.run_async(gather())
+
+        return [
+            result if isinstance(result, BaseException) else None for result in results
+        ]
+
+    def process_batch(self, event, context) -> dict[str, list[dict[str, str]]]:
+        """
+        Run every record of an sqs batch and report the ones that failed
+        so that only those are retried (ReportBatchItemFailures)
+        """
+        records = event["Records"]
+        concurrency = (
+            self._settings.build.event_lambda.batch_concurrency if self._settings else 1
+        )
+
+        if concurrency > 1 and len(records) > 1:
+            errors = self.process_records_concurrently(records, context, concurrency)
+        else:
+            errors = [self.process_record(record, context) for record in records]
+
+        failures: list[dict[str, str]] = []
+
+        for record, error in zip(records, errors):
+            if error is not None:
+                traceback.print_exception(error)
+                failures.append({"itemIdentifier": record.get("messageId", "")})
+
+        return {"batchItemFailures": failures}
+
     def sync_or_async(self, event, context) -> Any:
+        route = classify_event(event, context)
 
-        handlers = []
+        if route is None:
+            raise NoHandlerFound("No handler found")
 
-        # Handler context
-        if is_dev_context(event, context):
-            handlers = [lambda e, c: dev_handler(e, c, settings=self._settings)]
+        kind, _ = route
 
         # Handle fluxional events
-        elif is_fluxional_event(event, context):
-            handlers = self._fluxional_handlers
-            for handler in handlers:
+        if kind == "fluxional":
+            if not self._fluxional_handlers:
+                raise NoHandlerFound("No handler found")
+
+            for handler in self._fluxional_handlers:
                 result = self.get_result(handler, event, context)
                 if result:
                     return result
 
-        # Handle http events
-        elif is_http_event(event, context):
-            handlers = self._http_handlers
-
-        # Handle websocket events
-        elif is_websocket_event(event, context):
-            route = is_websocket_event(event, context)
-            if route in self._websocket_handlers and isinstance(route, str):
-                handlers = [self._websocket_handlers[route]]
-
-        elif is_s3_bucket_create_event(event, context):
-            if "create" in self._storage_handlers:
-                handlers = [self._storage_handlers["create"]]
-
-        elif is_s3_bucket_delete_event(event, context):
-            if "delete" in self._storage_handlers:
-                handlers = [self._storage_handlers["delete"]]
-
-        elif is_rate_schedule_event(event, context):
-            if event["schedule_name"] in self._rate_schedule_handlers:
-                handlers = [self._rate_schedule_handlers[event["schedule_name"]]]
-
-        elif is_cron_schedule_event(event, context):
-            if event["schedule_name"] in self._cron_schedule_handlers:
-                handlers = [self._cron_schedule_handlers[event["schedule_name"]]]
-
-        elif is_sqs_event(event, context):
-            # @TODO: Probably will need to be refractored
-            body = json.loads(event["Records"][0]["body"])
-            if body["event_name"] in self._sqs_handlers:
-                handlers = [
-                    lambda _, c: self._sqs_handlers[body["event_name"]](body["data"], c)
-                ]
-
-        if not handlers:
+            return None
+
+        self.startup()
+
+        # Handler context - Only support http events for now
+        if kind == "http" and is_dev_context(event, context):
+            return self.get_result(
+                lambda e, c: dev_handler(e, c, settings=self._settings), event, context
+            )
+
+        if kind == "sqs":
+            return self.process_batch(event, context)
+
+        route_handler = self.routes.get(route)
+
+        if route_handler is None:
             raise NoHandlerFound("No handler found")
 
-        # This may need to be refractored at some point
-        handler = handlers[0]
-        return self.get_result(handler, event, context)
+        return self.get_result(route_handler, event, context)
 
     def synth_handler(self) -> Any:
         """Special case for when file is called directly with
@@ -156,10 +355,12 @@ class Handlers:
 
     def handler(self) -> Any:
         self._register_default_handlers()
+        self._routes = self.compile_routes()
         return self.sync_or_async
 
     def add_api_handler(self, handler: _HandlerFunctionT) -> None:
         self._http_handlers.append(handler)
+        self._routes = None
 
     def add_websocket_route_handler(
         self,
@@ -167,11 +368,25 @@ class Handlers:
         handler: _HandlerFunctionT,
     ) -> None:
         self._websocket_handlers[route] = handler
+        self._routes = None
 
     def add_storage_handler(
         self, action: S3_ACTIONS, handler: _HandlerFunctionT
     ) -> None:
         self._storage_handlers[action] = handler
+        self._routes = None
+
+    def add_rate_schedule_handler(self, name: str, handler: _HandlerFunctionT) -> None:
+        self._rate_schedule_handlers[name] = handler
+        self._routes = None
+
+    def add_cron_schedule_handler(self, name: str, handler: _HandlerFunctionT) -> None:
+        self._cron_schedule_handlers[name] = handler
+        self._routes = None
+
+    def add_sqs_handler(self, name: str, handler: _HandlerFunctionT) -> None:
+        self._sqs_handlers[name] = handler
+        self._routes = None
 
 
 def cli_dev_handler(event: dict, context: Any, settings: Settings | None = None):
@@ -189,13 +404,111 @@ def cli_dev_handler(event: dict, context: Any, settings: Settings | None = None)
     run_dev(
         settings.stack_name,
         handler=context["handler"],
+        pool_size=settings.development.pool_size,
+        runner_port=settings.development.runner_port,
+        max_workers=settings.development.max_workers,
+        max_queue_size=settings.development.max_queue_size,
+        hot_reload=event.get("reload", False) or settings.development.hot_reload,
+        stats_interval=settings.development.stats_interval,
+        path=context.get("path", "."),
+    )
+
+    return True
+
+
+def cli_local_handler(
+    event: dict,
+    context: Any,
+    settings: Settings | None = None,
+    app: App | None = None,
+    handler: HandlerFunctionT | None = None,
+):
+    if not event.get("fluxional_event"):
+        return None
+
+    if event["fluxional_event"] != "cli_local":
+        return None
+
+    if not settings or not app or not handler:
+        raise ValueError("Settings, app and handler are required to run locally.")
+
+    from fluxional.local import run_local
+
+    run_local(
+        handler,
+        app=app,
+        settings=settings,
+        host=event.get("host", "127.0.0.1"),
+        port=event.get("port", 3000),
+        storage_path=event.get("storage_path", ".fluxional/storage"),
+    )
+
+    return True
+
+
+def otel_environment(settings: Settings) -> dict[str, str]:
+    """Vars necessary for otel"""
+    return {
+        "OTEL_EXPORTER_OTLP_ENDPOINT": settings.monitoring.otel.exporter_otlp_endpoint,
+        "OTEL_EXPORTER_OTLP_HEADERS": settings.monitoring.otel.exporter_otlp_headers,
+        "AWS_LAMBDA_EXEC_WRAPPER": settings.system.aws_lambda_exec_wrapper,
+        "OTEL_SERVICE_NAME": settings.monitoring.otel.service_name,
+    }
+
+
+def cli_tune_handler(
+    event: dict,
+    context: Any,
+    settings: Settings | None = None,
+):
+    if not event.get("fluxional_event"):
+        return None
+
+    if event["fluxional_event"] != "cli_tune":
+        return None
+
+    if not settings:
+        raise ValueError("Settings are required to tune.")
+
+    with open(event["event"]) as f:
+        recorded_event = json.load(f)
+
+    # Resolved like the synth does for the deployed functions
+    environment = {
+        k: os.environ.get(k, v) for k, v in settings.build.environment.items()
+    }
+
+    if settings.monitoring.otel.enable:
+        environment |= otel_environment(settings)
+
+    from fluxional.tune import run_tune
+
+    run_tune(
+        context["handler"],
+        event=recorded_event,
+        stack_name=settings.stack_name,
+        memory_sizes=event["memory_sizes"],
+        invocations=event.get("invocations", 10),
+        target=event.get("target"),
+        lambda_handler=settings.system.lambda_handler,
+        requirements_file=settings.build.requirements_file,
+        include_otel=settings.monitoring.otel.enable,
+        include_fte=settings.monitoring.telemetry.enable,
+        lambda_dockerfile_ext=settings.system.lambda_dockerfile_ext,
+        lambda_dockerfile_pre_install=settings.system.lambda_dockerfile_pre_install,
+        dependencies=settings.build.dependencies,
+        environment=environment,
+        build_path=settings.build.build_path or ".",
     )
 
     return True
 
 
 def deployment_handler(
-    event: dict, context: Any, settings: Settings | None = None
+    event: dict,
+    context: Any,
+    settings: Settings | None = None,
+    app: App | None = None,
 ) -> bool | None:
     if not event.get("fluxional_event"):
         return None
@@ -224,17 +537,7 @@ def deployment_handler(
         environment[LookupKey.handler_context] = "development"
 
     if enable_otel:
-        # Add vars necessary for otel
-        environment["OTEL_EXPORTER_OTLP_ENDPOINT"] = (
-            settings.monitoring.otel.exporter_otlp_endpoint
-        )
-        environment["OTEL_EXPORTER_OTLP_HEADERS"] = (
-            settings.monitoring.otel.exporter_otlp_headers
-        )
-
-        environment["AWS_LAMBDA_EXEC_WRAPPER"] = settings.system.aws_lambda_exec_wrapper
-
-        environment["OTEL_SERVICE_NAME"] = settings.monitoring.otel.service_name
+        environment |= otel_environment(settings)
 
     requirements_file = settings.build.requirements_file
     build_path = settings.build.build_path or "."
@@ -251,6 +554,33 @@ def deployment_handler(
         tag=f"{stack_name.lower()}_base_image",
     )
 
+    resources: dict[str, dict] | None = None
+    if app:
+        resources = app.build_resources(as_dict=True)  # type: ignore
+
+    functions = [
+        resource
+        for resource in (resources or {}).values()
+        if resource["resource_type"] == "lambda_function"
+    ]
+
+    # Functions with their own requirements are built from their own dockerfile
+    function_requirements = {
+        resource["dockerfile"]: resource["requirements"]
+        for resource in functions
+        if resource["packaging"] == "image" and resource["requirements"]
+    }
+
+    # Zip functions get their requirements from a layer
+    layers = {
+        resource["layer"]: (
+            resource["requirements"] or requirements_file,
+            resource["architecture"],
+        )
+        for resource in functions
+        if resource["packaging"] == "zip"
+    }
+
     if event["fluxional_event"] == "cli_destroy":
         engine.destroy(
             handler,
@@ -261,6 +591,11 @@ def deployment_handler(
             lambda_handler=settings.system.lambda_handler,
             show_logs=show_logs,
             lambda_dockerfile_ext=lambda_dockerfile_ext,
+            lambda_dockerfile_pre_install=settings.system.lambda_dockerfile_pre_install,
+            stack_name=stack_name,
+            keep_image=settings.build.keep_image,
+            function_requirements=function_requirements,
+            layers=layers,
         )
 
     else:
@@ -275,37 +610,120 @@ def deployment_handler(
             include_otel=enable_otel,
             include_fte=enable_telemetry,
             lambda_dockerfile_ext=lambda_dockerfile_ext,
+            lambda_dockerfile_pre_install=settings.system.lambda_dockerfile_pre_install,
+            # Without the app there is nothing to compare the deploy with
+            stack_name=stack_name if settings.build.incremental and app else None,
+            resources=resources,
+            hotswap=settings.build.hotswap,
+            force=event.get("force", False),
+            keep_image=settings.build.keep_image,
+            function_requirements=function_requirements,
+            layers=layers,
         )
 
     return True
 
 
 class _DevState:
-    subscriber_id: str | None = None
-    acknowledged: bool = False
-    response: dict | None = None
+    def __init__(self) -> None:
+        self.subscriber_id: str | None = None
+        self.response: dict | None = None
+        # Set from the mqtt client threads, the handler blocks on them
+        self._acknowledged = threading.Event()
+        self._responded = threading.Event()
+
+    @property
+    def acknowledged(self) -> bool:
+        return self._acknowledged.is_set()
 
     def to_dict(self, value: bytes) -> dict:
         return json.loads(value.decode("utf-8"))
 
     def acknowledge(self, **kwargs):
-        if not self.acknowledged:
-            self.acknowledged = True
+        if not self._acknowledged.is_set():
             # Set the subscriber id
             self.subscriber_id = self.to_dict(kwargs["payload"])["subscriber_id"]
+            self._acknowledged.set()
 
     def on_event(self, **kwargs):
         payload = self.to_dict(kwargs["payload"])
         if payload["subscriber_id"] == self.subscriber_id:
             self.response = payload["response"]
+            self._responded.set()
+
+    def wait_for_acknowledgement(self, timeout: float) -> bool:
+        return self._acknowledged.wait(timeout)
+
+    def wait_for_response(self, timeout: float) -> dict | None:
+        if not self._responded.wait(timeout):
+            return None
+
+        return self.response
+
+
+class _DevSubscriptions:
+    """
+    One mqtt connection per container, connected again once closed. The
+    acknowledge and response topics of every event are received through wildcard
+    subscriptions and routed to the state of the pending event by its id.
+    """
+
+    def __init__(self) -> None:
+        self._client: Any = None
+        self._states: dict[str, _DevState] = {}
+        self._lock = threading.Lock()
+
+    def get_client(self) -> Any:
+        with self._lock:
+            # An interrupted connection resumes by itself, a closed one is gone
+            if self._client is not None and self._client.closed.is_set():
+                self._client = None
+
+            if self._client is None:
+                from fluxional.dev.client import DevClient
+
+                client = DevClient()
+                client.connect()
+                client.subscribe("fluxional/acknowledge/+", self.on_acknowledge)
+                client.subscribe("fluxional/response/+", self.on_response)
+                self._client = client
+
+        return self._client
+
+    def register(self, event_id: str, state: _DevState) -> None:
+        self._states[event_id] = state
+
+    def unregister(self, event_id: str) -> None:
+        self._states.pop(event_id, None)
+
+    def _get_state(self, topic: str) -> _DevState | None:
+        return self._states.get(topic.rsplit("/", 1)[-1])
+
+    def on_acknowledge(self, **kwargs):
+        if state := self._get_state(kwargs["topic"]):
+            state.acknowledge(**kwargs)
+
+    def on_response(self, **kwargs):
+        if state := self._get_state(kwargs["topic"]):
+            state.on_event(**kwargs)
+
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+
+        if client is not None:
+            client.disconnect()
+
+
+_dev_subscriptions = _DevSubscriptions()
 
 
 def dev_handler(
     event: dict,
     context: LambdaContext,
     settings: Settings | None = None,
-    ack_timeout=15,
-    timeout=15,
+    ack_timeout: float | None = None,
+    timeout: float | None = None,
     state=_DevState,
 ):
     state = state()
@@ -313,16 +731,17 @@ def dev_handler(
     if not settings:
         raise ValueError("Settings are required to run RTL.")
 
-    from fluxional.dev.client import DevClient
+    if ack_timeout is None:
+        ack_timeout = settings.development.ack_timeout
+
+    if timeout is None:
+        timeout = settings.development.response_timeout
 
     event_id = str(uuid4())
     stack_name = settings.stack_name
 
-    client = DevClient()
-    client.connect()
-
-    client.subscribe(f"fluxional/response/{event_id}", state.on_event)
-    client.subscribe(f"fluxional/acknowledge/{event_id}", state.acknowledge)
+    # The connection is shared by every invocation of the container
+    client = _dev_subscriptions.get_client()
 
     # execution context
     starts_with = ["AWS_", "fluxional"]
@@ -332,38 +751,37 @@ def dev_handler(
         if any(key.startswith(start) for start in starts_with)
     }
 
-    pub = client.publish(
-        f"fluxional/events/{stack_name}",
-        {
-            "type": "new_event",
-            "event_id": event_id,
-            "event": event,
-            "execution_context": execution_context,
-        },
-    )
+    # Registered before publishing so that the acknowledgement can't be missed
+    _dev_subscriptions.register(event_id, state)
+
+    try:
+        pub = client.publish(
+            f"fluxional/events/{stack_name}",
+            {
+                "type": "new_event",
+                "event_id": event_id,
+                "event": event,
+                "execution_context": execution_context,
+            },
+        )
 
-    pub.result(timeout=timeout)
+        pub.result(timeout=timeout)
 
-    # This needs to be acknowledged by some subscriber within
-    # the timeout
-    start = time.time()
-    while True:
-        if time.time() - start > ack_timeout:
+        # This needs to be acknowledged by some subscriber within
+        # the timeout
+        if not state.wait_for_acknowledgement(ack_timeout):
             return {"statusCode": 500, "body": "Failed to acknowledge event."}
 
-        if state.acknowledged:
-            break
-
-    # Only http needs to wait for a response
-    # The rest are async
-    start = time.time()
-    if is_http_event(event, context):
-        # But less than timeout which is pretty long already
-        while True:
-            if time.time() - start > timeout:
+        # Only http needs to wait for a response
+        # The rest are async
+        if is_http_event(event, context):
+            # But less than timeout which is pretty long already
+            response = state.wait_for_response(timeout)
+            if not response:
                 return {"statusCode": 500, "body": "Failed to get a response in time."}
 
-            if state.response:
-                return state.response
-    else:
-        return {"statusCode": 200}
+            return response
+        else:
+            return {"statusCode": 200}
+    finally:
+        _dev_subscriptions.unregister(event_id)
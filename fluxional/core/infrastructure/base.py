@@ -14,8 +14,11 @@ from .resources import (
     CronSchedule,
     SqsQueue,
 )
+from .types import ArchitectureT
 from .cdk import (
     add_lambda_function_to_stack,
+    add_layer_version_to_stack,
+    add_zip_lambda_function_to_stack,
     add_existing_rest_api_gateway_to_stack,
     add_rest_api_gateway_to_stack,
     add_dynamodb_to_stack,
@@ -29,6 +32,7 @@ from .cdk import (
 from aws_cdk import (
     Stack as CDKStack,
     App,
+    Duration,
     Environment,
     aws_apigateway,
     aws_iam,
@@ -46,7 +50,9 @@ from aws_cdk.aws_apigatewayv2 import WebSocketApi
 from aws_cdk.aws_s3 import HttpMethods
 from fluxional.exceptions import MissingStackResource
 from fluxional.utils import default_aws_account_id, default_aws_region
+from fluxional.core.settings import _OTEL_ENVS
 from fluxional.core.tools import LookupKey
+import re
 
 
 class Stack(CDKStack):
@@ -57,11 +63,17 @@ class Stack(CDKStack):
         aws_account_id: str,
         aws_region: str,
         environment_vars: dict = {},
+        lambda_handler: str | None = None,
+        lambda_runtime: str = "3.10",
     ):
         self._stack_name = stack_name
         self._aws_account_id = aws_account_id
         self._aws_region = aws_region
         self._environment_vars = environment_vars
+        self._lambda_handler = lambda_handler
+        self._lambda_runtime = lambda_runtime
+        # Zip functions with the same requirements share their layer
+        self._layers: dict[str, aws_lambda.LayerVersion] = {}
         self._environment = Environment(account=aws_account_id, region=aws_region)
         self._app = App()
         super().__init__(self._app, self._stack_name, env=self._environment)
@@ -87,7 +99,14 @@ class Stack(CDKStack):
 
                         source = aws_lambda_event_sources.SqsEventSource(
                             queue,
-                            batch_size=1,
+                            batch_size=resource.batch_size,
+                            max_batching_window=(
+                                Duration.seconds(resource.max_batching_window)
+                                if resource.max_batching_window
+                                else None
+                            ),
+                            # Only the failed records of a batch are retried
+                            report_batch_item_failures=True,
                         )
                         func.add_event_source(source)
 
@@ -162,21 +181,65 @@ class Stack(CDKStack):
                             )
                         )
 
+    def get_layer(
+        self, directory: str, architecture: ArchitectureT = "x86_64"
+    ) -> aws_lambda.LayerVersion:
+        if directory not in self._layers:
+            self._layers[directory] = add_layer_version_to_stack(
+                stack=self,
+                id=re.sub(r"[^A-Za-z0-9]+", "_", directory).strip("_"),
+                directory=directory,
+                runtime=self._lambda_runtime,
+                architecture=architecture,
+            )
+
+        return self._layers[directory]
+
     def add_lambda_function(self, resource: LambdaFunction):
-        lambda_ = add_lambda_function_to_stack(
-            stack=self,
-            id=resource.id,
-            function_name=resource.function_name,
-            directory=resource.directory,
-            file=resource.dockerfile,
-            memory_size=resource.memory_size,
-            timeout=resource.timeout,
-            description=resource.description,
-        )
+        lambda_: aws_lambda.Function
+        if resource.packaging == "zip":
+            if not self._lambda_handler:
+                raise ValueError(
+                    f"A handler is required to package {resource.function_name} as a zip"
+                )
+
+            lambda_ = add_zip_lambda_function_to_stack(
+                stack=self,
+                id=resource.id,
+                function_name=resource.function_name,
+                directory=resource.directory,
+                handler=self._lambda_handler,
+                runtime=self._lambda_runtime,
+                layers=(
+                    [self.get_layer(resource.layer, resource.architecture)]
+                    if resource.layer
+                    else []
+                ),
+                memory_size=resource.memory_size,
+                timeout=resource.timeout,
+                description=resource.description,
+                architecture=resource.architecture,
+            )
+        else:
+            lambda_ = add_lambda_function_to_stack(
+                stack=self,
+                id=resource.id,
+                function_name=resource.function_name,
+                directory=resource.directory,
+                file=resource.dockerfile,
+                memory_size=resource.memory_size,
+                timeout=resource.timeout,
+                description=resource.description,
+                architecture=resource.architecture,
+            )
 
         # Add environment variables
         if self._environment_vars:
             for k in self._environment_vars:
+                # The otel extension is only installed in images
+                if resource.packaging == "zip" and k in _OTEL_ENVS:
+                    continue
+
                 lambda_.add_environment(key=k, value=self._environment_vars[k])
 
                 # @DEV - May be refractored to permission in the future
@@ -495,6 +558,8 @@ class Infrastructure:
             aws_region=self.settings.aws_region or default_aws_region(),
             stack_name=self.settings.stack_name,
             environment_vars=self.settings.environment,
+            lambda_handler=self.settings.lambda_handler,
+            lambda_runtime=self.settings.lambda_runtime,
         )
 
     def stack(self) -> Stack:
@@ -9,6 +9,7 @@ from aws_cdk import (
     aws_s3,
     aws_events,
     aws_sqs,
+    aws_ecr_assets,
     CfnOutput,
 )
 from typing import Literal
@@ -21,7 +22,7 @@ from .types import (
     DynamoDBGsiT,
 )
 import aws_cdk.aws_apigatewayv2_alpha as aws_apigateway_v2
-from .types import RateDurationUnitT
+from .types import ArchitectureT, RateDurationUnitT
 
 
 def add_rate_schedule_to_stack(
@@ -79,6 +80,15 @@ def add_cron_schedule_to_stack(
     return rule
 
 
+def _architecture(architecture: ArchitectureT) -> aws_lambda.Architecture:
+    architectures = {
+        "x86_64": aws_lambda.Architecture.X86_64,
+        "arm64": aws_lambda.Architecture.ARM_64,
+    }
+
+    return architectures[architecture]
+
+
 def add_lambda_function_to_stack(
     *,
     stack: Stack,
@@ -89,8 +99,17 @@ def add_lambda_function_to_stack(
     memory_size: int,
     timeout: int,
     description: str,
+    architecture: ArchitectureT = "x86_64",
 ) -> aws_lambda.Function:
-    ecr_image = aws_lambda.EcrImageCode.from_asset_image(directory=directory, file=file)
+    platforms = {
+        "x86_64": aws_ecr_assets.Platform.LINUX_AMD64,
+        "arm64": aws_ecr_assets.Platform.LINUX_ARM64,
+    }
+
+    # The image is built for the platform of the function
+    ecr_image = aws_lambda.EcrImageCode.from_asset_image(
+        directory=directory, file=file, platform=platforms[architecture]
+    )
 
     lambda_function = aws_lambda.Function(
         stack,
@@ -99,6 +118,79 @@ def add_lambda_function_to_stack(
         code=ecr_image,
         handler=aws_lambda.Handler.FROM_IMAGE,
         runtime=aws_lambda.Runtime.FROM_IMAGE,
+        architecture=_architecture(architecture),
+        function_name=function_name,
+        memory_size=memory_size,
+        timeout=Duration.seconds(timeout),
+        log_format=aws_lambda.LogFormat.JSON.value,
+    )
+
+    setattr(stack, id, lambda_function)
+
+    return lambda_function
+
+
+def _python_runtime(runtime: str) -> aws_lambda.Runtime:
+    runtimes = {
+        "3.10": aws_lambda.Runtime.PYTHON_3_10,
+        "3.11": aws_lambda.Runtime.PYTHON_3_11,
+        "3.12": aws_lambda.Runtime.PYTHON_3_12,
+    }
+
+    return runtimes[runtime]
+
+
+def add_layer_version_to_stack(
+    *,
+    stack: Stack,
+    id: str,
+    directory: str,
+    runtime: str,
+    architecture: ArchitectureT = "x86_64",
+) -> aws_lambda.LayerVersion:
+    # The asset is hashed on its content, an unchanged layer is not republished
+    layer = aws_lambda.LayerVersion(
+        stack,
+        id,
+        code=aws_lambda.Code.from_asset(directory),
+        compatible_runtimes=[_python_runtime(runtime)],
+        compatible_architectures=[_architecture(architecture)],
+    )
+
+    setattr(stack, id, layer)
+
+    return layer
+
+
+def add_zip_lambda_function_to_stack(
+    *,
+    stack: Stack,
+    id: str,
+    function_name: str,
+    directory: str,
+    handler: str,
+    runtime: str,
+    layers: list[aws_lambda.ILayerVersion],
+    memory_size: int,
+    timeout: int,
+    description: str,
+    architecture: ArchitectureT = "x86_64",
+) -> aws_lambda.Function:
+    # Only the code, the requirements are in the layers
+    code = aws_lambda.Code.from_asset(
+        directory,
+        exclude=[".fluxional", "cdk.out", "Dockerfile*", "__pycache__"],
+    )
+
+    lambda_function = aws_lambda.Function(
+        stack,
+        id=id,
+        description=description,
+        code=code,
+        handler=handler,
+        runtime=_python_runtime(runtime),
+        architecture=_architecture(architecture),
+        layers=layers,
         function_name=function_name,
         memory_size=memory_size,
         timeout=Duration.seconds(timeout),
@@ -8,6 +8,7 @@ from .types import (
     DynamoDBLsiT,
     RateDurationUnitT,
     DynamoDBGsiT,
+    ArchitectureT,
 )
 
 
@@ -93,6 +94,12 @@ class LambdaFunction(_ResourceT):
     memory_size: int = field(default=128)
     timeout: int = field(default=30)
     description: str = field(default="")
+    # Requirements file of the image, built from the dockerfile of the same name
+    requirements: Optional[str] = field(default=None)
+    packaging: Literal["image", "zip"] = field(default="image")
+    architecture: ArchitectureT = field(default="x86_64")
+    # Directory of the requirements layer of zip functions
+    layer: Optional[str] = field(default=None)
     resource_type: Literal["lambda_function"] = field(default="lambda_function")
 
 
@@ -145,6 +152,8 @@ class SnsTopic(_ResourceT):
 class SqsQueue(_ResourceT):
     queue_name: str
     visibility_timeout: int = field(default=30)
+    batch_size: int = field(default=1)
+    max_batching_window: int = field(default=0)
     resource_type: Literal["sqs_queue"] = field(default="sqs_queue")
 
 
@@ -198,6 +207,9 @@ class InfraSettings:
     aws_account_id: Optional[str]
     aws_region: Optional[str]
     environment: dict[str, str] = field(default_factory=dict)
+    # Handler and python version of the zip functions
+    lambda_handler: Optional[str] = field(default=None)
+    lambda_runtime: str = field(default="3.10")
 
 
 InfraResources = dict[str, AllResources]
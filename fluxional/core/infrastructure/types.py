@@ -19,6 +19,9 @@ DynamoDBStreamT = Literal["new_image", "old_image", "new_and_old_images"]
 DynamoDBAttributeTypeT = Literal["string", "number", "binary"]
 RateDurationUnitT = Literal["days", "hours", "minutes", "seconds", "milliseconds"]
 
+# LAMBDA
+ArchitectureT = Literal["x86_64", "arm64"]
+
 
 class DynamoDBKeyT(TypedDict):
     key_name: str
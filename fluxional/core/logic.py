@@ -1,4 +1,4 @@
-from fluxional.types import HandlerFunctionT, AsyncHandlerFunctionT
+from fluxional.types import HandlerFunctionT, AsyncHandlerFunctionT, LifecycleFunctionT
 from .infrastructure.types import RateDurationUnitT
 from .handlers import Handlers
 from .app import App
@@ -97,7 +97,7 @@ class Run:
             )
 
             # Add the handler to handlers
-            self._handlers._rate_schedule_handlers[function_name] = handler
+            self._handlers.add_rate_schedule_handler(function_name, handler)
 
             return handler
 
@@ -128,7 +128,7 @@ class Run:
             )
 
             # Add the handler to handlers
-            self._handlers._cron_schedule_handlers[function_name] = handler
+            self._handlers.add_cron_schedule_handler(function_name, handler)
 
             return handler
 
@@ -146,7 +146,7 @@ class Event:
     ):
         function_name = handler.__name__
         self._app.event.active = True
-        self._handlers._sqs_handlers[function_name] = handler
+        self._handlers.add_sqs_handler(function_name, handler)
         return handler
 
 
@@ -187,6 +187,20 @@ class LogicMixin:
         self._event.event(handler)
         return handler
 
+    def on_startup(self, handler: LifecycleFunctionT):
+        """
+        Run once per container before its first event, ie: create connection pools
+        """
+        self._handlers.add_startup_handler(handler)
+        return handler
+
+    def on_shutdown(self, handler: LifecycleFunctionT):
+        """
+        Run once when the container shuts down
+        """
+        self._handlers.add_shutdown_handler(handler)
+        return handler
+
     def api(self, handler: HandlerFunctionT | AsyncHandlerFunctionT):
         self.add_api(handler)
         return handler
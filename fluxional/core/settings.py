@@ -1,6 +1,11 @@
 from dataclasses import dataclass, field
 from typing import Optional, Literal
-from .infrastructure.types import DynamoDBKeyT, DynamoDBStreamT, DynamoDBBillingModeT
+from .infrastructure.types import (
+    ArchitectureT,
+    DynamoDBKeyT,
+    DynamoDBStreamT,
+    DynamoDBBillingModeT,
+)
 from fluxional.core.tools import LookupKey
 
 _OTEL_ENVS = [
@@ -11,6 +16,11 @@ _OTEL_ENVS = [
 ]
 
 
+# Memory of a lambda function in MB, it also sets its share of cpu
+MIN_MEMORY_SIZE = 128
+MAX_MEMORY_SIZE = 10240
+
+
 def _default_dynamodb_pk() -> DynamoDBKeyT:
     return {"key_name": "pk", "key_type": "string"}
 
@@ -50,7 +60,10 @@ class SystemSettings:
     # OTel
     aws_lambda_exec_wrapper: str = field(default="/opt/otel-instrument")
     # Extending lambda docker - Sometime it is necessary to extend the lambda docker image
+    # Runs after the sources are copied
     lambda_dockerfile_ext: Optional[str] = field(default=None)
+    # Runs before the requirements are installed
+    lambda_dockerfile_pre_install: Optional[str] = field(default=None)
 
 
 @dataclass
@@ -112,9 +125,26 @@ class CredentialsSettings:
 class LambdaSettings:
     directory: str = field(default="./")
     dockerfile: str = field(default="Dockerfile")
-    memory_size: Literal[128, 512, 1024, 1536] = field(default=128)
+    # Any size from 128 to 10240 MB
+    memory_size: int = field(default=128)
     timeout: int = field(default=30)
     description: str = field(default="")
+    # Requirements of this function only, it gets its own slimmer image
+    requirements: Optional[str] = field(default=None)
+    # Container image, or zip of the code with the requirements in a shared layer
+    packaging: Literal["image", "zip"] = field(default="image")
+    # Graviton functions run on arm64
+    architecture: ArchitectureT = field(default="x86_64")
+
+
+@dataclass
+class EventLambdaSettings(LambdaSettings):
+    # Number of sqs messages delivered per invocation (1 - 10000)
+    batch_size: int = field(default=1)
+    # Seconds to wait while gathering a batch (0 - 300), required above 10 messages
+    max_batching_window: int = field(default=0)
+    # Number of records of a batch processed at the same time
+    batch_concurrency: int = field(default=1)
 
 
 @dataclass
@@ -138,11 +168,18 @@ class BuildSettings:
     environment: dict[str, str] = field(default_factory=dict)
     requirements_file: Optional[str] = field(default="requirements.txt")
     build_path: Optional[str] = field(default=None)
+    # Skip the deploy when nothing changed since the last one
+    incremental: bool = field(default=True)
+    # Update the lambda code in place when only the code changed
+    hotswap: bool = field(default=False)
+    # Keep the deploy image, its layers are reused by the next deploy
+    keep_image: bool = field(default=False)
     api_lambda: LambdaSettings = field(default_factory=LambdaSettings)
     storage_lambda: LambdaSettings = field(default_factory=LambdaSettings)
-    event_lambda: LambdaSettings = field(default_factory=LambdaSettings)
+    event_lambda: EventLambdaSettings = field(default_factory=EventLambdaSettings)
     api_gateway: ApiGatewaySettings = field(default_factory=ApiGatewaySettings)
     websocket: WebsocketSettings = field(default_factory=WebsocketSettings)
+    websocket_lambda: LambdaSettings = field(default_factory=LambdaSettings)
     dynamodb: DynamoDBSettings = field(default_factory=DynamoDBSettings)
     scheduled_task_lambda: LambdaSettings = field(default_factory=LambdaSettings)
 
@@ -171,6 +208,20 @@ class MonitoringSettings:
 @dataclass
 class DevelopmentSettings:
     enable_local: bool = field(default=False)
+    # Seconds the deployed lambda waits for the dev runner
+    ack_timeout: float = field(default=15)
+    response_timeout: float = field(default=15)
+    # Warm runners started by `fluxional dev`, 0 runs a container per event
+    pool_size: int = field(default=5)
+    runner_port: int = field(default=9100)
+    # Workers are added up to max_workers while events are waiting
+    max_workers: int = field(default=10)
+    # Events received while max_queue_size are waiting are dropped
+    max_queue_size: int = field(default=100)
+    # Run the events in the cli process and reload the modules that changed
+    hot_reload: bool = field(default=False)
+    # Seconds between the session stats printed by `fluxional dev`
+    stats_interval: float = field(default=60)
 
 
 @dataclass
@@ -1,6 +1,7 @@
-import boto3  # type: ignore
 import json
-from typing import TypeVar, Generic, Optional
+import threading
+import time
+from typing import Any, TypeVar, Generic, Optional, ClassVar, Iterable
 from .types import WsEvent
 import os
 from dataclasses import dataclass, field
@@ -17,6 +18,9 @@ class LookupKey:
     websocket_api_id: str = "fluxional_websocket_gateway_api_id"
     websocket_stage_name: str = "fluxional_websocket_gateway_stage_name"
     event_queue_url: str = "fluxional_event_queue_queue_url"
+    # Set in the deploy container for the synth of zip functions
+    lambda_handler: str = "fluxional_lambda_handler"
+    lambda_runtime: str = "fluxional_lambda_runtime"
 
 
 @dataclass
@@ -81,31 +85,269 @@ class Environment:
         or os.environ.get("AWS_REGION")
     )
 
+    # Process wide snapshot shared across invocations
+    _snapshot: ClassVar[Optional["Environment"]] = None
+
+    @classmethod
+    def snapshot(cls) -> "Environment":
+        """
+        Return the process wide environment, read from os.environ on first use only.
+        """
+        if cls._snapshot is None:
+            cls._snapshot = cls()
+
+        return cls._snapshot
+
+    @classmethod
+    def refresh(cls) -> "Environment":
+        """
+        Re-read os.environ and replace the process wide environment.
+        """
+        cls._snapshot = cls()
+        return cls._snapshot
+
 
 T = TypeVar("T")
 
+# SendMessageBatch limits
+SQS_BATCH_MAX_ENTRIES = 10
+SQS_BATCH_MAX_BYTES = 256 * 1024
+
 
 class Event(Generic[T]):
+    # sqs clients shared by every Event per region, boto3 is
+    # only imported on the first trigger to keep cold starts low
+    _clients: ClassVar[dict[Optional[str], Any]] = {}
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
     def __init__(self):
-        self._env = Environment()
-        self._sqs = boto3.client("sqs", region_name=self._env.aws_region)
+        self._env = Environment.snapshot()
+
+    @property
+    def _sqs(self) -> Any:
+        region = self._env.aws_region
+        client = self._clients.get(region)
+
+        if client is None:
+            with self._lock:
+                client = self._clients.get(region)
+
+                if client is None:
+                    import boto3  # type: ignore
+
+                    client = boto3.client("sqs", region_name=region)
+                    self._clients[region] = client
+
+        return client
+
+    @classmethod
+    def clear_clients(cls) -> None:
+        """
+        Drop the cached sqs clients, ie: the credentials changed
+        """
+        with cls._lock:
+            cls._clients.clear()
+
+    @classmethod
+    def set_client(cls, client: Any, region: Optional[str] = None) -> None:
+        """
+        Use the given sqs client for a region instead of creating one, ie: a local queue
+        """
+        with cls._lock:
+            cls._clients[region] = client
+
+    @staticmethod
+    def _message_body(event_name: str, data: T) -> str:
+        return json.dumps(
+            {
+                "event_name": event_name,
+                "data": data,
+            }
+        )
 
     def trigger(self, event_name: str, data: T) -> None:
         self._sqs.send_message(
             QueueUrl=self._env.event_queue_url,
-            MessageBody=json.dumps(
-                {
-                    "event_name": event_name,
-                    "data": data,
-                }
-            ),
+            MessageBody=self._message_body(event_name, data),
         )
 
+    @staticmethod
+    def _chunk_entries(entries: list[dict[str, str]]) -> list[list[dict[str, str]]]:
+        """Split entries into batches within the entries and payload size limits"""
+        chunks: list[list[dict[str, str]]] = []
+        chunk: list[dict[str, str]] = []
+        chunk_size = 0
+
+        for entry in entries:
+            size = len(entry["MessageBody"].encode("utf-8"))
+
+            if size > SQS_BATCH_MAX_BYTES:
+                raise ValueError(
+                    f"Event {entry['Id']} is larger than {SQS_BATCH_MAX_BYTES} bytes"
+                )
+
+            if (
+                len(chunk) == SQS_BATCH_MAX_ENTRIES
+                or chunk_size + size > SQS_BATCH_MAX_BYTES
+            ):
+                chunks.append(chunk)
+                chunk, chunk_size = [], 0
+
+            chunk.append(entry)
+            chunk_size += size
+
+        if chunk:
+            chunks.append(chunk)
+
+        return chunks
+
+    def _send_batch(
+        self, entries: list[dict[str, str]], max_retries: int
+    ) -> list[dict[str, Any]]:
+        """
+        Send one batch, retrying only the entries that failed on the sqs side. A
+        failed call (ex: throttling) fails every entry of the batch.
+        """
+        from botocore.exceptions import BotoCoreError, ClientError  # type: ignore
+
+        failed: list[dict[str, Any]] = []
+
+        for attempt in range(max_retries + 1):
+            try:
+                response = self._sqs.send_message_batch(
+                    QueueUrl=self._env.event_queue_url, Entries=entries
+                )
+            except (BotoCoreError, ClientError) as e:
+                code = (
+                    e.response.get("Error", {}).get("Code", "ClientError")
+                    if isinstance(e, ClientError)
+                    else type(e).__name__
+                )
+                response = {
+                    "Failed": [
+                        {
+                            "Id": k["Id"],
+                            "SenderFault": False,
+                            "Code": code,
+                            "Message": str(e),
+                        }
+                        for k in entries
+                    ]
+                }
+
+            retry: list[dict[str, Any]] = []
+
+            for failure in response.get("Failed", []):
+                # Sender faults will fail again, only retry the others
+                if failure.get("SenderFault") or attempt == max_retries:
+                    failed.append(failure)
+                else:
+                    retry.append(failure)
+
+            if not retry:
+                break
+
+            retry_ids = {k["Id"] for k in retry}
+            entries = [k for k in entries if k["Id"] in retry_ids]
+            time.sleep(0.05 * 2**attempt)
+
+        return failed
+
+    def trigger_many(
+        self,
+        event_name: str,
+        items: Iterable[T],
+        *,
+        max_retries: int = 3,
+        max_workers: int = 1,
+    ) -> list[dict[str, Any]]:
+        """
+        Trigger an event for each item using batches of up to 10 messages. Batches are
+        sent concurrently when max_workers is greater than 1. Returns the entries that
+        still failed, their Id is the index of the item.
+        """
+        entries = [
+            {"Id": str(i), "MessageBody": self._message_body(event_name, item)}
+            for i, item in enumerate(items)
+        ]
+        chunks = self._chunk_entries(entries)
+
+        if max_workers > 1 and len(chunks) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(
+                    executor.map(lambda k: self._send_batch(k, max_retries), chunks)
+                )
+        else:
+            results = [self._send_batch(k, max_retries) for k in chunks]
+
+        return [failure for result in results for failure in result]
+
+
+@dataclass
+class BroadcastResult:
+    # Connection ids the data was posted to
+    sent: list[str] = field(default_factory=list)
+    # Connection ids that are no longer connected and can be pruned
+    gone: list[str] = field(default_factory=list)
+    # Any other failure per connection id
+    failed: dict[str, Exception] = field(default_factory=dict)
+
 
 class Websocket:
+    # apigatewaymanagementapi clients cached per endpoint url
+    # and reused across warm invocations
+    max_pool_connections: ClassVar[int] = 10
+    _clients: ClassVar[dict[str, Any]] = {}
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @classmethod
+    def configure(cls, *, max_pool_connections: int) -> None:
+        """
+        Set the size of the connection pool of each client, cached clients are dropped.
+        """
+        with cls._lock:
+            cls.max_pool_connections = max_pool_connections
+            cls._clients.clear()
+
+    @classmethod
+    def clear_clients(cls) -> None:
+        """
+        Drop the cached clients, ie: the credentials changed
+        """
+        with cls._lock:
+            cls._clients.clear()
+
     @staticmethod
+    def endpoint_url(event: WsEvent) -> str:
+        return f"https://{event['requestContext']['domainName']}/{event['requestContext']['stage']}"
+
+    @classmethod
+    def get_client(cls, endpoint_url: str) -> Any:
+        client = cls._clients.get(endpoint_url)
+
+        if client is None:
+            # Creating boto3 clients is not thread safe
+            with cls._lock:
+                client = cls._clients.get(endpoint_url)
+
+                if client is None:
+                    import boto3  # type: ignore
+                    from botocore.config import Config  # type: ignore
+
+                    client = boto3.client(
+                        "apigatewaymanagementapi",
+                        endpoint_url=endpoint_url,
+                        config=Config(max_pool_connections=cls.max_pool_connections),
+                    )
+                    cls._clients[endpoint_url] = client
+
+        return client
+
+    @classmethod
     def post_to_connection(
-        event: WsEvent, data: str, *, connection_id: str | None = None
+        cls, event: WsEvent, data: str, *, connection_id: str | None = None
     ):
         """
         Respond to a WebSocket connection id with data. if no connection_id is provided, it will be extracted from the event.
@@ -113,8 +355,55 @@ class Websocket:
         if not connection_id:
             connection_id = event["requestContext"]["connectionId"]
 
-        api_gateway_management = boto3.client(
-            "apigatewaymanagementapi",
-            endpoint_url=f"https://{event['requestContext']['domainName']}/{event['requestContext']['stage']}",
-        )
+        api_gateway_management = cls.get_client(cls.endpoint_url(event))
         api_gateway_management.post_to_connection(Data=data, ConnectionId=connection_id)
+
+    @classmethod
+    def broadcast(
+        cls,
+        event: WsEvent,
+        data: str,
+        connection_ids: Iterable[str],
+        *,
+        max_workers: int | None = None,
+    ) -> BroadcastResult:
+        """
+        Post data to many connection ids in parallel. Connections that are gone are
+        reported separately from other failures so that they can be pruned.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        api_gateway_management = cls.get_client(cls.endpoint_url(event))
+        result = BroadcastResult()
+
+        def post(connection_id: str):
+            api_gateway_management.post_to_connection(
+                Data=data, ConnectionId=connection_id
+            )
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers or cls.max_pool_connections
+        ) as executor:
+            futures = {
+                connection_id: executor.submit(post, connection_id)
+                for connection_id in connection_ids
+            }
+
+        from botocore.exceptions import ClientError  # type: ignore
+
+        for connection_id, future in futures.items():
+            exception = future.exception()
+
+            if exception is None:
+                result.sent.append(connection_id)
+
+            elif (
+                isinstance(exception, ClientError)
+                and exception.response.get("Error", {}).get("Code") == "GoneException"
+            ):
+                result.gone.append(connection_id)
+
+            elif isinstance(exception, Exception):
+                result.failed[connection_id] = exception
+
+        return result
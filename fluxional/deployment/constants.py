@@ -7,6 +7,10 @@ BASE_WORKDIR = "/app"
 # CDK DEPLOYMENT COMMAND
 CDK_DEPLOY_CMD = "cdk deploy --app 'python3 {app} --synth' --require-approval never"
 CDK_DESTROY_CMD = "cdk destroy --app 'python3 {app} --synth' --force"
+# Updates the lambda code in place when only the code changed
+CDK_HOTSWAP_FLAG = "--hotswap-fallback"
+# Fingerprints of the last deploys, relative to the build path
+DEPLOY_STATE_FILE = ".fluxional/deployments.json"
 # AWS LAMBDA BASE IMAGE
 AWS_LAMBDA_PYTHON_3_10_IMAGE = "public.ecr.aws/lambda/python:3.10"
 AWS_LAMBDA_PYTHON_3_11_IMAGE = "public.ecr.aws/lambda/python:3.11"
@@ -17,6 +21,14 @@ RUNTIMES = {
     "3.12": AWS_LAMBDA_PYTHON_3_12_IMAGE,
 }
 
+# Buildkit cache of the downloaded wheels, shared by the lambda image builds
+PIP_CACHE_MOUNT = "--mount=type=cache,target=/root/.cache/pip"
+# Wheels installed in the layers of zip functions
+LAYER_PLATFORMS = {
+    "x86_64": "manylinux2014_x86_64",
+    "arm64": "manylinux2014_aarch64",
+}
+
 # OTEL
 OTEL_WRAPPER_FILE = "https://tjaws.s3.amazonaws.com/otel_wrapper.py"
 OTEL_INST_FILE = "https://tjaws.s3.amazonaws.com/otel-instrument"
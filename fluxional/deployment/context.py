@@ -0,0 +1,105 @@
+from docker.utils.build import PatternMatcher  # type: ignore
+from typing import Iterator
+import io
+import os
+import tarfile
+
+# Name of the generated dockerfile inside the build context
+DOCKERFILE_NAME = ".fluxional.Dockerfile"
+
+
+def read_dockerignore(build_path: str) -> list[str]:
+    try:
+        with open(os.path.join(build_path, ".dockerignore")) as f:
+            lines = [line.strip() for line in f.read().splitlines()]
+    except FileNotFoundError:
+        return []
+
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def format_size(size: float) -> str:
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+    return f"{size:.1f} GB"
+
+
+class _Chunks(io.RawIOBase):
+    """Write only file object collecting what tarfile writes to it"""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        yield from chunks
+
+
+class BuildContext:
+    """
+    Docker build context made of the given files and directories only, instead
+    of the whole build path. Paths matching the .dockerignore patterns of the
+    build path are left out. The tarball is generated while it is sent to the
+    daemon, it is never written to disk.
+    """
+
+    def __init__(self, paths: list[str], dockerfile: str, *, build_path: str = "."):
+        self._build_path = build_path
+        self._dockerfile = dockerfile.encode("utf-8")
+        matcher = PatternMatcher(read_dockerignore(build_path))
+
+        # Archive name to path on disk
+        self.files: dict[str, str] = {}
+        for path in paths:
+            for name in self._walk(os.path.normpath(path)):
+                if not matcher.matches(name):
+                    self.files[name] = os.path.join(build_path, name)
+
+    def _walk(self, path: str) -> Iterator[str]:
+        full_path = os.path.join(self._build_path, path)
+        # Left to the COPY step to report
+        if not os.path.exists(full_path):
+            return
+
+        if not os.path.isdir(full_path):
+            yield path.replace(os.sep, "/")
+            return
+
+        for directory, directories, files in os.walk(full_path):
+            directories.sort()
+            for name in sorted(files):
+                relative = os.path.relpath(
+                    os.path.join(directory, name), self._build_path
+                )
+                yield relative.replace(os.sep, "/")
+
+    @property
+    def size(self) -> int:
+        """Size of the files in the context"""
+        return len(self._dockerfile) + sum(
+            os.path.getsize(path) for path in self.files.values()
+        )
+
+    def stream(self) -> Iterator[bytes]:
+        chunks = _Chunks()
+
+        with tarfile.open(fileobj=chunks, mode="w|") as tar:
+            info = tarfile.TarInfo(DOCKERFILE_NAME)
+            info.size = len(self._dockerfile)
+            tar.addfile(info, io.BytesIO(self._dockerfile))
+
+            for name, path in self.files.items():
+                tar.add(path, arcname=name, recursive=False)
+                yield from chunks.drain()
+
+        yield from chunks.drain()
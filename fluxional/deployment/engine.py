@@ -3,19 +3,27 @@ from .exceptions import (
     FailedContainerBuild,
     FailedToRunContainer,
 )
+from .context import BuildContext, DOCKERFILE_NAME, format_size
+from .state import DeployState, Fingerprint, hash_files, hash_value
 from .constants import (
     DID_VOLUME,
     BASE_WORKDIR,
     BASE_IMAGE,
     CDK_DEPLOY_CMD,
     CDK_DESTROY_CMD,
+    CDK_HOTSWAP_FLAG,
+    DEPLOY_STATE_FILE,
     AWS_LAMBDA_PYTHON_3_10_IMAGE,
     RUNTIMES,
     OTEL_WRAPPER_FILE,
     OTEL_INST_FILE,
     OTEL_REQ_FILE,
     FTE_EXTENSION,
+    PIP_CACHE_MOUNT,
+    LAYER_PLATFORMS,
 )
+from fluxional.core.infrastructure.types import ArchitectureT
+from fluxional.core.tools import LookupKey
 import docker  # type: ignore
 import os
 import json
@@ -77,7 +85,23 @@ def output_key_info(logs: list[str]):
             rp(f"\n👉 [bold yellow] WebSocket URL: {websocket_url}")
 
 
-def track_logs(container: _Container) -> list[str]:
+def output_cache_info(steps: list[tuple[str, bool]]):
+    if not steps:
+        return
+
+    cached = sum(1 for _, hit in steps if hit)
+    rp(f"\n[bold]Layer cache: {cached}/{len(steps)} steps cached")
+
+    for step, hit in steps:
+        status = "[green]cached[/green]" if hit else "[yellow]built [/yellow]"
+        rp(f"  {status} {step[:100]}")
+
+
+def track_logs(container: _Container, show_logs: bool = True) -> list[str]:
+    """
+    Wait for the container to exit and return its outputs, the logs are printed
+    as they come with show_logs and only on failure otherwise
+    """
     logs: list[str] = []
     output_logs: list[str] = []
 
@@ -89,7 +113,7 @@ def track_logs(container: _Container) -> list[str]:
                 output_logs.append(log)
             elif output_logs:
                 output_logs.append(log)
-            else:
+            elif show_logs:
                 print(log)
 
     try:
@@ -147,10 +171,15 @@ class Engine:
         tag: str | None = None,
         show_logs: bool = False,
         rm: bool = True,
-    ):
+        context: list[str] | None = None,
+    ) -> list[tuple[str, bool]]:
         """
         Builds the docker image given a dockerfile like strings
+        The build context is the whole build path unless the files and
+        directories to send are given.
+        Returns each step of the build and whether it was cached
         """
+        steps: list[tuple[str, bool]] = []
 
         def display(row: Any):
             if "errorDetail" in row:
@@ -160,17 +189,43 @@ class Engine:
 
             elif '"stream"' in row:
                 row = json.loads(row)
+                for line in row["stream"].splitlines():
+                    track_step(line.strip())
+
                 if row["stream"] != "\n":
                     row = row["stream"].replace("\n", "")
                     if show_logs:
                         print(row)
 
-        build = self._api_client.build(
-            dockerfile=dockerfile,
-            rm=rm,
-            tag=tag or self._tag,
-            path=self._build_path,
-        )
+        def track_step(line: str):
+            if line.startswith("Step ") and " : " in line:
+                steps.append((line.split(" : ", 1)[1], False))
+            elif line == "---> Using cache" and steps:
+                steps[-1] = (steps[-1][0], True)
+
+        if context is None:
+            build = self._api_client.build(
+                dockerfile=dockerfile,
+                rm=rm,
+                tag=tag or self._tag,
+                path=self._build_path,
+            )
+
+        else:
+            build_context = BuildContext(
+                context, dockerfile, build_path=self._build_path
+            )
+            rp(
+                f"Build context: {len(build_context.files)} files, "
+                f"{format_size(build_context.size)}"
+            )
+            build = self._api_client.build(
+                fileobj=build_context.stream(),
+                custom_context=True,
+                dockerfile=DOCKERFILE_NAME,
+                rm=rm,
+                tag=tag or self._tag,
+            )
 
         for line in build:
             row = line.decode("utf-8").strip()
@@ -185,6 +240,8 @@ class Engine:
             else:
                 display(row)
 
+        return steps
+
     def run_container(
         self,
         *,
@@ -195,16 +252,19 @@ class Engine:
         detach: bool = False,
         show_logs: bool = False,
         network_mode: Literal["host", "bridge", "none"] = "bridge",
+        ports: dict[str, tuple[str, int]] | None = None,
     ) -> list[str]:
         """
-        Runs the built image given a command
+        Runs the built image given a command. A detached container streams its
+        logs, it is still waited for and raises if it exits with an error.
         """
 
         try:
             container = self._client.containers.run(
                 tag or self._tag,
-                remove=True,
-                auto_remove=self._remove_container,
+                # A detached container is removed once its exit code is read
+                remove=not detach,
+                auto_remove=self._remove_container and not detach,
                 detach=detach,
                 volumes=volumes,
                 environment={
@@ -216,6 +276,7 @@ class Engine:
                 | environment,
                 command=command,
                 network_mode=network_mode,
+                ports=ports,
             )
 
         except Exception as e:
@@ -228,11 +289,16 @@ class Engine:
                 print(container)
                 return []
 
-        if detach and show_logs:
-            return track_logs(container)
+        if detach:
+            try:
+                return track_logs(container, show_logs=show_logs)
+            finally:
+                try:
+                    container.remove(force=True)
+                except docker.errors.NotFound:  # pragma: no cover
+                    pass
 
-        else:
-            return []
+        return []
 
     def remove_built_image(self, tag: str | None = None, **kwargs):
         """
@@ -274,23 +340,32 @@ class CDKEngine(Engine):
         requirements_file: str | None = None,
         base_image: str = BASE_IMAGE,
         work_directory: str = BASE_WORKDIR,
+        extra_steps: str | None = None,
     ) -> str:
         """
         Create a dockerfile based on dependencies etc...
+        The requirements are installed before the other files are copied so that
+        the install layer stays cached while only the code changes.
         """
         base_image = f"FROM {base_image}"
         work_dir = f"WORKDIR {work_directory}"
-        dockerfile = f"{base_image}"
-
-        if dependencies:
-            files = self.build_dep_copy(dependencies, work_directory=work_directory)
-            dockerfile += f"\n{files}"
-
-        dockerfile += f"\n{work_dir}"
+        dockerfile = f"{base_image}\n{work_dir}"
 
         if requirements_file:
+            copy = self.build_dep_copy(
+                [requirements_file], work_directory=work_directory
+            )
+            dockerfile += f"\n{copy}"
             dockerfile += f"\nRUN pip install -r {requirements_file}"
 
+        if extra_steps:
+            dockerfile += f"\n{extra_steps.strip()}"
+
+        sources = [d for d in dependencies or [] if d != requirements_file]
+        if sources:
+            files = self.build_dep_copy(sources, work_directory=work_directory)
+            dockerfile += f"\n{files}"
+
         dockerfile += "\n"
 
         return dockerfile
@@ -320,6 +395,49 @@ class CDKEngine(Engine):
 
         return dockerfile
 
+    def get_builder_fallback_steps(self) -> str:
+        """
+        The docker cli only builds with buildkit when buildx is installed, the
+        classic builder does not support its syntax in the lambda dockerfiles
+        """
+        return (
+            "\nRUN docker buildx version > /dev/null 2>&1"
+            f" || sed -i -e 's|{PIP_CACHE_MOUNT} ||'"
+            # Cdk passes the platform to the build
+            " -e 's|--platform=\\$TARGETPLATFORM ||' Dockerfile*"
+        )
+
+    def get_layer_steps(
+        self,
+        *,
+        directory: str,
+        requirements_file: str | None,
+        lambda_runtime: RuntimeT = "3.10",
+        architecture: ArchitectureT = "x86_64",
+        work_directory: str = BASE_WORKDIR,
+    ) -> str:
+        """
+        Install the requirements of zip functions in their layer directory, only
+        wheels are used as nothing can be compiled for the lambda platform here
+        """
+        if requirements_file:
+            dockerfile = "\n" + self.build_dep_copy(
+                [requirements_file], work_directory=work_directory
+            )
+            packages = f"-r {requirements_file}"
+        else:
+            # We will always need fluxional installed
+            dockerfile = ""
+            packages = f"fluxional=={__version__}"
+
+        dockerfile += (
+            f"\nRUN pip install {packages} --target {directory}/python"
+            f" --platform {LAYER_PLATFORMS[architecture]} --implementation cp"
+            f" --python-version {lambda_runtime} --only-binary=:all:"
+        )
+
+        return dockerfile
+
     def get_lambda_dockefile(
         self,
         *,
@@ -329,24 +447,32 @@ class CDKEngine(Engine):
         include_otel: bool = False,
         include_fte: bool = False,
         lambda_dockerfile_ext: str | None = None,
+        lambda_dockerfile_pre_install: str | None = None,
     ):
-        dockerfile = f"FROM {base_image}"
-
-        dockerfile += "\nCOPY . \${LAMBDA_TASK_ROOT}"
+        # The base image is multi-platform, cdk builds it for the function architecture
+        dockerfile = r"FROM --platform=\$TARGETPLATFORM " + base_image
 
-        if lambda_dockerfile_ext:
-            dockerfile += f"\n{lambda_dockerfile_ext}"
+        # Steps the requirements install needs (ex: system packages)
+        if lambda_dockerfile_pre_install:
+            dockerfile += f"\n{lambda_dockerfile_pre_install}"
 
+        # The dependencies are installed before the sources are copied so that
+        # code changes don't invalidate them, wheels are cached across builds
         if requirements_file:
             dockerfile += (
-                f"\nRUN pip install -r {requirements_file}"
+                f"\nCOPY {requirements_file} "
+                + r"\${LAMBDA_TASK_ROOT}"
+                + f"/{requirements_file}"
+            )
+            dockerfile += (
+                f"\nRUN {PIP_CACHE_MOUNT} pip install -r {requirements_file}"
                 # Needs to be escaped once for the echo cmd
                 + r' --target "\${LAMBDA_TASK_ROOT}"'
             )
         else:
             # We will always need fluxional installed
             dockerfile += (
-                f"\nRUN pip install fluxional=={__version__}"
+                f"\nRUN {PIP_CACHE_MOUNT} pip install fluxional=={__version__}"
                 + r' --target "\${LAMBDA_TASK_ROOT}"'
             )
 
@@ -356,6 +482,12 @@ class CDKEngine(Engine):
         if include_fte:
             dockerfile += self.get_fte_steps()
 
+        dockerfile += "\nCOPY . " + r"\${LAMBDA_TASK_ROOT}"
+
+        # Runs with the sources copied
+        if lambda_dockerfile_ext:
+            dockerfile += f"\n{lambda_dockerfile_ext}"
+
         dockerfile += f'\nCMD [\\"{lambda_handler}\\"]'
 
         return dockerfile
@@ -374,38 +506,136 @@ class CDKEngine(Engine):
         include_otel: bool = False,
         include_fte: bool = False,
         lambda_dockerfile_ext: str | None = None,
-    ):
-        dockerfile = self.get_dockerfile(
-            dependencies=dependencies, requirements_file=requirements_file
-        )
+        lambda_dockerfile_pre_install: str | None = None,
+        resources: dict[str, dict] | None = None,
+        state_key: str | None = None,
+        hotswap: bool = False,
+        force: bool = False,
+        keep_image: bool = False,
+        function_requirements: dict[str, str] | None = None,
+        layers: dict[str, tuple[str | None, ArchitectureT]] | None = None,
+        lambda_runtime: RuntimeT = "3.10",
+    ) -> bool:
+        """
+        Build the deploy image and run the command in it. When resources and a
+        state key are given, the command is skipped if nothing changed since the
+        last successful run (unless forced) and, with hotswap, only updates the
+        lambda code when the infrastructure is unchanged. Returns whether the
+        command ran.
+        """
+        # We need to add the lambda Dockefiles for cdk here, written before the
+        # sources are copied to stay cached
+        lambda_dockerfiles = {"Dockerfile": requirements_file}
+        lambda_dockerfiles |= function_requirements or {}
+
+        # The layers of zip functions are installed in the image for cdk to upload
+        layer_steps = ""
+        for directory, (requirements, architecture) in (layers or {}).items():
+            layer_steps += self.get_layer_steps(
+                directory=directory,
+                requirements_file=requirements,
+                lambda_runtime=lambda_runtime,
+                architecture=architecture,
+            )
 
-        # We need to add the lambda Dockefile for cdk here
-        lambda_dockerfile = self.get_lambda_dockefile(
-            lambda_handler=lambda_handler if lambda_handler else handler,
+        echo_steps = ""
+        for name, requirements in lambda_dockerfiles.items():
+            lambda_dockerfile = self.get_lambda_dockefile(
+                lambda_handler=lambda_handler if lambda_handler else handler,
+                requirements_file=requirements,
+                base_image=base_image,
+                include_otel=include_otel,
+                include_fte=include_fte,
+                lambda_dockerfile_ext=lambda_dockerfile_ext,
+                lambda_dockerfile_pre_install=lambda_dockerfile_pre_install,
+            )
+            echo_steps += "".join(
+                f'RUN echo "{line}" >> {name}\n'
+                for line in lambda_dockerfile.split("\n")
+            )
+
+        dockerfile = self.get_dockerfile(
+            dependencies=dependencies,
             requirements_file=requirements_file,
-            base_image=base_image,
-            include_otel=include_otel,
-            include_fte=include_fte,
-            lambda_dockerfile_ext=lambda_dockerfile_ext,
+            extra_steps=f"{layer_steps}\n{echo_steps}"
+            + self.get_builder_fallback_steps(),
         )
 
-        for line in lambda_dockerfile.split("\n"):
-            dockerfile += f'RUN echo "{line}" >> Dockerfile\n'
+        fingerprint: Fingerprint | None = None
+        if resources is not None and state_key:
+            fingerprint = self.fingerprint(
+                dependencies=dependencies,
+                dockerfile=dockerfile,
+                resources=resources,
+                command=command,
+                environment=environment,
+            )
+            previous = None if force else self.state.get(state_key)
+
+            if previous == fingerprint:
+                rp("[green]No changes since the last deploy, skipping")
+                return False
+
+            if (
+                hotswap
+                and previous
+                and previous.infrastructure == fingerprint.infrastructure
+                and command.startswith("cdk deploy")
+            ):
+                rp("[blue]Only the code changed, updating the functions in place")
+                command = f"{command} {CDK_HOTSWAP_FLAG}"
+
+        with console.status("[blue]Building image"):
+            steps = self.build_image(
+                dockerfile, show_logs=show_logs, context=dependencies
+            )
 
-        st(self.build_image, "[blue]Building image", dockerfile, show_logs=show_logs)
+        output_cache_info(steps)
 
-        # Run the container
-        st(
-            self.run_container,
-            "[blue]Deploying changes",
-            command=command,
-            environment=environment,
-            show_logs=show_logs,
-            detach=True,
-        )
+        try:
+            # Waits for the container, raises if the command failed
+            st(
+                self.run_container,
+                "[blue]Deploying changes",
+                command=command,
+                environment=environment,
+                show_logs=show_logs,
+                detach=True,
+            )
+
+            # Only a successful run can be skipped next time
+            if fingerprint and state_key:
+                self.state.save(state_key, fingerprint)
+
+        finally:
+            # The kept image is the layer cache of the next build
+            if not keep_image:
+                st(self.remove_built_image, "[blue]Cleaning up", force=True)
 
-        # Always clean the image
-        st(self.remove_built_image, "[blue]Cleaning up", force=True)
+        return True
+
+    @property
+    def state(self) -> DeployState:
+        return DeployState(os.path.join(self._build_path, DEPLOY_STATE_FILE))
+
+    def state_key(self, stack_name: str) -> str:
+        return f"{stack_name}:{self._aws_account_id}:{self._aws_region}"
+
+    def fingerprint(
+        self,
+        *,
+        dependencies: list[str],
+        dockerfile: str,
+        resources: dict[str, dict],
+        command: str,
+        environment: dict[str, str],
+    ) -> Fingerprint:
+        return Fingerprint(
+            code=hash_value(
+                [hash_files(dependencies, self._build_path), dockerfile, __version__]
+            ),
+            infrastructure=hash_value([resources, command, environment, __version__]),
+        )
 
     def run(
         self,
@@ -421,7 +651,15 @@ class CDKEngine(Engine):
         include_otel: bool = False,
         include_fte: bool = False,
         lambda_dockerfile_ext: str | None = None,
-    ):
+        lambda_dockerfile_pre_install: str | None = None,
+        resources: dict[str, dict] | None = None,
+        state_key: str | None = None,
+        hotswap: bool = False,
+        force: bool = False,
+        keep_image: bool = False,
+        function_requirements: dict[str, str] | None = None,
+        layers: dict[str, tuple[str | None, ArchitectureT]] | None = None,
+    ) -> bool:
         rp("\n\n[bold blue]Fluxional CDK Engine \U0001F680\n")
 
         # We need to include certain mandatory files to auto-copy
@@ -430,16 +668,28 @@ class CDKEngine(Engine):
         if f"{file_name}.py" not in dependencies:
             dependencies.append(f"{file_name}.py")
 
-        # For requirements
-        if requirements_file and requirements_file not in dependencies:
-            dependencies.append(requirements_file)
+        # For requirements, including the ones of each function
+        for requirements in [
+            requirements_file,
+            *(function_requirements or {}).values(),
+            *[requirements for requirements, _ in (layers or {}).values()],
+        ]:
+            if requirements and requirements not in dependencies:
+                dependencies.append(requirements)
+
+        # The synth needs the handler of the zip functions
+        if layers:
+            environment = environment | {
+                LookupKey.lambda_handler: lambda_handler or handler,
+                LookupKey.lambda_runtime: lambda_runtime,
+            }
 
         rp("[bold]Configurations:")
         rp(f"Show logs: {show_logs}")
         rp(f"Dependencies: {dependencies}")
         rp(f"Runtime: Python {lambda_runtime}")
 
-        self.run_clean(
+        changed = self.run_clean(
             dependencies=dependencies,
             requirements_file=requirements_file,
             handler=lambda_handler if lambda_handler else handler,
@@ -451,9 +701,21 @@ class CDKEngine(Engine):
             include_otel=include_otel,
             include_fte=include_fte,
             lambda_dockerfile_ext=lambda_dockerfile_ext,
+            lambda_dockerfile_pre_install=lambda_dockerfile_pre_install,
+            resources=resources,
+            state_key=state_key,
+            hotswap=hotswap,
+            force=force,
+            keep_image=keep_image,
+            function_requirements=function_requirements,
+            layers=layers,
+            lambda_runtime=lambda_runtime,
         )
 
-        rp("\n\n[bold blue]  \U0001F680 Change Completed! \U0001F680 \n\n")
+        if changed:
+            rp("\n\n[bold blue]  \U0001F680 Change Completed! \U0001F680 \n\n")
+
+        return changed
 
     def deploy(
         self,
@@ -469,13 +731,25 @@ class CDKEngine(Engine):
         include_otel: bool = False,
         include_fte: bool = False,
         lambda_dockerfile_ext: str | None = None,
-    ):
+        lambda_dockerfile_pre_install: str | None = None,
+        stack_name: str | None = None,
+        resources: dict[str, dict] | None = None,
+        hotswap: bool = False,
+        force: bool = False,
+        keep_image: bool = False,
+        function_requirements: dict[str, str] | None = None,
+        layers: dict[str, tuple[str | None, ArchitectureT]] | None = None,
+    ) -> bool:
+        """
+        Deploy the stack, given its name and synthesized resources the deploy is
+        skipped when nothing changed since the last one
+        """
         file_name, _ = handler.split(".")
 
         if not command:
             command = CDK_DEPLOY_CMD.format(app=f"{file_name}.py")
 
-        self.run(
+        return self.run(
             handler,
             command=command,
             dependencies=dependencies,
@@ -487,6 +761,14 @@ class CDKEngine(Engine):
             include_otel=include_otel,
             include_fte=include_fte,
             lambda_dockerfile_ext=lambda_dockerfile_ext,
+            lambda_dockerfile_pre_install=lambda_dockerfile_pre_install,
+            resources=resources,
+            state_key=self.state_key(stack_name) if stack_name else None,
+            hotswap=hotswap,
+            force=force,
+            keep_image=keep_image,
+            function_requirements=function_requirements,
+            layers=layers,
         )
 
     def destroy(
@@ -501,6 +783,11 @@ class CDKEngine(Engine):
         lambda_runtime: RuntimeT = "3.10",
         show_logs: bool = False,
         lambda_dockerfile_ext: str | None = None,
+        lambda_dockerfile_pre_install: str | None = None,
+        stack_name: str | None = None,
+        keep_image: bool = False,
+        function_requirements: dict[str, str] | None = None,
+        layers: dict[str, tuple[str | None, ArchitectureT]] | None = None,
     ):
         file_name, _ = handler.split(".")
 
@@ -517,4 +804,12 @@ class CDKEngine(Engine):
             show_logs=show_logs,
             lambda_runtime=lambda_runtime,
             lambda_dockerfile_ext=lambda_dockerfile_ext,
+            lambda_dockerfile_pre_install=lambda_dockerfile_pre_install,
+            keep_image=keep_image,
+            function_requirements=function_requirements,
+            layers=layers,
         )
+
+        # The next deploy starts from scratch
+        if stack_name:
+            self.state.remove(self.state_key(stack_name))
@@ -0,0 +1,87 @@
+from dataclasses import asdict, dataclass
+from typing import Any
+import hashlib
+import json
+import os
+
+# Generated files that never end up in the deployed code
+IGNORED_DIRECTORIES = {"__pycache__", ".git", ".fluxional"}
+
+
+def hash_files(paths: list[str], root: str = ".") -> str:
+    """
+    Hash the content of files and directories relative to root, a missing file
+    hashes differently than an empty one.
+    """
+    digest = hashlib.sha256()
+
+    def update(relative: str):
+        digest.update(relative.encode("utf-8") + b"\0")
+        try:
+            with open(os.path.join(root, relative), "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 16), b""):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            digest.update(b"missing")
+        digest.update(b"\0")
+
+    for path in sorted(set(paths)):
+        if not os.path.isdir(os.path.join(root, path)):
+            update(path)
+            continue
+
+        for directory, directories, files in os.walk(os.path.join(root, path)):
+            directories[:] = sorted(set(directories) - IGNORED_DIRECTORIES)
+            for name in sorted(files):
+                update(os.path.relpath(os.path.join(directory, name), root))
+
+    return digest.hexdigest()
+
+
+def hash_value(value: Any) -> str:
+    content = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    # Dependencies, requirements and generated dockerfiles
+    code: str
+    # Synthesized resources and deployment environment
+    infrastructure: str
+
+
+class DeployState:
+    """
+    Fingerprints of the last successful deploy of each stack, stored as json in
+    the build path.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            with open(self._path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _dump(self, state: dict[str, dict]):
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        with open(self._path, "w") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+
+    def get(self, key: str) -> Fingerprint | None:
+        value = self._load().get(key)
+        return Fingerprint(**value) if value else None
+
+    def save(self, key: str, fingerprint: Fingerprint):
+        state = self._load()
+        state[key] = asdict(fingerprint)
+        self._dump(state)
+
+    def remove(self, key: str):
+        state = self._load()
+        if state.pop(key, None) is not None:
+            self._dump(state)
@@ -4,20 +4,20 @@ from rich.console import Console
 from .client import DevClient
 from uuid import uuid4
 from typing import Any, Callable
-from .runner import run, build_runner_image
+from .runner import run, build_runner_image, WarmRunner
+from .reloader import HotReloadRunner
 import queue as q
+import signal
 import threading
-from dataclasses import dataclass
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import partial
 from fluxional.core.tools import LookupKey
 
 
-def run_container(
-    *,
-    stack_name: str,
-    payload: Any,
-    subscriber_id: str,
-    runner_function: Callable = run,
-):
+def parse_payload(payload: Any) -> tuple[str, dict, dict]:
+    """Return the event id, the event and the execution context of a new event"""
     try:
         payload = json.loads(payload.decode("utf-8"))
         event_id = payload["event_id"]
@@ -28,6 +28,18 @@ def run_container(
     except KeyError as e:
         raise ValueError(f"{e} is required in payload")
 
+    return event_id, event, execution_context
+
+
+def run_container(
+    *,
+    stack_name: str,
+    payload: Any,
+    subscriber_id: str,
+    runner_function: Callable = run,
+):
+    event_id, event, execution_context = parse_payload(payload)
+
     container = runner_function(
         stack_name,
         environment={
@@ -41,69 +53,347 @@ def run_container(
     return container
 
 
+def run_in_runner(
+    *,
+    stack_name: str,
+    payload: Any,
+    subscriber_id: str,
+    runner: WarmRunner,
+):
+    event_id, event, execution_context = parse_payload(payload)
+
+    runner.send(
+        {
+            "type": "event",
+            "event_id": event_id,
+            "event": event,
+            "subscriber_id": subscriber_id,
+            "environment": execution_context,
+        }
+    )
+
+
+def run_in_process(
+    *,
+    stack_name: str,
+    payload: Any,
+    subscriber_id: str,
+    runner: HotReloadRunner,
+):
+    event_id, event, execution_context = parse_payload(payload)
+
+    runner.dispatch(
+        {
+            "event_id": event_id,
+            "event": event,
+            "subscriber_id": subscriber_id,
+            "environment": execution_context,
+        }
+    )
+
+
+class DevStats:
+    """Throughput and latency of the events handled during a dev session"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self.received = 0
+        self.handled = 0
+        self.dropped = 0
+        # Latencies of the last `window` events, in seconds
+        self._latencies: deque[float] = deque(maxlen=window)
+
+    def record_received(self) -> None:
+        with self._lock:
+            self.received += 1
+
+    def record_dropped(self) -> None:
+        with self._lock:
+            self.dropped += 1
+
+    def record_handled(self, latency: float) -> None:
+        with self._lock:
+            self.handled += 1
+            self._latencies.append(latency)
+
+    def percentile(self, percent: float) -> float | None:
+        with self._lock:
+            latencies = sorted(self._latencies)
+
+        if not latencies:
+            return None
+
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percent / 100))]
+
+    def summary(self, queue_depth: int) -> str:
+        latencies = [self.percentile(50), self.percentile(95)]
+        p50, p95 = [f"{x * 1000:.0f}ms" if x is not None else "-" for x in latencies]
+
+        dropped = f", {self.dropped} dropped" if self.dropped else ""
+
+        return (
+            f"Events: {self.received} received, {self.handled} handled{dropped} | "
+            f"Queue: {queue_depth} | Latency: p50 {p50}, p95 {p95}"
+        )
+
+
 def worker(
-    queue: q.Queue, worker_id, color: str, container_provider: Callable = run_container
+    queue: q.Queue,
+    worker_id,
+    color: str,
+    container_provider: Callable = run_container,
+    stats: DevStats | None = None,
 ):
     console = Console(style=color)
     while True:
         item = queue.get()
         if item is None:
+            queue.task_done()
             break
 
         console.print(f"Worker: {worker_id} working on item queue")
-        container_provider(
-            stack_name=item["stack_name"],
-            payload=item["kwargs"]["payload"],
-            subscriber_id=item["subscriber_id"],
-        )
+        start = time.perf_counter()
+        try:
+            container_provider(
+                stack_name=item["stack_name"],
+                payload=item["kwargs"]["payload"],
+                subscriber_id=item["subscriber_id"],
+            )
+
+            if stats:
+                stats.record_handled(time.perf_counter() - start)
+
+        # A failed event shouldn't take the worker down with it
+        except Exception:
+            console.print_exception()
 
-        queue.task_done()
+        finally:
+            queue.task_done()
 
 
 @dataclass
 class Workers:
+    """
+    Threads handling the queued events. The pool starts `num_workers` workers and
+    grows up to `max_workers` while events are waiting, the extra workers are
+    retired once the queue has been idle for `scale_interval` seconds. Events
+    are dropped when `max_queue_size` of them are already waiting.
+    """
+
     num_workers: int = 5
-    colors = ["red", "green", "blue", "yellow", "magenta"]
-    queue: q.Queue[Any] = q.Queue[Any]()
-    thread: threading.Thread | None = None
+    max_workers: int | None = None
+    max_queue_size: int = 100
+    scale_interval: float = 5
+    colors: list[str] = field(
+        default_factory=lambda: ["red", "green", "blue", "yellow", "magenta"]
+    )
     worker: Callable = worker
+    stats: DevStats = field(default_factory=DevStats)
+    queue: q.Queue[Any] = field(init=False)
+    threads: dict[int, threading.Thread] = field(init=False, default_factory=dict)
+
+    def __post_init__(self):
+        self.queue = q.Queue(maxsize=self.max_queue_size)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._scaler: threading.Thread | None = None
+
+    @property
+    def maximum(self) -> int:
+        return max(self.num_workers, self.max_workers or self.num_workers)
+
+    @property
+    def size(self) -> int:
+        """Number of running workers"""
+        with self._lock:
+            return len(self._alive())
+
+    def _alive(self) -> dict[int, threading.Thread]:
+        self.threads = {i: t for i, t in self.threads.items() if t.is_alive()}
+        return self.threads
+
+    def _start_worker(self):
+        # Reuse the lowest free id so that ids stay within [0, maximum)
+        worker_id = min(set(range(len(self.threads) + 1)) - set(self.threads))
+        t = threading.Thread(
+            target=self.worker,
+            args=(self.queue, worker_id, self.colors[worker_id % len(self.colors)]),
+            kwargs={"stats": self.stats},
+        )
+        t.start()
+        self.threads[worker_id] = t
 
     def start(self):
-        assert len(self.colors) >= self.num_workers, "Not enough colors for workers"
-        for i in range(self.num_workers):
-            t = threading.Thread(
-                target=self.worker,
-                args=(self.queue, i, self.colors[i % len(self.colors)]),
-            )
-            t.start()
-            self.thread = t
+        with self._lock:
+            for _ in range(self.num_workers):
+                self._start_worker()
+
+        if self.maximum > self.num_workers:
+            self._scaler = threading.Thread(target=self._scale_down, daemon=True)
+            self._scaler.start()
+
+    def scale_up(self):
+        """Start a worker when there are more events than workers"""
+        with self._lock:
+            workers = len(self._alive())
+            if self.queue.unfinished_tasks > workers and workers < self.maximum:
+                self._start_worker()
+
+    def _scale_down(self):
+        while not self._stopped.wait(self.scale_interval):
+            with self._lock:
+                idle = self.queue.unfinished_tasks == 0
+                if idle and len(self._alive()) > self.num_workers:
+                    # Whichever worker picks it up exits
+                    self.queue.put(None)
 
     def stop(self):
+        self._stopped.set()
+        if self._scaler:
+            self._scaler.join()
+
         self.queue.join()
-        for _ in range(self.num_workers):
+        with self._lock:
+            threads = list(self._alive().values())
+
+        for _ in threads:
             self.queue.put(None)
-        if self.thread:
-            self.thread.join()
+        for t in threads:
+            t.join()
+
+    def add_to_queue(self, item: dict) -> bool:
+        self.stats.record_received()
+        try:
+            self.queue.put_nowait(item)
+        except q.Full:
+            self.stats.record_dropped()
+            rp(f"[red]{self.queue.maxsize} events waiting, dropping event[/red]")
+            return False
+
+        self.scale_up()
+        return True
+
+
+@dataclass
+class RunnerPool:
+    """
+    Warm runners, one per worker. Each runner is a long lived container listening
+    on its own local port (port + worker id). `size` runners are started upfront,
+    the ones of the workers added when scaling up start with their worker.
+    """
+
+    stack_name: str
+    handler: str
+    size: int = 5
+    port: int = 9100
+    runner_provider: Callable[..., WarmRunner] = WarmRunner
+    runners: list[WarmRunner] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def runner(self, worker_id: int) -> WarmRunner:
+        with self._lock:
+            while len(self.runners) <= worker_id:
+                runner = self.runner_provider(
+                    self.stack_name, self.handler, port=self.port + len(self.runners)
+                )
+                runner.start()
+                self.runners.append(runner)
 
-    def add_to_queue(self, item: dict):
-        self.queue.put(item)
+            return self.runners[worker_id]
+
+    def start(self):
+        if self.size:
+            self.runner(self.size - 1)
+
+    def stop(self):
+        for runner in self.runners:
+            runner.stop()
+
+    def worker(
+        self,
+        queue: q.Queue,
+        worker_id: int,
+        color: str,
+        stats: DevStats | None = None,
+    ):
+        worker(
+            queue,
+            worker_id,
+            color,
+            container_provider=partial(run_in_runner, runner=self.runner(worker_id)),
+            stats=stats,
+        )
 
 
 def run_forever(
-    workers: Workers, client: DevClient, loop_function: Callable | None = None
+    workers: Workers,
+    client: DevClient,
+    loop_function: Callable | None = None,
+    *,
+    interval: float = 60,
+    reconnect_timeout: float = 120,
 ):
+    """
+    Block until ctrl+c, SIGTERM, the server closes the connection or it could not
+    be resumed within `reconnect_timeout`, calling `loop_function` (printing the
+    session stats by default) every `interval`.
+    """
+
+    def report():
+        rp(f"[dim]{workers.stats.summary(workers.queue.qsize())}[/dim]")
+
+    def terminate(*_):
+        raise KeyboardInterrupt
+
+    # SIGTERM stops the session like ctrl+c, handlers only work in the main thread
+    previous_handler = None
+    if threading.current_thread() is threading.main_thread():
+        previous_handler = signal.signal(signal.SIGTERM, terminate)
+
     try:
+        next_report = time.monotonic() + interval
+        interrupted_at: float | None = None
+
         while True:
-            if loop_function:
-                loop_function()
+            wake_at = next_report
+            if interrupted_at is not None:
+                wake_at = min(wake_at, interrupted_at + reconnect_timeout)
+
+            client.state_changed.wait(max(0, wake_at - time.monotonic()))
+            client.state_changed.clear()
+            now = time.monotonic()
+
+            if client.closed.is_set():
+                rp("[red]Connection closed by the server[/red]")
+                break
+
+            if client.interrupted:
+                if interrupted_at is None:
+                    rp("[yellow]Connection interrupted, reconnecting[/yellow]")
+                    interrupted_at = now
+                elif now - interrupted_at >= reconnect_timeout:
+                    rp("[red]Could not reconnect to the server[/red]")
+                    break
+
+            elif interrupted_at is not None:
+                rp("[green]Connection resumed[/green]")
+                interrupted_at = None
+
+            if now >= next_report:
+                (loop_function or report)()
+                next_report = now + interval
 
     except KeyboardInterrupt:
         pass
 
     finally:
+        if previous_handler is not None:
+            signal.signal(signal.SIGTERM, previous_handler)
+
         workers.stop()
-        rp("Disconnecting from server")
-        client.disconnect()
+        if not client.closed.is_set():
+            rp("Disconnecting from server")
+            client.disconnect()
 
 
 def run_dev(
@@ -114,6 +404,15 @@ def run_dev(
     build_function: Callable = build_runner_image,
     workers_provider: type[Workers] = Workers,
     run_forever: Callable = run_forever,
+    pool_size: int = 5,
+    runner_port: int = 9100,
+    pool_provider: type[RunnerPool] = RunnerPool,
+    hot_reload: bool = False,
+    path: str = ".",
+    reloader_provider: type[HotReloadRunner] = HotReloadRunner,
+    stats_interval: float = 60,
+    max_workers: int = 10,
+    max_queue_size: int = 100,
 ):
     subscriber_id = str(uuid4())
 
@@ -122,11 +421,44 @@ def run_dev(
 
     client.connect()
 
-    rp("[blue]Building Dev Environment[/blue]")
-    build_function(stack_name, handler)
+    # Hot reload runs the events in this process, without containers
+    reloader: HotReloadRunner | None = None
+    if hot_reload:
+        rp(f"[blue]Watching {path} for changes[/blue]")
+        reloader = reloader_provider(handler, path, client=client)
+        reloader.start()
+    else:
+        rp("[blue]Building Dev Environment[/blue]")
+        build_function(stack_name, handler)
+
+    # A pool size of 0 starts a new container for every event
+    pool: RunnerPool | None = None
+    if pool_size and not reloader:
+        rp(f"[green]Starting {pool_size} runners[/green]")
+        pool = pool_provider(stack_name, handler, size=pool_size, port=runner_port)
+        pool.start()
 
     rp("[green]Starting workers[/green]")
-    workers = workers_provider()
+    # The reloader handles one event at a time, the other pools scale with the load
+    if reloader:
+        workers = workers_provider(
+            num_workers=1,
+            max_queue_size=max_queue_size,
+            worker=partial(
+                worker, container_provider=partial(run_in_process, runner=reloader)
+            ),
+        )
+    elif pool:
+        workers = workers_provider(
+            num_workers=pool_size,
+            max_workers=max_workers,
+            max_queue_size=max_queue_size,
+            worker=pool.worker,
+        )
+    else:
+        workers = workers_provider(
+            max_workers=max_workers, max_queue_size=max_queue_size
+        )
     workers.start()
 
     client.subscribe(
@@ -138,4 +470,10 @@ def run_dev(
 
     rp("[green]Connected To Server - Ready to receive events[/green]")
 
-    run_forever(workers, client)
+    try:
+        run_forever(workers, client, interval=stats_interval)
+    finally:
+        if pool:
+            pool.stop()
+        if reloader:
+            reloader.stop()
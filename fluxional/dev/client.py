@@ -4,6 +4,7 @@ import boto3  # type: ignore
 from uuid import uuid4
 from typing import Callable
 import json
+import threading
 
 
 class AWSIotConnection:
@@ -21,6 +22,11 @@ class AWSIotConnection:
         self._region = region
         self._clean_session = clean_session
         self._keep_alive_secs = keep_alive_secs
+        # Set once the connection is closed for good
+        self.closed = threading.Event()
+        self.interrupted = False
+        # Set whenever the connection is interrupted, resumed or closed
+        self.state_changed = threading.Event()
 
     def credentials_provider(self) -> auth.AwsCredentialsProvider:
         return auth.AwsCredentialsProvider.new_default_chain()
@@ -42,16 +48,23 @@ class AWSIotConnection:
             credentials_provider=self.credentials_provider(),
             on_connection_interrupted=self.on_connection_interrupted,
             on_connection_resumed=self.on_connection_resumed,
+            on_connection_closed=self.on_connection_closed,
             client_id=self._client_id,
             clean_session=self._clean_session,
             keep_alive_secs=self._keep_alive_secs,
         )
 
     def on_connection_interrupted(self, connection, error, **kwargs):
-        pass
+        self.interrupted = True
+        self.state_changed.set()
 
     def on_connection_resumed(self, connection, return_code, session_present, **kwargs):
-        pass
+        self.interrupted = False
+        self.state_changed.set()
+
+    def on_connection_closed(self, connection, callback_data, **kwargs):
+        self.closed.set()
+        self.state_changed.set()
 
 
 class DevClient(AWSIotConnection):
@@ -0,0 +1,171 @@
+"""
+Long lived dev runner. It runs inside the runner container, imports the app once,
+keeps a single mqtt connection and executes in process the events it receives
+over a local socket, one json document per line.
+
+Usage: python3 -m fluxional.dev.launcher app.handler --port 9100
+"""
+
+from .client import DevClient
+from fluxional.core.tools import Environment, Event, Websocket
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+import argparse
+import importlib
+import json
+import os
+import socketserver
+import sys
+import threading
+import traceback
+
+
+def load_handler(handler: str) -> Callable:
+    module, name = handler.rsplit(".", 1)
+    return getattr(importlib.import_module(module), name)
+
+
+CREDENTIALS = {"AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SESSION_TOKEN"}
+
+
+def reset_clients() -> None:
+    """
+    The aws clients keep the credentials they were created with, the default
+    boto3 session caches them too
+    """
+    Event.clear_clients()
+    Websocket.clear_clients()
+
+    if "boto3" in sys.modules:
+        setattr(sys.modules["boto3"], "DEFAULT_SESSION", None)
+
+
+def set_environment(environment: dict[str, str]) -> None:
+    changed = {k for k, v in environment.items() if os.environ.get(k) != v}
+
+    if changed:
+        os.environ.update(environment)
+
+        if changed & CREDENTIALS:
+            reset_clients()
+
+        Environment.refresh()
+
+
+@contextmanager
+def scoped_environment(environment: dict[str, str]) -> Iterator[None]:
+    """Set the environment for one event only, the previous values are restored"""
+    previous = {k: os.environ.get(k) for k in environment}
+    set_environment(environment)
+
+    try:
+        yield
+    finally:
+        for k, v in previous.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+        if any(previous[k] != environment[k] for k in CREDENTIALS & previous.keys()):
+            reset_clients()
+
+        Environment.refresh()
+
+
+def handle_event(
+    function: Callable, client: Any, request: dict, *, scoped: bool = False
+) -> Any:
+    """
+    Run the event with the deployed lambda execution context (credentials,
+    region...). The runner container keeps it, in a shared process it is scoped
+    to the event.
+    """
+    environment = request.get("environment", {})
+
+    if scoped:
+        with scoped_environment(environment):
+            return _handle_event(function, client, request)
+
+    set_environment(environment)
+    return _handle_event(function, client, request)
+
+
+def _handle_event(function: Callable, client: Any, request: dict) -> Any:
+    event_id = request["event_id"]
+    subscriber_id = request["subscriber_id"]
+
+    print("EVENT_ID: ", event_id)
+    client.publish(
+        f"fluxional/acknowledge/{event_id}", {"subscriber_id": subscriber_id}
+    ).result(timeout=5)
+
+    try:
+        result = function(request["event"], None)
+    except Exception:
+        traceback.print_exc()
+        result = {"statusCode": 500, "body": "Internal Server Error"}
+
+    print(result)
+    client.publish(
+        f"fluxional/response/{event_id}",
+        {"subscriber_id": subscriber_id, "response": result},
+    ).result(timeout=5)
+
+    return result
+
+
+class RunnerServer(socketserver.TCPServer):
+    allow_reuse_address = True
+
+    def __init__(self, port: int, function: Callable, client: Any) -> None:
+        # Reached through the port published on the host loopback
+        super().__init__(("0.0.0.0", port), RunnerRequestHandler)
+        self.function = function
+        self.client = client
+
+
+class RunnerRequestHandler(socketserver.StreamRequestHandler):
+    server: RunnerServer
+
+    def handle(self):
+        for line in self.rfile:
+            request = json.loads(line)
+
+            if request["type"] == "shutdown":
+                self.wfile.write(b"done\n")
+                # shutdown() waits for serve_forever, which runs this handler
+                threading.Thread(target=self.server.shutdown).start()
+                return
+
+            handle_event(self.server.function, self.server.client, request)
+            self.wfile.write(b"done\n")
+
+
+def serve(
+    handler: str, port: int, *, client_provider: Callable[[], Any] = DevClient
+) -> None:
+    function = load_handler(handler)
+
+    client = client_provider()
+    client.connect()
+
+    with RunnerServer(port, function, client) as server:
+        print(f"Runner ready on port {port}")
+        try:
+            server.serve_forever()
+        finally:
+            client.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("handler")
+    parser.add_argument("--port", type=int, required=True)
+    args = parser.parse_args()
+
+    serve(args.handler, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+In process dev runner. The app stays loaded while the project directory is watched,
+only the modules that changed and the project modules importing them are reloaded
+before the next event.
+"""
+
+from .launcher import handle_event, load_handler
+from rich import print as rp
+from typing import Any, Callable, Iterable, Iterator
+import ast
+import ctypes
+import importlib
+import importlib.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+import traceback
+import types
+
+IGNORED_DIRECTORIES = {
+    "__pycache__",
+    "node_modules",
+    "cdk.out",
+    "venv",
+}
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+_INOTIFY_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def _directories(path: str) -> Iterator[str]:
+    for root, dirs, _ in os.walk(path):
+        dirs[:] = [
+            d for d in dirs if not d.startswith(".") and d not in IGNORED_DIRECTORIES
+        ]
+        yield root
+
+
+def python_files(path: str) -> dict[str, int]:
+    """Modification time of every python file of the project"""
+    files = {}
+    for directory in _directories(path):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".py") and entry.is_file():
+                    files[entry.path] = entry.stat().st_mtime_ns
+
+    return files
+
+
+class PollingWatcher:
+    def __init__(self, path: str, interval: float = 0.5):
+        self._path = path
+        self._interval = interval
+        self._files = python_files(path)
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        """Block until python files changed, an empty set means the timeout expired"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            files = python_files(self._path)
+            changed = {
+                file
+                for file in files.keys() | self._files.keys()
+                if files.get(file) != self._files.get(file)
+            }
+            self._files = files
+
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+            time.sleep(self._interval)
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    def __init__(self, path: str, libc: Any):
+        self._libc = libc
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._directories: dict[int, str] = {}
+        for directory in _directories(path):
+            self._add_watch(directory)
+
+    def _add_watch(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), _INOTIFY_MASK
+        )
+        if wd >= 0:
+            self._directories[wd] = directory
+
+    def _read(self) -> set[str]:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0").decode()
+            offset += length
+
+            path = os.path.join(self._directories.get(wd, ""), name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    for directory in _directories(path):
+                        self._add_watch(directory)
+                    changed |= set(python_files(path))
+
+            elif name.endswith(".py"):
+                changed.add(path)
+
+        return changed
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        """Block until python files changed, an empty set means the timeout expired"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        changed: set[str] = set()
+        while not changed:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return changed
+
+            if select.select([self._fd], [], [], remaining)[0]:
+                changed = self._read()
+
+        # Editors save in several steps, collect the rest of the burst
+        while select.select([self._fd], [], [], 0.05)[0]:
+            changed |= self._read()
+
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def get_watcher(path: str) -> InotifyWatcher | PollingWatcher:
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(path, ctypes.CDLL(None, use_errno=True))
+        except (OSError, AttributeError):
+            pass
+
+    return PollingWatcher(path)
+
+
+def _project_modules(path: str) -> dict[str, types.ModuleType]:
+    root = os.path.join(os.path.realpath(path), "")
+    return {
+        name: module
+        for name, module in list(sys.modules.items())
+        if (file := getattr(module, "__file__", None))
+        and os.path.realpath(file).startswith(root)
+    }
+
+
+def _imported_modules(module: types.ModuleType) -> set[str]:
+    """Names of the modules imported by the source of a module"""
+    try:
+        with open(module.__file__ or "") as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError):
+        return set()
+
+    imported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imported |= {alias.name for alias in node.names}
+
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                package = "." * node.level + base
+                base = importlib.util.resolve_name(package, module.__package__ or "")
+
+            imported.add(base)
+            # from package import module
+            imported |= {f"{base}.{alias.name}" for alias in node.names}
+
+    return imported
+
+
+def modules_to_reload(files: Iterable[str], path: str) -> list[str]:
+    """
+    The modules of the changed files followed by the project modules importing
+    them, directly or not, in the order they have to be reloaded
+    """
+    files = {os.path.realpath(file) for file in files}
+    modules = _project_modules(path)
+    imports = {name: _imported_modules(module) for name, module in modules.items()}
+
+    result = [
+        name
+        for name, module in modules.items()
+        if os.path.realpath(module.__file__ or "") in files
+    ]
+    seen = set(result)
+
+    for target in result:
+        for name in modules:
+            if name not in seen and target in imports[name]:
+                seen.add(name)
+                result.append(name)
+
+    return result
+
+
+class HotReloadRunner:
+    def __init__(
+        self,
+        handler: str,
+        path: str,
+        *,
+        client: Any,
+        watcher_provider: Callable[[str], Any] = get_watcher,
+    ):
+        self._handler = handler
+        self._path = path
+        self._client = client
+        self._function = load_handler(handler)
+        self._watcher = watcher_provider(path)
+        # Reloads wait for the event being handled
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def dispatch(self, request: dict) -> Any:
+        with self._lock:
+            # The cli process must not keep the lambda credentials
+            return handle_event(self._function, self._client, request, scoped=True)
+
+    def reload(self, files: Iterable[str]) -> list[str]:
+        with self._lock:
+            names = modules_to_reload(files, self._path)
+
+            try:
+                for name in names:
+                    importlib.reload(sys.modules[name])
+
+                self._function = load_handler(self._handler)
+
+            except Exception:
+                # Keep the previous version until the error is fixed
+                traceback.print_exc()
+                return []
+
+        return names
+
+    def watch(self) -> None:
+        while not self._stopped.is_set():
+            files = self._watcher.wait(timeout=1)
+            if not files:
+                continue
+
+            if names := self.reload(files):
+                rp(f"[yellow]Reloaded {', '.join(names)}[/yellow]")
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.watch, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+
+        self._watcher.close()
@@ -1,6 +1,13 @@
 from fluxional.deployment.engine import Engine
 from fluxional.deployment.constants import AWS_LAMBDA_PYTHON_3_10_IMAGE
+from fluxional.deployment.exceptions import FailedToRunContainer
+from typing import Callable
+import io
+import json
 import os
+import socket
+import threading
+import time
 
 
 class FunctionEngine(Engine):
@@ -69,7 +76,12 @@ def build_runner_image(
     stack_name = stack_name.lower()
     tag = f"{stack_name}_local_runner"
     engine = engine_provider(tag=tag, build_path=build_path, remove_container=False)
-    engine.build_image(dockerfile, show_logs=True)
+    # The sources are mounted at runtime, only the requirements are needed
+    engine.build_image(
+        dockerfile,
+        show_logs=True,
+        context=[requirements_file] if requirements_file else [],
+    )
 
 
 def run(
@@ -78,7 +90,12 @@ def run(
     build_path: str = ".",
     environment: dict = {},
     engine_provider: type[FunctionEngine] = FunctionEngine,
+    port: int | None = None,
 ):
+    """
+    Run the runner image. A port is published on the host loopback, host
+    networking is not available with docker desktop.
+    """
     # Mout the current directory to /app
     mount_path = os.path.join(os.getcwd(), build_path)
     mount_volume = {mount_path: {"bind": "/app", "mode": "ro"}}
@@ -89,14 +106,119 @@ def run(
         remove_container=False,
     )
 
-    if engine.image_exists():
-        engine.run_container(
-            command=command,
-            detach=True,
-            show_logs=True,
-            volumes=mount_volume,
-            environment=environment,
-            network_mode="host",
+    if not engine.image_exists():
+        raise FailedToRunContainer(
+            f"The runner image of {stack_name} does not exist, it is built when "
+            "the dev session starts"
         )
 
-    return
+    engine.run_container(
+        command=command,
+        detach=True,
+        show_logs=True,
+        volumes=mount_volume,
+        environment=environment,
+        network_mode="host" if port is None else "bridge",
+        ports=None if port is None else {f"{port}/tcp": ("127.0.0.1", port)},
+    )
+
+
+def build_serve_command(handler: str, port: int) -> str:
+    return f"python3 -m fluxional.dev.launcher {handler} --port {port}"
+
+
+class WarmRunner:
+    """
+    A long lived runner container. The app is imported once and the events are
+    sent to it over a local socket and executed in process, one at a time.
+    """
+
+    def __init__(
+        self,
+        stack_name: str,
+        handler: str,
+        *,
+        port: int,
+        runner_function: Callable = run,
+        connect_timeout: float = 60,
+    ):
+        self._stack_name = stack_name
+        self._handler = handler
+        self._port = port
+        self._runner_function = runner_function
+        self._connect_timeout = connect_timeout
+        self._thread: threading.Thread | None = None
+        self._socket: socket.socket | None = None
+        self._reader: io.BufferedReader | None = None
+
+    def start(self) -> None:
+        # The container logs are streamed until it exits, so it gets its own thread
+        self._thread = threading.Thread(
+            target=self._runner_function,
+            args=(self._stack_name,),
+            kwargs={
+                "command": build_serve_command(self._handler, self._port),
+                "environment": {"PYTHONUNBUFFERED": "1"},
+                "port": self._port,
+            },
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _connect(self) -> None:
+        # Wait for the container to import the app and listen
+        deadline = time.monotonic() + self._connect_timeout
+        while True:
+            try:
+                self._socket = socket.create_connection(("127.0.0.1", self._port))
+                break
+            except OSError:
+                # The container exited (ex: the image is missing)
+                if self._thread is None or not self._thread.is_alive():
+                    raise ConnectionError("The runner stopped before listening")
+
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+
+        self._reader = self._socket.makefile("rb")
+
+    def _close(self) -> None:
+        if self._reader:
+            self._reader.close()
+        if self._socket:
+            self._socket.close()
+
+        self._socket = self._reader = None
+
+    def send(self, request: dict) -> None:
+        """Send a request to the runner and wait until it has been handled"""
+        if self._thread is None or not self._thread.is_alive():
+            self._close()
+            self.start()
+
+        if self._socket is None:
+            self._connect()
+
+        assert self._socket and self._reader
+        try:
+            self._socket.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+            if not self._reader.readline():
+                raise ConnectionError("The runner closed the connection")
+
+        except OSError:
+            self._close()
+            raise
+
+    def stop(self) -> None:
+        if self._thread and self._thread.is_alive():
+            try:
+                self.send({"type": "shutdown"})
+            except OSError:
+                pass
+
+        self._close()
+
+        if self._thread:
+            self._thread.join(timeout=10)
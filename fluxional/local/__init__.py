@@ -0,0 +1,118 @@
+from .events import LocalContext
+from .queue import LocalQueue
+from .scheduler import Scheduler
+from .server import LocalHttpServer
+from .storage import LocalStorage
+from fluxional.core.app import App
+from fluxional.core.settings import Settings
+from fluxional.core.tools import Environment, Event, LookupKey
+from rich import print as rp
+from typing import Any, Callable
+import os
+import threading
+import traceback
+
+
+class LocalEmulator:
+    """
+    Serves the app without aws: http requests, events, storage and schedules are
+    emulated in this process and sent to the handler one at a time, like a lambda
+    container.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[dict, Any], Any],
+        *,
+        app: App,
+        settings: Settings,
+        host: str = "127.0.0.1",
+        port: int = 3000,
+        storage_path: str = ".fluxional/storage",
+    ):
+        self._handler = handler
+        self._settings = settings
+        self._address = (host, port)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+        self.queue = LocalQueue(
+            self.invoke, batch_size=settings.build.event_lambda.batch_size
+        )
+        self.storage = LocalStorage(storage_path, self.invoke)
+        self.scheduler = Scheduler(
+            app.schedule.rate_schedule, app.schedule.cron_schedule, self.invoke
+        )
+        self.server: LocalHttpServer | None = None
+
+    def invoke(self, event: dict) -> Any:
+        with self._lock:
+            try:
+                return self._handler(event, LocalContext())
+            except Exception:
+                traceback.print_exc()
+                return None
+
+    def _start_thread(self, target: Callable, *args) -> None:
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def start(self) -> None:
+        os.environ[LookupKey.event_queue_url] = "local"
+        os.environ[LookupKey.storage_bucket_name] = self.storage.bucket_name
+        environment = Environment.refresh()
+
+        # Event.trigger sends to the local queue
+        Event.set_client(self.queue, environment.aws_region)
+
+        self.server = LocalHttpServer(self._address, self.invoke)
+        self._start_thread(self.server.serve_forever)
+        self._start_thread(self.queue.run)
+        self._start_thread(self.storage.run, self._stopped)
+        self._start_thread(self.scheduler.run, self._stopped)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.queue.close()
+
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+        for thread in self._threads:
+            thread.join()
+
+
+def run_local(
+    handler: Callable[[dict, Any], Any],
+    *,
+    app: App,
+    settings: Settings,
+    host: str = "127.0.0.1",
+    port: int = 3000,
+    storage_path: str = ".fluxional/storage",
+    emulator_provider: type[LocalEmulator] = LocalEmulator,
+    wait: Callable[[], Any] = threading.Event().wait,
+):
+    emulator = emulator_provider(
+        handler,
+        app=app,
+        settings=settings,
+        host=host,
+        port=port,
+        storage_path=storage_path,
+    )
+    emulator.start()
+
+    rp(f"\n[bold blue]Serving {settings.stack_name} locally[/bold blue]")
+    rp(f"👉 [bold yellow] API Endpoint: http://{host}:{port}")
+    rp(f"👉 [bold yellow] Storage: {os.path.abspath(storage_path)}")
+
+    try:
+        wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
@@ -0,0 +1,163 @@
+"""
+Builders for the payloads aws sends to the lambdas, used by the local emulator.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Literal
+from urllib.parse import parse_qs, quote_plus
+from uuid import uuid4
+import base64
+import hashlib
+import time
+
+LOCAL_REGION = "local"
+LOCAL_ACCOUNT_ID = "000000000000"
+
+
+@dataclass
+class LocalContext:
+    function_name: str = "fluxional_local"
+    function_version: str = "$LATEST"
+    invoked_function_arn: str = (
+        f"arn:aws:lambda:{LOCAL_REGION}:{LOCAL_ACCOUNT_ID}:function:fluxional_local"
+    )
+    memory_limit_in_mb: int = 128
+    aws_request_id: str = field(default_factory=lambda: str(uuid4()))
+    log_group_name: str = "/aws/lambda/fluxional_local"
+    log_stream_name: str = "local"
+    identity: Any = None
+    client_context: Any = None
+    timeout: float = 30
+    started: float = field(default_factory=time.monotonic)
+
+    def get_remaining_time_in_millis(self) -> int:
+        elapsed = time.monotonic() - self.started
+        return max(0, int((self.timeout - elapsed) * 1000))
+
+
+def api_event(
+    method: str,
+    path: str,
+    *,
+    headers: list[tuple[str, str]] | None = None,
+    query: str = "",
+    body: bytes = b"",
+    source_ip: str = "127.0.0.1",
+) -> dict:
+    """Api gateway (rest api) proxy event"""
+    multi_value_headers: dict[str, list[str]] = {}
+    for key, value in headers or []:
+        multi_value_headers.setdefault(key, []).append(value)
+
+    multi_value_query = parse_qs(query, keep_blank_values=True)
+
+    is_base64_encoded = False
+    text: str | None = None
+    if body:
+        try:
+            text = body.decode("utf-8")
+        except UnicodeDecodeError:
+            text = base64.b64encode(body).decode("utf-8")
+            is_base64_encoded = True
+
+    return {
+        "resource": "/{proxy+}",
+        "path": path,
+        "httpMethod": method,
+        "requestContext": {
+            "resourcePath": "/{proxy+}",
+            "httpMethod": method,
+            "path": path,
+            "stage": "local",
+            "requestId": str(uuid4()),
+            "identity": {"sourceIp": source_ip},
+        },
+        "headers": {key: values[-1] for key, values in multi_value_headers.items()},
+        "multiValueHeaders": multi_value_headers,
+        # Api gateway sends null rather than empty objects
+        "queryStringParameters": {k: v[-1] for k, v in multi_value_query.items()}
+        or None,
+        "multiValueQueryStringParameters": multi_value_query or None,
+        "pathParameters": {"proxy": path.lstrip("/")},
+        "stageVariables": None,
+        "isBase64Encoded": is_base64_encoded,
+        "body": text,
+    }
+
+
+def sqs_event(messages: list[dict]) -> dict:
+    """Sqs event for messages with a messageId, a body and a receiveCount"""
+    return {
+        "Records": [
+            {
+                "messageId": message["messageId"],
+                "receiptHandle": message["messageId"],
+                "body": message["body"],
+                "attributes": {
+                    "ApproximateReceiveCount": str(message["receiveCount"]),
+                    "SentTimestamp": str(message["sentTimestamp"]),
+                },
+                "messageAttributes": {},
+                "md5OfBody": hashlib.md5(message["body"].encode("utf-8")).hexdigest(),
+                "eventSource": "aws:sqs",
+                "eventSourceARN": f"arn:aws:sqs:{LOCAL_REGION}:{LOCAL_ACCOUNT_ID}:events",
+                "awsRegion": LOCAL_REGION,
+            }
+            for message in messages
+        ]
+    }
+
+
+def storage_event(
+    action: Literal["create", "delete"],
+    bucket: str,
+    key: str,
+    *,
+    size: int = 0,
+    etag: str = "",
+) -> dict:
+    """S3 bucket notification for a single object"""
+    return {
+        "Records": [
+            {
+                "eventVersion": "2.1",
+                "eventSource": "aws:s3",
+                "awsRegion": LOCAL_REGION,
+                "eventTime": datetime.now(timezone.utc).isoformat(),
+                "eventName": (
+                    "ObjectCreated:Put"
+                    if action == "create"
+                    else "ObjectRemoved:Delete"
+                ),
+                "userIdentity": {"principalId": "local"},
+                "requestParameters": {"sourceIPAddress": "127.0.0.1"},
+                "responseElements": {
+                    "x-amz-request-id": str(uuid4()),
+                    "x-amz-id-2": str(uuid4()),
+                },
+                "s3": {
+                    "s3SchemaVersion": "1.0",
+                    "configurationId": "local",
+                    "bucket": {
+                        "name": bucket,
+                        "ownerIdentity": {"principalId": "local"},
+                        "arn": f"arn:aws:s3:::{bucket}",
+                    },
+                    "object": {
+                        # Keys are url encoded in s3 notifications
+                        "key": quote_plus(key, safe="/"),
+                        "size": size,
+                        "eTag": etag,
+                        "sequencer": f"{time.time_ns():X}",
+                    },
+                },
+            }
+        ]
+    }
+
+
+def task_event(
+    schedule_type: Literal["RateSchedule", "CronSchedule"], schedule_name: str
+) -> dict:
+    return {"schedule_type": schedule_type, "schedule_name": schedule_name}
@@ -0,0 +1,116 @@
+from .events import sqs_event
+from collections import deque
+from typing import Any, Callable
+from uuid import uuid4
+import threading
+import time
+
+
+class LocalQueue:
+    """
+    In memory stand in for the events sqs queue. It implements the sqs calls used
+    by `Event` and delivers the messages to the handler in batches, the messages
+    reported in batchItemFailures are retried up to max_receives times.
+    """
+
+    def __init__(
+        self,
+        invoke: Callable[[dict], Any],
+        *,
+        batch_size: int = 1,
+        max_receives: int = 3,
+    ):
+        self._invoke = invoke
+        self._batch_size = batch_size
+        self._max_receives = max_receives
+        self._messages: deque[dict] = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def _put(self, body: str) -> str:
+        message_id = str(uuid4())
+        with self._condition:
+            self._messages.append(
+                {
+                    "messageId": message_id,
+                    "body": body,
+                    "receiveCount": 0,
+                    "sentTimestamp": int(time.time() * 1000),
+                }
+            )
+            self._condition.notify()
+
+        return message_id
+
+    # sqs client api
+    def send_message(self, *, MessageBody: str, **_) -> dict:
+        return {"MessageId": self._put(MessageBody)}
+
+    def send_message_batch(self, *, Entries: list[dict], **_) -> dict:
+        return {
+            "Successful": [
+                {"Id": entry["Id"], "MessageId": self._put(entry["MessageBody"])}
+                for entry in Entries
+            ],
+            "Failed": [],
+        }
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def _receive(self) -> list[dict]:
+        messages: list[dict] = []
+        while self._messages and len(messages) < self._batch_size:
+            message = self._messages.popleft()
+            message["receiveCount"] += 1
+            messages.append(message)
+
+        return messages
+
+    def process(self, messages: list[dict]) -> None:
+        result = self._invoke(sqs_event(messages))
+
+        # The handler failed as a whole when there is no report
+        if isinstance(result, dict) and "batchItemFailures" in result:
+            failed = {f["itemIdentifier"] for f in result["batchItemFailures"]}
+        else:
+            failed = {message["messageId"] for message in messages}
+
+        with self._condition:
+            for message in messages:
+                if message["messageId"] not in failed:
+                    continue
+
+                if message["receiveCount"] < self._max_receives:
+                    self._messages.append(message)
+                    self._condition.notify()
+                else:
+                    print(f"Dropping event {message['messageId']}: {message['body']}")
+
+    def drain(self) -> None:
+        """Deliver every message, including the retries, in the calling thread"""
+        while True:
+            with self._condition:
+                messages = self._receive()
+
+            if not messages:
+                return
+
+            self.process(messages)
+
+    def run(self) -> None:
+        """Deliver the messages as they arrive until the queue is closed"""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._messages or self._closed)
+                if self._closed:
+                    return
+
+                messages = self._receive()
+
+            self.process(messages)
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
@@ -0,0 +1,155 @@
+from .events import task_event
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Mapping
+import threading
+import time
+
+RATE_UNIT_SECONDS = {
+    "days": 86400,
+    "hours": 3600,
+    "minutes": 60,
+    "seconds": 1,
+    "milliseconds": 0.001,
+}
+
+_MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN"]
+_MONTHS += ["JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+_WEEK_DAYS = ["SUN", "MON", "TUE", "WED", "THU", "FRI", "SAT"]
+
+
+def _parse_value(value: str, names: list[str] | None, low: int) -> int:
+    if names and value.upper() in names:
+        return names.index(value.upper()) + low
+
+    if not value.isdigit():
+        raise ValueError(f"Cron value {value} is not supported locally")
+
+    return int(value)
+
+
+def parse_cron_field(
+    expression: str | None, low: int, high: int, names: list[str] | None = None
+) -> set[int] | None:
+    """
+    Values matched by an eventbridge cron field, None when any value matches.
+    Supports *, ?, lists, ranges, steps and names but not L, W and #.
+    """
+    if expression is None or expression in ("*", "?"):
+        return None
+
+    values: set[int] = set()
+    for item in expression.split(","):
+        item, _, step = item.partition("/")
+
+        if item in ("*", "?"):
+            start, end = low, high
+        elif "-" in item:
+            first, last = item.split("-")
+            start = _parse_value(first, names, low)
+            end = _parse_value(last, names, low)
+        else:
+            start = _parse_value(item, names, low)
+            end = high if step else start
+
+        values.update(range(start, end + 1, int(step or 1)))
+
+    return values
+
+
+class CronMatcher:
+    def __init__(self, schedule: Mapping[str, Any]):
+        self.fields = [
+            ("minute", parse_cron_field(schedule.get("minute"), 0, 59)),
+            ("hour", parse_cron_field(schedule.get("hour"), 0, 23)),
+            ("day", parse_cron_field(schedule.get("day"), 1, 31)),
+            ("month", parse_cron_field(schedule.get("month"), 1, 12, _MONTHS)),
+            ("week_day", parse_cron_field(schedule.get("week_day"), 1, 7, _WEEK_DAYS)),
+            ("year", parse_cron_field(schedule.get("year"), 1970, 2199)),
+        ]
+
+    def matches(self, moment: datetime) -> bool:
+        values = {
+            "minute": moment.minute,
+            "hour": moment.hour,
+            "day": moment.day,
+            "month": moment.month,
+            # Eventbridge counts from sunday = 1
+            "week_day": (moment.weekday() + 1) % 7 + 1,
+            "year": moment.year,
+        }
+
+        return all(
+            allowed is None or values[name] in allowed for name, allowed in self.fields
+        )
+
+
+class Scheduler:
+    """
+    Fires the task events of `Run.every` and `Run.on` schedules. Cron schedules
+    are evaluated at the start of every minute in UTC, like eventbridge.
+    """
+
+    def __init__(
+        self,
+        rate_schedules: Iterable[Mapping[str, Any]],
+        cron_schedules: Iterable[Mapping[str, Any]],
+        invoke: Callable[[dict], Any],
+        *,
+        start: float | None = None,
+    ):
+        self._invoke = invoke
+        start = time.time() if start is None else start
+
+        self._rates: dict[str, tuple[float, float]] = {}
+        for schedule in rate_schedules:
+            interval = schedule["value"] * RATE_UNIT_SECONDS[schedule["unit"]]
+            self._rates[schedule["schedule_name"]] = (interval, start + interval)
+
+        self._crons: dict[str, CronMatcher] = {}
+        for schedule in cron_schedules:
+            try:
+                self._crons[schedule["schedule_name"]] = CronMatcher(schedule)
+            # The other schedules still run
+            except ValueError as e:
+                print(f"Skipping the schedule {schedule['schedule_name']}: {e}")
+        self._next_minute = (start // 60 + 1) * 60
+
+    def next_time(self) -> float | None:
+        times = [next_run for _, next_run in self._rates.values()]
+        if self._crons:
+            times.append(self._next_minute)
+
+        return min(times, default=None)
+
+    def due(self, now: float) -> list[dict]:
+        """The task events due at the given time, each schedule fires once"""
+        events = []
+
+        for name, (interval, next_run) in self._rates.items():
+            if now >= next_run:
+                events.append(task_event("RateSchedule", name))
+                # Skip the runs that were missed
+                while next_run <= now:
+                    next_run += interval
+                self._rates[name] = (interval, next_run)
+
+        if self._crons and now >= self._next_minute:
+            moment = datetime.fromtimestamp(self._next_minute, timezone.utc)
+            events += [
+                task_event("CronSchedule", name)
+                for name, matcher in self._crons.items()
+                if matcher.matches(moment)
+            ]
+            self._next_minute = (now // 60 + 1) * 60
+
+        return events
+
+    def run(self, stopped: threading.Event) -> None:
+        while True:
+            for event in self.due(time.time()):
+                self._invoke(event)
+
+            next_time = self.next_time()
+            timeout = None if next_time is None else max(0, next_time - time.time())
+            if stopped.wait(timeout):
+                return
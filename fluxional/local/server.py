@@ -0,0 +1,69 @@
+from .events import api_event
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+from urllib.parse import urlsplit
+import base64
+import json
+
+
+class LocalHttpServer(ThreadingHTTPServer):
+    """Translates http requests into api gateway events for the handler"""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], invoke: Callable[[dict], Any]):
+        super().__init__(address, LocalRequestHandler)
+        self.invoke = invoke
+
+
+class LocalRequestHandler(BaseHTTPRequestHandler):
+    server: LocalHttpServer
+
+    def handle_request(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+
+        event = api_event(
+            self.command,
+            url.path,
+            headers=list(self.headers.items()),
+            query=url.query,
+            body=self.rfile.read(length),
+            source_ip=self.client_address[0],
+        )
+
+        self.send_api_response(self.server.invoke(event))
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_request
+    do_HEAD = do_OPTIONS = handle_request
+
+    def send_api_response(self, response: Any):
+        # Like api gateway, anything but a proxy response is an error
+        if not isinstance(response, dict) or "statusCode" not in response:
+            response = {
+                "statusCode": 502,
+                "headers": {"Content-Type": "application/json"},
+                "body": json.dumps({"message": "Internal server error"}),
+            }
+
+        body = response.get("body") or ""
+        if response.get("isBase64Encoded"):
+            content = base64.b64decode(body)
+        else:
+            content = body if isinstance(body, bytes) else str(body).encode("utf-8")
+
+        self.send_response(int(response["statusCode"]))
+
+        headers = {k: [v] for k, v in (response.get("headers") or {}).items()}
+        headers |= response.get("multiValueHeaders") or {}
+        for key, values in headers.items():
+            for value in values:
+                self.send_header(key, str(value))
+
+        if "content-length" not in {k.lower() for k in headers}:
+            self.send_header("Content-Length", str(len(content)))
+
+        self.end_headers()
+
+        if self.command != "HEAD":
+            self.wfile.write(content)
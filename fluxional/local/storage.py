@@ -0,0 +1,94 @@
+from .events import storage_event
+from typing import Any, Callable
+import hashlib
+import os
+import threading
+
+
+class LocalStorage:
+    """
+    Filesystem backed stand in for the storage bucket. Files created, modified or
+    deleted in the directory, by the app or by hand, emit a storage event on the
+    next sync.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        invoke: Callable[[dict], Any],
+        *,
+        bucket_name: str = "fluxional-local-bucket",
+    ):
+        self._directory = directory
+        self._invoke = invoke
+        self.bucket_name = bucket_name
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._files = self._scan()
+
+    def _path(self, key: str) -> str:
+        path = os.path.realpath(os.path.join(self._directory, key))
+        if not path.startswith(os.path.join(os.path.realpath(self._directory), "")):
+            raise ValueError(f"Invalid key {key}")
+
+        return path
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        files = {}
+        for root, _, names in os.walk(self._directory):
+            for name in names:
+                path = os.path.join(root, name)
+                key = os.path.relpath(path, self._directory).replace(os.sep, "/")
+                stat = os.stat(path)
+                files[key] = (stat.st_mtime_ns, stat.st_size)
+
+        return files
+
+    def write(self, key: str, data: bytes | str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, "wb") as f:
+            f.write(data.encode("utf-8") if isinstance(data, str) else data)
+
+    def read(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def delete(self, key: str) -> None:
+        os.remove(self._path(key))
+
+    def _etag(self, key: str) -> str:
+        try:
+            return hashlib.md5(self.read(key)).hexdigest()
+        except OSError:
+            return ""
+
+    def sync(self) -> list[dict]:
+        """Emit the events of the changes since the last sync"""
+        with self._lock:
+            files = self._scan()
+            created = [k for k, v in files.items() if self._files.get(k) != v]
+            deleted = [k for k in self._files if k not in files]
+            self._files = files
+
+        events = [
+            storage_event(
+                "create",
+                self.bucket_name,
+                key,
+                size=files[key][1],
+                etag=self._etag(key),
+            )
+            for key in sorted(created)
+        ] + [storage_event("delete", self.bucket_name, key) for key in sorted(deleted)]
+
+        for event in events:
+            self._invoke(event)
+
+        return events
+
+    def run(self, stopped: threading.Event, interval: float = 0.5) -> None:
+        while not stopped.wait(interval):
+            self.sync()
@@ -0,0 +1,264 @@
+from .report import (
+    MEMORY_PER_VCPU,
+    TuneResult,
+    parse_reports,
+    print_results,
+)
+from fluxional import __version__
+from fluxional.core.settings import MIN_MEMORY_SIZE, MAX_MEMORY_SIZE
+from fluxional.deployment.constants import RUNTIMES
+from fluxional.deployment.engine import CDKEngine, RuntimeT
+from rich import print as rp
+from rich.console import Console
+from typing import Any
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+import json
+import os
+import time
+
+console = Console()
+
+# Invocation endpoint of the runtime interface emulator of the lambda images
+INVOKE_PATH = "/2015-03-31/functions/function/invocations"
+
+
+class TuneEngine(CDKEngine):
+    def setup_credentials(self):
+        # Optional, the handler may not call aws
+        self._aws_access_key_id = self._aws_access_key_id or os.environ.get(
+            "AWS_ACCESS_KEY_ID"
+        )
+        self._aws_secret_access_key = self._aws_secret_access_key or os.environ.get(
+            "AWS_SECRET_ACCESS_KEY"
+        )
+        self._aws_region = self._aws_region or os.environ.get("AWS_REGION")
+
+    def start_function(
+        self, *, memory_size: int, port: int, environment: dict[str, str]
+    ) -> Any:
+        """
+        Run the function image with the memory and cpu share lambda gives to the
+        memory size, the emulator listens on the given port
+        """
+        cpus = memory_size / MEMORY_PER_VCPU
+        available = os.cpu_count() or 1
+
+        if cpus > available:
+            rp(
+                f"[yellow]{memory_size} MB gets {cpus:.2f} vcpus on lambda but only "
+                f"{available} are available here, the results are throttled"
+            )
+            cpus = available
+
+        credentials = {
+            "AWS_ACCESS_KEY_ID": self._aws_access_key_id,
+            "AWS_SECRET_ACCESS_KEY": self._aws_secret_access_key,
+            "AWS_REGION": self._aws_region,
+        }
+
+        return self._client.containers.run(
+            self._tag,
+            detach=True,
+            ports={"8080/tcp": ("127.0.0.1", port)},
+            mem_limit=f"{memory_size}m",
+            nano_cpus=int(cpus * 1e9),
+            environment={k: v for k, v in credentials.items() if v}
+            | {"AWS_LAMBDA_FUNCTION_MEMORY_SIZE": str(memory_size)}
+            | environment,
+        )
+
+    def get_tune_dockerfile(
+        self,
+        *,
+        lambda_handler: str,
+        lambda_runtime: RuntimeT = "3.10",
+        requirements_file: str | None = None,
+        include_otel: bool = False,
+        include_fte: bool = False,
+        lambda_dockerfile_ext: str | None = None,
+        lambda_dockerfile_pre_install: str | None = None,
+    ) -> str:
+        """
+        The steps of the deployed function image, built locally without buildkit
+        so without the pip cache and for the architecture of this machine
+        """
+        dockerfile = f"FROM {RUNTIMES[lambda_runtime]}"
+
+        if lambda_dockerfile_pre_install:
+            dockerfile += f"\n{lambda_dockerfile_pre_install}"
+
+        if requirements_file:
+            dockerfile += (
+                f"\nCOPY {requirements_file} ${{LAMBDA_TASK_ROOT}}/{requirements_file}"
+            )
+            dockerfile += (
+                f"\nRUN pip install -r {requirements_file}"
+                ' --target "${LAMBDA_TASK_ROOT}"'
+            )
+        else:
+            dockerfile += (
+                f"\nRUN pip install fluxional=={__version__}"
+                ' --target "${LAMBDA_TASK_ROOT}"'
+            )
+
+        if include_otel:
+            dockerfile += self.get_otel_steps()
+
+        if include_fte:
+            dockerfile += self.get_fte_steps()
+
+        dockerfile += "\nCOPY . ${LAMBDA_TASK_ROOT}"
+
+        if lambda_dockerfile_ext:
+            dockerfile += f"\n{lambda_dockerfile_ext}"
+
+        dockerfile += f'\nCMD ["{lambda_handler}"]'
+
+        return dockerfile
+
+
+def invoke(port: int, event: dict, *, timeout: float = 60) -> float:
+    """
+    Invoke the function and return the round trip in ms, waits for the emulator
+    to accept connections first
+    """
+    request = Request(
+        f"http://127.0.0.1:{port}{INVOKE_PATH}",
+        data=json.dumps(event).encode("utf-8"),
+        method="POST",
+    )
+    deadline = time.monotonic() + timeout
+
+    while True:
+        start = time.perf_counter()
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                body = response.read()
+            break
+        except HTTPError:
+            raise
+        except (URLError, ConnectionError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+    duration = (time.perf_counter() - start) * 1000
+
+    result = json.loads(body or "null")
+    if isinstance(result, dict) and "errorType" in result:
+        rp(f"[red]The handler failed: {result.get('errorMessage')}")
+
+    return duration
+
+
+def measure(
+    engine: TuneEngine,
+    memory_size: int,
+    *,
+    event: dict,
+    invocations: int,
+    environment: dict[str, str],
+    port: int,
+) -> TuneResult:
+    container = engine.start_function(
+        memory_size=memory_size, port=port, environment=environment
+    )
+
+    try:
+        # The first invocation starts the runtime
+        timings = [invoke(port, event) for _ in range(invocations + 1)]
+        reports = parse_reports(container.logs().decode("utf-8"))
+    finally:
+        container.remove(force=True)
+
+    result = TuneResult(memory_size=memory_size)
+
+    if len(reports) == len(timings):
+        result.init_duration = reports[0].get("Init Duration")
+        result.durations = [r["Duration"] for r in reports[1:]]
+        result.billed_durations = [r["Billed Duration"] for r in reports[1:]]
+    else:
+        # Without the runtime reports, the round trips are the best guess
+        result.durations = timings[1:]
+        result.billed_durations = timings[1:]
+
+    return result
+
+
+def run_tune(
+    handler: str,
+    *,
+    event: dict,
+    stack_name: str,
+    memory_sizes: list[int],
+    invocations: int = 10,
+    target: float | None = None,
+    lambda_handler: str | None = None,
+    requirements_file: str | None = "requirements.txt",
+    include_otel: bool = False,
+    include_fte: bool = False,
+    lambda_dockerfile_ext: str | None = None,
+    lambda_dockerfile_pre_install: str | None = None,
+    dependencies: list[str] = [],
+    environment: dict[str, str] = {},
+    build_path: str = ".",
+    port: int = 9000,
+    engine_provider: type[TuneEngine] = TuneEngine,
+) -> list[TuneResult]:
+    """
+    Replay the event against the handler in a lambda container at each memory
+    size and report the duration and cost of each one
+    """
+    if not memory_sizes:
+        raise ValueError("At least one memory size is required")
+
+    for memory_size in memory_sizes:
+        if not MIN_MEMORY_SIZE <= memory_size <= MAX_MEMORY_SIZE:
+            raise ValueError(
+                f"memory_size must be between {MIN_MEMORY_SIZE} and "
+                f"{MAX_MEMORY_SIZE} MB"
+            )
+
+    if invocations < 1:
+        raise ValueError("invocations must be at least 1")
+
+    file_name = handler.split(".")[0]
+    context = [*dependencies, f"{file_name}.py"]
+    if requirements_file:
+        context.append(requirements_file)
+
+    engine = engine_provider(
+        tag=f"{stack_name.lower()}_tune", build_path=build_path, remove_container=True
+    )
+
+    with console.status("[blue]Building image"):
+        engine.build_image(
+            engine.get_tune_dockerfile(
+                lambda_handler=lambda_handler or handler,
+                requirements_file=requirements_file,
+                include_otel=include_otel,
+                include_fte=include_fte,
+                lambda_dockerfile_ext=lambda_dockerfile_ext,
+                lambda_dockerfile_pre_install=lambda_dockerfile_pre_install,
+            ),
+            context=list(dict.fromkeys(context)),
+        )
+
+    results = []
+    for memory_size in memory_sizes:
+        with console.status(f"[blue]Invoking with {memory_size} MB"):
+            results.append(
+                measure(
+                    engine,
+                    memory_size,
+                    event=event,
+                    invocations=invocations,
+                    environment=environment,
+                    port=port,
+                )
+            )
+
+    print_results(results, target)
+
+    return results
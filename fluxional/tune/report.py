@@ -0,0 +1,98 @@
+from dataclasses import dataclass, field
+from rich.console import Console
+from rich.table import Table
+import math
+import re
+
+# On demand prices of us-east-1 in USD
+GB_SECOND_PRICE = 0.0000166667
+REQUEST_PRICE = 0.0000002
+
+# Lambda gives a function one vcpu at 1769 MB, proportionally to its memory
+MEMORY_PER_VCPU = 1769
+
+_REPORT_VALUE = re.compile(r"([A-Za-z ]+): ([\d.]+) ms")
+
+
+def parse_reports(logs: str) -> list[dict[str, float]]:
+    """
+    Durations of the REPORT lines the runtime logs after each invocation, ex:
+    {"Init Duration": 0.5, "Duration": 81.2, "Billed Duration": 82}
+    """
+    return [
+        {name.strip(): float(value) for name, value in _REPORT_VALUE.findall(line)}
+        for line in logs.splitlines()
+        if line.startswith("REPORT")
+    ]
+
+
+def percentile(values: list[float], value: float) -> float:
+    ordered = sorted(values)
+    index = max(0, math.ceil(value / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+@dataclass
+class TuneResult:
+    memory_size: int
+    # Warm invocations only, in ms
+    durations: list[float] = field(default_factory=list)
+    billed_durations: list[float] = field(default_factory=list)
+    init_duration: float | None = None
+
+    @property
+    def average(self) -> float:
+        return sum(self.durations) / len(self.durations)
+
+    @property
+    def p95(self) -> float:
+        return percentile(self.durations, 95)
+
+    @property
+    def cost(self) -> float:
+        """Average cost of an invocation in USD"""
+        billed = sum(self.billed_durations) / len(self.billed_durations)
+        gb_seconds = billed / 1000 * self.memory_size / 1024
+        return gb_seconds * GB_SECOND_PRICE + REQUEST_PRICE
+
+
+def cheapest(
+    results: list[TuneResult], target: float | None = None
+) -> TuneResult | None:
+    """The cheapest configuration with a p95 duration within the target in ms"""
+    candidates = [r for r in results if target is None or r.p95 <= target]
+    return min(candidates, key=lambda r: (r.cost, r.p95), default=None)
+
+
+def print_results(
+    results: list[TuneResult],
+    target: float | None = None,
+    console: Console | None = None,
+):
+    console = console or Console()
+    best = cheapest(results, target)
+
+    table = Table(title="Memory tuning")
+    table.add_column("Memory (MB)", justify="right")
+    table.add_column("Init (ms)", justify="right")
+    table.add_column("Average (ms)", justify="right")
+    table.add_column("P95 (ms)", justify="right")
+    table.add_column("Cost / 1M invocations", justify="right")
+
+    for result in results:
+        init = result.init_duration
+        table.add_row(
+            str(result.memory_size),
+            "-" if init is None else f"{init:.1f}",
+            f"{result.average:.1f}",
+            f"{result.p95:.1f}",
+            f"${result.cost * 1_000_000:.2f}",
+            style="bold green" if result is best else None,
+        )
+
+    console.print(table)
+
+    if best:
+        console.print(f"👉 Cheapest configuration: {best.memory_size} MB")
+    elif target is not None:
+        console.print(f"[red]No configuration has a p95 within {target:.0f} ms")
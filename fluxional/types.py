@@ -5,6 +5,9 @@ import inspect
 HandlerFunctionT = Callable[[Any, Any], Any]
 AsyncHandlerFunctionT = Callable[[Any, Any], Awaitable[Any]]
 
+# Startup / Shutdown hooks, sync or async, called without arguments
+LifecycleFunctionT = Callable[[], Any] | Callable[[], Awaitable[Any]]
+
 
 class AsyncTypeGuard:
     @staticmethod
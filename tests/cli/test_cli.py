@@ -69,3 +69,41 @@ def test_dev():
 
     assert "cli_test" in result.stdout
     assert "cli_dev" in result.stdout
+
+
+def test_tune():
+    result = runner.invoke(
+        app,
+        [
+            "tune",
+            "mock_file.handler",
+            "event.json",
+            "--path",
+            os.path.join(os.getcwd(), "tests/cli"),
+            "--memory",
+            "128,1024",
+        ],
+    )
+
+    assert "cli_test" in result.stdout
+    assert "cli_tune" in result.stdout
+    assert "[128, 1024]" in result.stdout
+
+
+@pytest.mark.parametrize("memory", ["", "64", "128,abc"])
+def test_tune_invalid_memory(memory):
+    result = runner.invoke(
+        app,
+        [
+            "tune",
+            "mock_file.handler",
+            "event.json",
+            "--path",
+            os.path.join(os.getcwd(), "tests/cli"),
+            "--memory",
+            memory,
+        ],
+    )
+
+    assert result.exit_code != 0
+    assert "cli_tune" not in result.stdout
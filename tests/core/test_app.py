@@ -1,5 +1,6 @@
-from fluxional.core.app import App
+from fluxional.core.app import App, Event
 from fluxional.core.settings import Settings
+import pytest
 
 
 def test_app_build_api_resources():
@@ -21,6 +22,10 @@ def test_app_build_api_resources():
             "memory_size": 128,
             "timeout": 30,
             "description": "",
+            "requirements": None,
+            "packaging": "image",
+            "architecture": "x86_64",
+            "layer": None,
         },
         "fluxional_api_gateway": {
             "id": "fluxional_api_gateway",
@@ -76,6 +81,10 @@ def test_websocket():
             "memory_size": 128,
             "timeout": 30,
             "description": "",
+            "requirements": None,
+            "packaging": "image",
+            "architecture": "x86_64",
+            "layer": None,
             "permissions": [],
         },
         "fluxional_websocket_gateway": {
@@ -144,6 +153,10 @@ def test_websocket_with_db():
             "memory_size": 128,
             "timeout": 30,
             "description": "",
+            "requirements": None,
+            "packaging": "image",
+            "architecture": "x86_64",
+            "layer": None,
             "permissions": [
                 {
                     "resource_id": "fluxional_dynamodb",
@@ -269,6 +282,10 @@ def test_rate_schedule():
             "memory_size": 128,
             "timeout": 30,
             "description": "",
+            "requirements": None,
+            "packaging": "image",
+            "architecture": "x86_64",
+            "layer": None,
         },
         "somestack_my_schedule": {
             "id": "somestack_my_schedule",
@@ -322,6 +339,10 @@ def test_cron_schedule():
             "memory_size": 128,
             "timeout": 30,
             "description": "",
+            "requirements": None,
+            "packaging": "image",
+            "architecture": "x86_64",
+            "layer": None,
         },
         "somestack_my_schedule": {
             "id": "somestack_my_schedule",
@@ -369,6 +390,10 @@ def test_add_event():
             "memory_size": 128,
             "timeout": 30,
             "description": "",
+            "requirements": None,
+            "packaging": "image",
+            "architecture": "x86_64",
+            "layer": None,
         },
         "fluxional_event_queue": {
             "id": "fluxional_event_queue",
@@ -384,10 +409,54 @@ def test_add_event():
             "existing_resource": False,
             "queue_name": "somestack_fluxional_event_queue",
             "visibility_timeout": 30,
+            "batch_size": 1,
+            "max_batching_window": 0,
         },
     }
 
 
+def test_add_event_batching():
+    settings = Settings(
+        stack_name="SomeStack",
+    )
+
+    settings.build.event_lambda.batch_size = 100
+    settings.build.event_lambda.max_batching_window = 5
+
+    app = App(settings=settings)
+
+    app.event.active = True
+
+    x = app.build_resources(as_dict=True)
+
+    assert "batch_size" not in x["fluxional_event_lambda"]
+    assert x["fluxional_event_queue"]["batch_size"] == 100
+    assert x["fluxional_event_queue"]["max_batching_window"] == 5
+
+    # A batching window is required above 10 messages
+    settings.build.event_lambda.max_batching_window = 0
+
+    with pytest.raises(ValueError):
+        App(settings=settings, event=Event(active=True)).build_resources()
+
+    settings.build.event_lambda.batch_size = 0
+
+    with pytest.raises(ValueError):
+        App(settings=settings, event=Event(active=True)).build_resources()
+
+    settings.build.event_lambda.batch_size = 10
+    settings.build.event_lambda.max_batching_window = 301
+
+    with pytest.raises(ValueError):
+        App(settings=settings, event=Event(active=True)).build_resources()
+
+    settings.build.event_lambda.max_batching_window = 0
+    settings.build.event_lambda.batch_concurrency = 0
+
+    with pytest.raises(ValueError):
+        App(settings=settings, event=Event(active=True)).build_resources()
+
+
 def test_storage_permissions():
     settings = Settings(
         stack_name="SomeStack",
@@ -604,3 +673,77 @@ def test_db_permissions():
     ]:
         assert x[k]["permissions"][0]["allow_read"]
         assert x[k]["permissions"][0]["allow_write"]
+
+
+def test_function_requirements():
+    settings = Settings(stack_name="SomeStack")
+    settings.build.api_lambda.requirements = "requirements/api.txt"
+    settings.build.event_lambda.requirements = "requirements/api.txt"
+    settings.build.scheduled_task_lambda.requirements = "tasks.txt"
+    settings.build.scheduled_task_lambda.dockerfile = "Dockerfile.custom"
+    settings.build.websocket_lambda.requirements = "requirements/ws.txt"
+
+    app = App(settings=settings)
+    app.set_api()
+    app.websocket.add_connect_route()
+    app.event.active = True
+    app.schedule.rate_schedule.append(
+        {"schedule_name": "my_schedule", "value": 1, "unit": "minute"}
+    )
+
+    x = app.build_resources(as_dict=True)
+
+    # Functions with the same requirements share their image
+    assert x["fluxional_api_lambda"]["dockerfile"] == "Dockerfile.requirements_api_txt"
+    assert x["fluxional_api_lambda"]["requirements"] == "requirements/api.txt"
+    assert (
+        x["fluxional_event_lambda"]["dockerfile"] == "Dockerfile.requirements_api_txt"
+    )
+
+    # A custom dockerfile is kept
+    lambda_ = x["fluxional_rate_schedule_task_lambda"]
+    assert lambda_["dockerfile"] == "Dockerfile.custom"
+    assert lambda_["requirements"] == "tasks.txt"
+
+    lambda_ = x["fluxional_websocket_lambda"]
+    assert lambda_["dockerfile"] == "Dockerfile.requirements_ws_txt"
+    assert lambda_["requirements"] == "requirements/ws.txt"
+
+
+def test_zip_packaging():
+    settings = Settings(stack_name="SomeStack")
+    settings.build.api_lambda.packaging = "zip"
+    settings.build.event_lambda.packaging = "zip"
+    settings.build.event_lambda.requirements = "requirements/event.txt"
+    settings.build.event_lambda.architecture = "arm64"
+
+    app = App(settings=settings)
+    app.set_api()
+    app.event.active = True
+
+    x = app.build_resources(as_dict=True)
+
+    # The global requirements are in the layer unless the function has its own
+    assert x["fluxional_api_lambda"]["packaging"] == "zip"
+    assert x["fluxional_api_lambda"]["layer"] == ".fluxional/layers/requirements_txt"
+    assert x["fluxional_api_lambda"]["dockerfile"] == "Dockerfile"
+
+    lambda_ = x["fluxional_event_lambda"]
+    # Layers are built for the architecture of the function
+    assert lambda_["layer"] == ".fluxional/layers/requirements_event_txt_arm64"
+    assert lambda_["dockerfile"] == "Dockerfile"
+
+
+def test_memory_size():
+    settings = Settings(stack_name="SomeStack")
+    settings.build.api_lambda.memory_size = 1769
+
+    app = App(settings=settings)
+    app.set_api()
+
+    x = app.build_resources(as_dict=True)
+    assert x["fluxional_api_lambda"]["memory_size"] == 1769
+
+    settings.build.api_lambda.memory_size = 10241
+    with pytest.raises(ValueError):
+        app.build_resources(as_dict=True)
@@ -256,20 +256,33 @@ def test_event_decorator():
         return "any"
 
     assert test_on_event({}, {}) == "any"
-    assert (
-        flux.handler()(
-            {
-                "Records": [
-                    {
-                        "eventSource": "aws:sqs",
-                        "body": '{"event_name": "test_on_event", "data": {"payload": "any"}}',
-                    }
-                ]
-            },
-            {},
-        )
-        == "any"
-    )
+    assert flux.handler()(
+        {
+            "Records": [
+                {
+                    "eventSource": "aws:sqs",
+                    "body": '{"event_name": "test_on_event", "data": {"payload": "any"}}',
+                }
+            ]
+        },
+        {},
+    ) == {"batchItemFailures": []}
+
+
+def test_lifecycle_decorators():
+    flux = Fluxional("Test")
+
+    @flux.on_startup
+    def startup():
+        return "startup"
+
+    @flux.on_shutdown
+    async def shutdown():
+        return "shutdown"
+
+    assert startup() == "startup"
+    assert flux._handlers._startup_handlers == [startup]
+    assert flux._handlers._shutdown_handlers == [shutdown]
 
 
 def test_settings():
@@ -114,3 +114,21 @@ def test_extender_register():
         },
         context={},
     )
+
+
+def test_extender_register_lifecycle_handlers():
+    flux = Fluxional("Test")
+    extender = Extender()
+
+    @extender.on_startup
+    def startup():
+        pass
+
+    @extender.on_shutdown
+    def shutdown():
+        pass
+
+    flux.register(extender)
+
+    assert flux._handlers._startup_handlers == [startup]
+    assert flux._handlers._shutdown_handlers == [shutdown]
@@ -4,14 +4,18 @@ from fluxional.core.handlers import (
     cli_dev_handler,
     dev_handler,
     _DevState,
+    _dev_subscriptions,
 )
 from fluxional.core.settings import Settings
 from fluxional.exceptions import NoHandlerFound
 import asyncio
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, Mock
 import os
-from fluxional.core.tools import LookupKey
+from fluxional.core.tools import LookupKey, Environment
+from fluxional.core.events import classify_event
+import json
+import threading
 
 
 def test_a_failed_handler_exception():
@@ -60,6 +64,88 @@ def test_async_handler():
     ]
 
 
+def test_event_loop_is_reused():
+    handler = Handlers()
+    loops = []
+
+    async def x(event, context):
+        loops.append(asyncio.get_running_loop())
+        return True
+
+    handler.add_api_handler(x)
+    func = handler.handler()
+
+    assert func({"httpMethod": "GET"}, {})
+    assert func({"httpMethod": "GET"}, {})
+    assert loops[0] is loops[1] is handler.get_loop()
+
+
+def test_lifecycle_handlers():
+    handler = Handlers()
+    calls = []
+
+    async def startup():
+        calls.append(("startup", asyncio.get_running_loop()))
+
+    def shutdown():
+        calls.append(("shutdown", None))
+
+    async def x(event, context):
+        calls.append(("event", asyncio.get_running_loop()))
+        return True
+
+    handler.add_startup_handler(startup)
+    handler.add_shutdown_handler(shutdown)
+    handler.add_api_handler(x)
+    handler._fluxional_handlers = [lambda event, context: True]
+    func = handler.handler()
+
+    # Cli events do not start the app
+    assert func({"fluxional_event": "cli_deploy"}, {})
+    assert calls == []
+
+    func({"httpMethod": "GET"}, {})
+    func({"httpMethod": "GET"}, {})
+
+    assert [name for name, _ in calls] == ["startup", "event", "event"]
+    # Resources created at startup are bound to the same loop
+    assert calls[0][1] is calls[1][1] is calls[2][1]
+
+    loop = handler.get_loop()
+    handler.shutdown()
+
+    assert calls[-1] == ("shutdown", None)
+    assert loop.is_closed()
+
+    # Shutdown only runs once
+    handler.shutdown()
+    assert len(calls) == 4
+
+
+def test_failed_startup_is_retried():
+    handler = Handlers()
+    calls = []
+
+    def startup():
+        calls.append("startup")
+        if len(calls) == 1:
+            raise ConnectionError("database unavailable")
+
+    handler.add_startup_handler(startup)
+    handler.add_api_handler(lambda event, context: True)
+    func = handler.handler()
+
+    with pytest.raises(ConnectionError):
+        func({"httpMethod": "GET"}, {})
+
+    # The next invocation runs the startup handlers again
+    assert func({"httpMethod": "GET"}, {})
+    assert func({"httpMethod": "GET"}, {})
+    assert calls == ["startup", "startup"]
+
+    handler.shutdown()
+
+
 def test_default_fluxional_handlers():
     handler = Handlers()
 
@@ -234,6 +320,217 @@ def test_adding_websocket_routes():
     )
 
 
+def test_classify_event():
+    assert classify_event({"fluxional_event": "cli_deploy"}, {}) == ("fluxional", None)
+    assert classify_event({"httpMethod": "GET", "requestContext": {}}, {}) == (
+        "http",
+        None,
+    )
+    assert classify_event({"requestContext": {"routeKey": "$default"}}, {}) == (
+        "websocket",
+        "$default",
+    )
+    assert classify_event(
+        {"Records": [{"eventSource": "aws:s3", "eventName": "ObjectCreated:Put"}]}, {}
+    ) == ("storage", "create")
+    assert classify_event(
+        {"Records": [{"eventSource": "aws:s3", "eventName": "ObjectRemoved:Delete"}]},
+        {},
+    ) == ("storage", "delete")
+    assert classify_event({"Records": [{"eventSource": "aws:sqs"}]}, {}) == (
+        "sqs",
+        None,
+    )
+    assert classify_event(
+        {"schedule_type": "RateSchedule", "schedule_name": "task"}, {}
+    ) == ("rate_schedule", "task")
+    assert classify_event(
+        {"schedule_type": "CronSchedule", "schedule_name": "task"}, {}
+    ) == ("cron_schedule", "task")
+    assert classify_event({"Records": [{"eventSource": "aws:sns"}]}, {}) is None
+    assert classify_event({}, {}) is None
+
+
+def test_routes_are_dispatched():
+    handler = Handlers()
+    handler.add_storage_handler("create", lambda e, c: "create")
+    handler.add_storage_handler("delete", lambda e, c: "delete")
+    handler._rate_schedule_handlers["rate_task"] = lambda e, c: "rate"
+    handler._cron_schedule_handlers["cron_task"] = lambda e, c: "cron"
+
+    async def some_event(data, context):
+        return data
+
+    handler._sqs_handlers["some_event"] = some_event
+
+    func = handler.handler()
+
+    assert (
+        func(
+            {"Records": [{"eventSource": "aws:s3", "eventName": "ObjectCreated:*"}]},
+            {},
+        )
+        == "create"
+    )
+    assert (
+        func(
+            {"Records": [{"eventSource": "aws:s3", "eventName": "ObjectRemoved:*"}]},
+            {},
+        )
+        == "delete"
+    )
+    assert (
+        func({"schedule_type": "RateSchedule", "schedule_name": "rate_task"}, {})
+        == "rate"
+    )
+    assert (
+        func({"schedule_type": "CronSchedule", "schedule_name": "cron_task"}, {})
+        == "cron"
+    )
+    assert func(
+        {
+            "Records": [
+                {
+                    "messageId": "1",
+                    "eventSource": "aws:sqs",
+                    "body": json.dumps({"event_name": "some_event", "data": [1]}),
+                }
+            ]
+        },
+        {},
+    ) == {"batchItemFailures": []}
+
+    with pytest.raises(NoHandlerFound):
+        func({"schedule_type": "RateSchedule", "schedule_name": "unknown"}, {})
+
+    with pytest.raises(NoHandlerFound):
+        func({"requestContext": {"routeKey": "$connect"}}, {})
+
+
+def test_handlers_registered_after_dispatch():
+    handler = Handlers()
+    handler.add_rate_schedule_handler("first", lambda e, c: "first")
+    func = handler.handler()
+
+    assert func({"schedule_type": "RateSchedule", "schedule_name": "first"}, {})
+
+    # ie: from a module imported lazily by the first handler
+    handler.add_rate_schedule_handler("later", lambda e, c: "later")
+    handler.add_websocket_route_handler("$connect", lambda e, c: "connect")
+
+    assert (
+        func({"schedule_type": "RateSchedule", "schedule_name": "later"}, {}) == "later"
+    )
+    assert func({"requestContext": {"routeKey": "$connect"}}, {}) == "connect"
+
+
+def test_sqs_batch_reports_failed_records():
+    handler = Handlers()
+    processed = []
+
+    def ok_event(data, context):
+        processed.append(data)
+
+    async def failing_event(data, context):
+        raise ValueError(data)
+
+    handler._sqs_handlers["ok_event"] = ok_event
+    handler._sqs_handlers["failing_event"] = failing_event
+
+    def record(message_id: str, event_name: str, data):
+        return {
+            "messageId": message_id,
+            "eventSource": "aws:sqs",
+            "body": json.dumps({"event_name": event_name, "data": data}),
+        }
+
+    result = handler.handler()(
+        {
+            "Records": [
+                record("1", "ok_event", 1),
+                record("2", "failing_event", 2),
+                record("3", "ok_event", 3),
+                record("4", "unknown_event", 4),
+            ]
+        },
+        {},
+    )
+
+    assert processed == [1, 3]
+    assert result == {
+        "batchItemFailures": [{"itemIdentifier": "2"}, {"itemIdentifier": "4"}]
+    }
+
+
+def test_sqs_batch_concurrency():
+    settings = Settings(stack_name="SomeStack")
+    settings.build.event_lambda.batch_concurrency = 2
+    handler = Handlers(settings=settings)
+    running = []
+    max_running = []
+    both_running = asyncio.Event()
+    # Sequential records would never meet, the barrier would time out
+    barrier = threading.Barrier(2, timeout=5)
+
+    async def async_event(data, context):
+        running.append(data)
+        max_running.append(len(running))
+
+        if len(running) == 2:
+            both_running.set()
+
+        # Only returns once two records overlap
+        await asyncio.wait_for(both_running.wait(), timeout=5)
+        running.remove(data)
+
+        if data == "fail":
+            raise ValueError(data)
+
+    def sync_event(data, context):
+        return data
+
+    def paired_event(data, context):
+        barrier.wait()
+        return data
+
+    handler._sqs_handlers["async_event"] = async_event
+    handler._sqs_handlers["sync_event"] = sync_event
+    handler._sqs_handlers["paired_event"] = paired_event
+
+    def record(message_id: str, event_name: str, data):
+        return {
+            "messageId": message_id,
+            "eventSource": "aws:sqs",
+            "body": json.dumps({"event_name": event_name, "data": data}),
+        }
+
+    result = handler.handler()(
+        {
+            "Records": [
+                record("1", "async_event", "a"),
+                record("2", "async_event", "fail"),
+                record("3", "async_event", "c"),
+                record("4", "async_event", "d"),
+                record("5", "sync_event", "e"),
+                record("6", "unknown_event", "f"),
+            ]
+        },
+        {},
+    )
+
+    assert result == {
+        "batchItemFailures": [{"itemIdentifier": "2"}, {"itemIdentifier": "6"}]
+    }
+    # Never more than the concurrency limit at once
+    assert max(max_running) == 2
+
+    # Sync handlers run on the bounded thread pool, two at a time
+    result = handler.handler()(
+        {"Records": [record(str(i), "paired_event", i) for i in range(4)]}, {}
+    )
+    assert result == {"batchItemFailures": []}
+
+
 def test_cli_dev_handler():
     # returns none if not a valid event
     assert cli_dev_handler({}, {}) is None
@@ -280,7 +577,7 @@ def test_dev_handler():
 
     class DevClient:
         def __init__(self, *args, **kwargs):
-            pass  # Add any setup code for your mock class here
+            self.closed = threading.Event()
 
         def connect(self, *_, **__):
             pass
@@ -288,6 +585,9 @@ def test_dev_handler():
         def close(self):
             pass
 
+        def disconnect(self):
+            pass
+
         def subscribe(self, *args, **kwargs):
             pass
 
@@ -327,8 +627,10 @@ def test_dev_handler():
         assert req["statusCode"] == 500
         assert req["body"] == "Failed to acknowledge event."
 
-        state = _DevState
-        state.acknowledged = True
+        class AcknowledgedState(_DevState):
+            def __init__(self):
+                super().__init__()
+                self.acknowledge(payload=b'{"subscriber_id": "123"}')
 
         req = dev_handler(
             {
@@ -338,16 +640,21 @@ def test_dev_handler():
             settings,
             ack_timeout=0.1,
             timeout=0.1,
-            state=state,
+            state=AcknowledgedState,
         )
 
         assert req["statusCode"] == 500
         assert req["body"] == "Failed to get a response in time."
 
         # with response it returns the response
-        state = _DevState
-        state.acknowledged = True
-        state.response = {"statusCode": 200, "body": "response"}
+        class RespondedState(AcknowledgedState):
+            def __init__(self):
+                super().__init__()
+                self.on_event(
+                    payload=b'{"subscriber_id": "123", "response": {"statusCode": 200, "body": "response"}}'
+                )
+
+        state = RespondedState
 
         req = dev_handler(
             {
@@ -379,7 +686,131 @@ def test_dev_handler():
         assert req["statusCode"] == 200
 
         # Test that dev handler is called properly whe the context is write
+        # with the timeouts from the settings
+        settings.development.ack_timeout = 0.1
 
         with patch.object(os, "environ", {LookupKey.handler_context: "development"}):
+            Environment.refresh()
             handler = Handlers(settings=settings)
-            handler.handler()({"httpMethod": "GET"}, {})
+            req = handler.handler()({"httpMethod": "GET"}, {})
+
+        Environment.refresh()
+        assert req["body"] == "Failed to acknowledge event."
+
+    _dev_subscriptions.close()
+
+
+def test_dev_handler_waits_without_spinning():
+    class DevClient:
+        def __init__(self):
+            self.closed = threading.Event()
+
+        def connect(self):
+            pass
+
+        def disconnect(self):
+            pass
+
+        def subscribe(self, *args, **kwargs):
+            pass
+
+        def publish(self, *args, **kwargs):
+            class Mock:
+                def result(*args, **kwargs):
+                    pass
+
+            return Mock()
+
+    settings = Settings(stack_name="SomeStack")
+    settings.development.ack_timeout = 0.5
+
+    with patch("fluxional.dev.client.DevClient", new=DevClient), patch.object(
+        threading.Event, "wait", autospec=True, return_value=False
+    ) as wait:
+        req = dev_handler({"httpMethod": "GET"}, {}, settings)
+
+    _dev_subscriptions.close()
+
+    assert req["body"] == "Failed to acknowledge event."
+    # A single blocking wait for the whole timeout, a busy loop would poll
+    assert wait.call_count == 1
+    assert wait.call_args.args[1] == 0.5
+
+    # The response wakes the handler up as soon as it arrives
+    state = _DevState()
+    state.acknowledge(payload=b'{"subscriber_id": "123"}')
+    responses = []
+    waiter = threading.Thread(
+        target=lambda: responses.append(state.wait_for_response(60))
+    )
+    waiter.start()
+
+    state.on_event(payload=b'{"subscriber_id": "123", "response": {"statusCode": 200}}')
+    waiter.join(timeout=30)
+
+    assert not waiter.is_alive()
+    assert responses == [{"statusCode": 200}]
+
+
+def test_dev_handler_reuses_connection():
+    clients = []
+
+    class DevClient:
+        def __init__(self):
+            self.subscriptions = {}
+            self.closed = threading.Event()
+            clients.append(self)
+
+        def connect(self):
+            pass
+
+        def disconnect(self):
+            pass
+
+        def subscribe(self, topic, on_msg_received):
+            self.subscriptions[topic] = on_msg_received
+
+        def publish(self, topic, payload):
+            # Answer like the dev runner would, the unknown event is ignored
+            for event_id in ["unknown", payload["event_id"]]:
+                self.subscriptions["fluxional/acknowledge/+"](
+                    topic=f"fluxional/acknowledge/{event_id}",
+                    payload=json.dumps({"subscriber_id": event_id}).encode(),
+                )
+                self.subscriptions["fluxional/response/+"](
+                    topic=f"fluxional/response/{event_id}",
+                    payload=json.dumps(
+                        {
+                            "subscriber_id": event_id,
+                            "response": {"statusCode": 200, "body": event_id},
+                        }
+                    ).encode(),
+                )
+
+            return Mock()
+
+    settings = Settings(stack_name="SomeStack")
+
+    with patch("fluxional.dev.client.DevClient", new=DevClient):
+        first = dev_handler({"httpMethod": "GET"}, {}, settings, timeout=1)
+        second = dev_handler({"httpMethod": "GET"}, {}, settings, timeout=1)
+
+    assert len(clients) == 1
+    assert set(clients[0].subscriptions) == {
+        "fluxional/acknowledge/+",
+        "fluxional/response/+",
+    }
+    assert first["statusCode"] == second["statusCode"] == 200
+    assert first["body"] != second["body"]
+    assert _dev_subscriptions._states == {}
+
+    # A closed connection is replaced, with its subscriptions
+    clients[0].closed.set()
+    with patch("fluxional.dev.client.DevClient", new=DevClient):
+        third = dev_handler({"httpMethod": "GET"}, {}, settings, timeout=1)
+
+    assert len(clients) == 2
+    assert set(clients[1].subscriptions) == set(clients[0].subscriptions)
+    assert third["statusCode"] == 200
+
+    _dev_subscriptions.close()
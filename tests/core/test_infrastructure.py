@@ -16,6 +16,8 @@ def test_sqs_queue():
                 "id": "sqs_queue_id",
                 "resource_type": "sqs_queue",
                 "queue_name": "test_queue",
+                "batch_size": 50,
+                "max_batching_window": 2,
                 "permissions": [
                     {
                         "resource_id": "lambda_function_id",
@@ -57,6 +59,17 @@ def test_sqs_queue():
         {"Properties": {"QueueName": "test_queue", "VisibilityTimeout": 30}},
     )
 
+    template.has_resource(
+        "AWS::Lambda::EventSourceMapping",
+        {
+            "Properties": {
+                "BatchSize": 50,
+                "MaximumBatchingWindowInSeconds": 2,
+                "FunctionResponseTypes": ["ReportBatchItemFailures"],
+            }
+        },
+    )
+
     template.has_resource(
         "AWS::IAM::Policy",
         {
@@ -347,6 +360,84 @@ def test_infrastructure_add_lambda_function():
     )
 
 
+def test_infrastructure_add_zip_lambda_functions(tmp_path):
+    layer = tmp_path / "layer"
+    (layer / "python").mkdir(parents=True)
+    (tmp_path / "app.py").write_text("def handler(event, context): ...")
+
+    infra = {
+        "settings": {
+            "aws_account_id": "123456789",
+            "aws_region": "us-east-1",
+            "stack_name": "TestStack",
+            "lambda_handler": "app.handler",
+        },
+        "resources": {
+            f"lambda_{i}": {
+                "id": f"lambda_{i}",
+                "resource_type": "lambda_function",
+                "function_name": f"test_function_{i}",
+                "directory": str(tmp_path),
+                "packaging": "zip",
+                "layer": str(layer),
+            }
+            for i in range(2)
+        },
+    }
+
+    template = Template.from_stack(Infrastructure.from_dict(infra).stack())
+
+    # The functions share the layer of their requirements
+    template.resource_count_is("AWS::Lambda::LayerVersion", 1)
+    template.resource_count_is("AWS::Lambda::Function", 2)
+    template.has_resource(
+        "AWS::Lambda::Function",
+        {"Properties": {"Handler": "app.handler", "Runtime": "python3.10"}},
+    )
+
+    # Without the otel extension, its wrapper would fail the init
+    infra["settings"]["environment"] = {
+        "AWS_LAMBDA_EXEC_WRAPPER": "/opt/otel-instrument",
+        "SOME_VAR": "value",
+    }
+    template = Template.from_stack(Infrastructure.from_dict(infra).stack())
+    for function in template.find_resources("AWS::Lambda::Function").values():
+        variables = function["Properties"]["Environment"]["Variables"]
+        assert variables["SOME_VAR"] == "value"
+        assert "AWS_LAMBDA_EXEC_WRAPPER" not in variables
+
+    # The handler is needed without an image
+    infra["settings"].pop("lambda_handler")
+    with pytest.raises(ValueError):
+        Infrastructure.from_dict(infra).stack()
+
+
+def test_infrastructure_add_arm64_lambda_function():
+    infra = {
+        "settings": {
+            "aws_account_id": "123456789",
+            "aws_region": "us-east-1",
+            "stack_name": "TestStack",
+        },
+        "resources": {
+            "lambda_function_id": {
+                "id": "lambda_function_id",
+                "resource_type": "lambda_function",
+                "function_name": "test_function",
+                "dockerfile": "/tests/core/Dockerfile.lambda",
+                "architecture": "arm64",
+            },
+        },
+    }
+
+    template = Template.from_stack(Infrastructure.from_dict(infra).stack())
+
+    template.has_resource(
+        "AWS::Lambda::Function",
+        {"Properties": {"Architectures": ["arm64"]}},
+    )
+
+
 def test_infrastructure_add_dynamodb():
     infra = {
         "settings": {
@@ -1,6 +1,8 @@
 from unittest.mock import Mock, patch, MagicMock
 from fluxional.core.tools import Event, Websocket, LookupKey, Environment
 import os
+import pytest
+from botocore.exceptions import ClientError
 
 
 def test_env():
@@ -33,6 +35,22 @@ def test_env():
         assert env.event_queue_url == "some-url"
 
 
+def test_env_snapshot():
+    with patch.object(os, "environ", {LookupKey.event_queue_url: "some-url"}):
+        env = Environment.refresh()
+        assert Environment.snapshot() is env
+        assert env.event_queue_url == "some-url"
+
+    # The snapshot is kept until it is explicitly refreshed
+    assert Environment.snapshot().event_queue_url == "some-url"
+
+    with patch.object(os, "environ", {}):
+        assert Environment.refresh().event_queue_url is None
+        assert Environment.snapshot() is not env
+
+    Environment.refresh()
+
+
 @patch("boto3.client")
 def test_trigger(mocked_client):
     # Create a mock SQS client
@@ -40,9 +58,11 @@ def test_trigger(mocked_client):
     mocked_client.return_value = mock_sqs
 
     # Mock Environment
+    Event._clients.clear()
+
     with patch("fluxional.core.tools.Environment") as MockEnvironment:
-        MockEnvironment.return_value.aws_region = "us-west-2"
-        MockEnvironment.return_value.event_queue_url = (
+        MockEnvironment.snapshot.return_value.aws_region = "us-west-2"
+        MockEnvironment.snapshot.return_value.event_queue_url = (
             "http://localhost:4576/queue/test"
         )
 
@@ -57,6 +77,23 @@ def test_trigger(mocked_client):
     )
 
 
+@patch("boto3.client")
+def test_sqs_client_is_lazy_and_shared(mocked_client):
+    Event._clients.clear()
+
+    with patch("fluxional.core.tools.Environment") as MockEnvironment:
+        MockEnvironment.snapshot.return_value.aws_region = "eu-west-1"
+
+        first, second = Event(), Event()
+        mocked_client.assert_not_called()
+
+        first.trigger("test_event", 1)
+        second.trigger("test_event", 2)
+
+    mocked_client.assert_called_once_with("sqs", region_name="eu-west-1")
+    assert first._sqs is second._sqs
+
+
 @patch("boto3.client")
 def test_post_to_connection(mock_boto3_client):
     # Arrange
@@ -73,13 +110,157 @@ def test_post_to_connection(mock_boto3_client):
     }
     data = "test-data"
 
+    Websocket.configure(max_pool_connections=25)
+
     # Act
     Websocket.post_to_connection(event, data)
+    Websocket.post_to_connection(event, data, connection_id="other-connection-id")
 
-    # Assert
-    mock_boto3_client.assert_called_once_with(
-        "apigatewaymanagementapi", endpoint_url="https://test-domain-name/test-stage"
-    )
-    mock_post_to_connection.assert_called_once_with(
+    # Assert - The client is created once and reused
+    mock_boto3_client.assert_called_once()
+    args, kwargs = mock_boto3_client.call_args
+    assert args == ("apigatewaymanagementapi",)
+    assert kwargs["endpoint_url"] == "https://test-domain-name/test-stage"
+    assert kwargs["config"].max_pool_connections == 25
+
+    mock_post_to_connection.assert_any_call(
         Data=data, ConnectionId="test-connection-id"
     )
+    mock_post_to_connection.assert_any_call(
+        Data=data, ConnectionId="other-connection-id"
+    )
+
+    # A different endpoint gets its own client
+    event["requestContext"]["stage"] = "other-stage"
+    Websocket.post_to_connection(event, data)
+    assert mock_boto3_client.call_count == 2
+
+    Websocket.configure(max_pool_connections=10)
+
+
+@patch("boto3.client")
+def test_broadcast(mock_boto3_client):
+    def post_to_connection(Data, ConnectionId):
+        if ConnectionId == "gone":
+            raise ClientError(
+                {"Error": {"Code": "GoneException", "Message": "Gone"}},
+                "PostToConnection",
+            )
+        if ConnectionId == "error":
+            raise ValueError("error")
+
+    mock_boto3_client.return_value = MagicMock(
+        post_to_connection=MagicMock(side_effect=post_to_connection)
+    )
+    event = {
+        "requestContext": {
+            "connectionId": "test-connection-id",
+            "domainName": "broadcast-domain-name",
+            "stage": "test-stage",
+        }
+    }
+
+    result = Websocket.broadcast(
+        event, "test-data", ["a", "gone", "b", "error"], max_workers=2
+    )
+
+    assert result.sent == ["a", "b"]
+    assert result.gone == ["gone"]
+    assert list(result.failed) == ["error"]
+    assert isinstance(result.failed["error"], ValueError)
+
+
+@patch("boto3.client")
+def test_trigger_many(mocked_client):
+    mock_sqs = Mock()
+    mocked_client.return_value = mock_sqs
+    calls = []
+
+    def send_message_batch(QueueUrl, Entries):
+        calls.append([k["Id"] for k in Entries])
+
+        # "3" fails once on the sqs side, "4" is always rejected
+        if len(calls) == 1:
+            return {
+                "Failed": [
+                    {"Id": "3", "SenderFault": False, "Code": "InternalError"},
+                    {"Id": "4", "SenderFault": True, "Code": "InvalidMessage"},
+                ]
+            }
+
+        return {"Failed": []}
+
+    mock_sqs.send_message_batch.side_effect = send_message_batch
+
+    Event._clients.clear()
+
+    with patch("fluxional.core.tools.Environment") as MockEnvironment:
+        MockEnvironment.snapshot.return_value.aws_region = "us-west-2"
+        MockEnvironment.snapshot.return_value.event_queue_url = "some-url"
+
+        event = Event()
+        failed = event.trigger_many("test_event", range(12))
+
+    # Chunks of 10 and only the failed entry is retried
+    assert calls == [[str(i) for i in range(10)], ["3"], ["10", "11"]]
+    assert failed == [{"Id": "4", "SenderFault": True, "Code": "InvalidMessage"}]
+
+
+@patch("boto3.client")
+def test_trigger_many_client_error(mocked_client):
+    from botocore.exceptions import ClientError
+
+    mock_sqs = Mock()
+    mocked_client.return_value = mock_sqs
+    throttled = ClientError(
+        {"Error": {"Code": "ThrottlingException"}}, "SendMessageBatch"
+    )
+
+    def send_message_batch(QueueUrl, Entries):
+        # The first batch is always throttled
+        if Entries[0]["Id"] == "0":
+            raise throttled
+
+        return {"Failed": []}
+
+    mock_sqs.send_message_batch.side_effect = send_message_batch
+
+    Event._clients.clear()
+
+    with patch("fluxional.core.tools.Environment"), patch("time.sleep"):
+        failed = Event().trigger_many("test_event", range(12), max_retries=1)
+
+    # The next batches are still sent, the entries of the failed one are reported
+    assert mock_sqs.send_message_batch.call_count == 3
+    assert [k["Id"] for k in failed] == [str(i) for i in range(10)]
+    assert failed[0]["Code"] == "ThrottlingException"
+    assert not failed[0]["SenderFault"]
+
+
+def test_trigger_many_chunks():
+    body = "x" * 100 * 1024
+
+    chunks = Event._chunk_entries(
+        [{"Id": str(i), "MessageBody": body} for i in range(5)]
+    )
+
+    # Batches can not exceed 256 KB
+    assert [len(k) for k in chunks] == [2, 2, 1]
+
+    with pytest.raises(ValueError):
+        Event._chunk_entries([{"Id": "0", "MessageBody": "x" * 257 * 1024}])
+
+
+@patch("boto3.client")
+def test_trigger_many_concurrently(mocked_client):
+    mock_sqs = Mock()
+    mocked_client.return_value = mock_sqs
+    mock_sqs.send_message_batch.return_value = {"Successful": []}
+
+    Event._clients.clear()
+
+    with patch("fluxional.core.tools.Environment"):
+        event = Event()
+        assert event.trigger_many("test_event", range(35), max_workers=4) == []
+
+    assert mock_sqs.send_message_batch.call_count == 4
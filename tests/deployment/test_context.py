@@ -0,0 +1,65 @@
+from fluxional.deployment import CDKEngine
+from fluxional.deployment.context import BuildContext, DOCKERFILE_NAME, format_size
+from unittest.mock import patch
+import io
+import tarfile
+
+
+def test_build_context(tmp_path):
+    (tmp_path / "pkg" / "__pycache__").mkdir(parents=True)
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "app.py").write_text("handler = None")
+    (tmp_path / "requirements.txt").write_text("fluxional")
+    (tmp_path / "pkg" / "module.py").write_text("a = 1")
+    (tmp_path / "pkg" / "__pycache__" / "module.pyc").write_bytes(b"\0")
+    (tmp_path / "node_modules" / "big.js").write_text("x" * 1000)
+    (tmp_path / ".dockerignore").write_text("# Comment\n**/__pycache__\n")
+
+    context = BuildContext(
+        ["app.py", "requirements.txt", "pkg", "missing.py"],
+        "FROM scratch",
+        build_path=str(tmp_path),
+    )
+
+    # Only the given paths, without the ignored ones
+    assert list(context.files) == ["app.py", "requirements.txt", "pkg/module.py"]
+    assert context.size == len("FROM scratch") + 14 + 9 + 5
+
+    tar = tarfile.open(fileobj=io.BytesIO(b"".join(context.stream())))
+    assert tar.getnames() == [
+        DOCKERFILE_NAME,
+        "app.py",
+        "requirements.txt",
+        "pkg/module.py",
+    ]
+    assert tar.extractfile(DOCKERFILE_NAME).read() == b"FROM scratch"
+
+
+def test_format_size():
+    assert format_size(512) == "512 B"
+    assert format_size(2048) == "2.0 KB"
+    assert format_size(5 * 1024**2) == "5.0 MB"
+    assert format_size(3 * 1024**3) == "3.0 GB"
+
+
+def test_build_image_with_context(tmp_path):
+    (tmp_path / "app.py").write_text("handler = None")
+
+    with patch("docker.APIClient") as api_client, patch("docker.from_env"):
+        engine = CDKEngine(
+            aws_access_key_id="1",
+            aws_secret_access_key="1",
+            aws_account_id="1",
+            aws_region="1",
+            build_path=str(tmp_path),
+        )
+
+    api_client.return_value.build.return_value = []
+    engine.build_image("FROM scratch", context=["app.py"])
+
+    kwargs = api_client.return_value.build.call_args.kwargs
+    assert kwargs["custom_context"] and kwargs["dockerfile"] == DOCKERFILE_NAME
+    assert "path" not in kwargs
+
+    tar = tarfile.open(fileobj=io.BytesIO(b"".join(kwargs["fileobj"])))
+    assert tar.getnames() == [DOCKERFILE_NAME, "app.py"]
@@ -6,6 +6,7 @@ from fluxional.deployment.exceptions import (
     FailedToRunContainer,
 )
 import os
+import subprocess
 import pytest
 from unittest.mock import patch, Mock
 
@@ -216,15 +217,54 @@ def test_cdk_engine_get_dockerfile():
     )
 
     exp = """FROM fluxionality/cdk_deploy:latest
-COPY ./main.py /app/main.py
-COPY ./requirements.txt /app/requirements.txt
 WORKDIR /app
+COPY ./requirements.txt /app/requirements.txt
 RUN pip install -r requirements.txt
+COPY ./main.py /app/main.py
+"""
+
+    assert dockerfile == exp
+
+    # Extra steps run before the sources are copied
+    dockerfile = engine.get_dockerfile(
+        dependencies=["main.py"],
+        extra_steps='RUN echo "FROM x" >> Dockerfile\n',
+    )
+
+    exp = """FROM fluxionality/cdk_deploy:latest
+WORKDIR /app
+RUN echo "FROM x" >> Dockerfile
+COPY ./main.py /app/main.py
 """
 
     assert dockerfile == exp
 
 
+def test_build_image_cache_report():
+    with patch("docker.APIClient") as api_client, patch("docker.from_env"):
+        engine = CDKEngine(
+            aws_access_key_id="1",
+            aws_secret_access_key="1",
+            aws_account_id="1",
+            aws_region="1",
+        )
+
+    api_client.return_value.build.return_value = [
+        b'{"stream": "Step 1/3 : FROM fluxionality/cdk_deploy:latest\\n"}',
+        b'{"stream": " ---\\u003e 0123456789ab\\n"}',
+        b'{"stream": "Step 2/3 : RUN pip install -r requirements.txt\\n"}',
+        b'{"stream": " ---\\u003e Using cache\\n ---\\u003e 0123456789ab\\n"}',
+        b'{"stream": "Step 3/3 : COPY ./main.py /app/main.py\\n"}',
+        b'{"stream": " ---\\u003e 0123456789ab\\n"}',
+    ]
+
+    assert engine.build_image("FROM x") == [
+        ("FROM fluxionality/cdk_deploy:latest", False),
+        ("RUN pip install -r requirements.txt", True),
+        ("COPY ./main.py /app/main.py", False),
+    ]
+
+
 def test_cdk_engine_get_lambda_dockerfile():
     engine = CDKEngine(
         aws_access_key_id="1",
@@ -239,12 +279,13 @@ def test_cdk_engine_get_lambda_dockerfile():
         include_otel=True,
         include_fte=True,
         lambda_dockerfile_ext="""RUN install something""",
+        lambda_dockerfile_pre_install="""RUN yum install -y gcc""",
     )
 
-    exp = """FROM public.ecr.aws/lambda/python:3.10
-COPY . \\${LAMBDA_TASK_ROOT}
-RUN install something
-RUN pip install -r requirements.txt --target "\\${LAMBDA_TASK_ROOT}"
+    exp = """FROM --platform=\\$TARGETPLATFORM public.ecr.aws/lambda/python:3.10
+RUN yum install -y gcc
+COPY requirements.txt \\${LAMBDA_TASK_ROOT}/requirements.txt
+RUN --mount=type=cache,target=/root/.cache/pip pip install -r requirements.txt --target "\\${LAMBDA_TASK_ROOT}"
 RUN curl -sSL https://tjaws.s3.amazonaws.com/otel-instrument -o /opt/otel-instrument
 RUN chmod +x /opt/otel-instrument
 RUN curl -sSL https://tjaws.s3.amazonaws.com/requirements_otel.txt -o requirements_otel.txt
@@ -257,6 +298,8 @@ RUN unzip ./python-example-telemetry-api-extension.zip -d ./python-example-telem
 RUN cp -r ./python-example-telemetry-api-extension/python-example-telemetry-api-extension/* /opt/
 RUN rm ./python-example-telemetry-api-extension.zip
 RUN rm -rf ./python-example-telemetry-api-extension
+COPY . \\${LAMBDA_TASK_ROOT}
+RUN install something
 CMD [\\"some_file.handler\\"]"""
 
     assert exp == dockerfile
@@ -408,3 +451,177 @@ def test_output_key_info(capsys):
     captured = capsys.readouterr()
     assert "https://ct37az2nsf.execute-api.us-east-1.amazonaws.com/v1/" in captured.out
     assert "wss://ct37az2nsf.execute-api.us-east-1.amazonaws.com/v1/" in captured.out
+
+
+def test_function_dockerfiles():
+    with patch("docker.APIClient"), patch("docker.from_env"):
+        engine = CDKEngine(
+            aws_access_key_id="1",
+            aws_secret_access_key="1",
+            aws_account_id="1",
+            aws_region="1",
+        )
+
+    built = []
+
+    def build_image(dockerfile, **kwargs):
+        built.append((dockerfile, kwargs["context"]))
+        return []
+
+    engine.build_image = build_image
+    engine.run_container = Mock()
+    engine.remove_built_image = Mock()
+
+    engine.deploy(
+        "app.handler",
+        dependencies=["app.py"],
+        requirements_file="requirements.txt",
+        function_requirements={"Dockerfile.api_txt": "api.txt"},
+    )
+
+    dockerfile, context = built[0]
+
+    # Every requirements file is sent to the deploy image
+    assert context == ["app.py", "requirements.txt", "api.txt"]
+
+    # Each function image installs its own requirements
+    lines = dockerfile.splitlines()
+    assert (
+        'RUN echo "COPY api.txt \\${LAMBDA_TASK_ROOT}/api.txt" >> Dockerfile.api_txt'
+        in lines
+    )
+    assert (
+        'RUN echo "COPY requirements.txt \\${LAMBDA_TASK_ROOT}/requirements.txt" >> Dockerfile'
+        in lines
+    )
+
+
+def test_zip_function_layers():
+    with patch("docker.APIClient"), patch("docker.from_env"):
+        engine = CDKEngine(
+            aws_access_key_id="1",
+            aws_secret_access_key="1",
+            aws_account_id="1",
+            aws_region="1",
+        )
+
+    built = []
+
+    engine.build_image = lambda dockerfile, **kwargs: built.append(dockerfile) or []
+    engine.run_container = Mock()
+    engine.remove_built_image = Mock()
+
+    engine.deploy(
+        "app.handler",
+        dependencies=["app.py"],
+        requirements_file=None,
+        layers={
+            ".fluxional/layers/api_txt": ("api.txt", "x86_64"),
+            ".fluxional/layers/api_txt_arm64": ("api.txt", "arm64"),
+        },
+    )
+
+    # The layer is installed before the sources are copied
+    lines = built[0].splitlines()
+    install = (
+        "RUN pip install -r api.txt --target .fluxional/layers/api_txt/python"
+        " --platform manylinux2014_x86_64 --implementation cp"
+        " --python-version 3.10 --only-binary=:all:"
+    )
+    assert lines.index("COPY ./api.txt /app/api.txt") < lines.index(install)
+    assert lines.index(install) < lines.index("COPY ./app.py /app/app.py")
+
+    # With the wheels of their architecture
+    assert (
+        "RUN pip install -r api.txt --target .fluxional/layers/api_txt_arm64/python"
+        " --platform manylinux2014_aarch64 --implementation cp"
+        " --python-version 3.10 --only-binary=:all:"
+    ) in lines
+
+    # The synth is given the handler of the zip functions
+    environment = engine.run_container.call_args.kwargs["environment"]
+    assert environment["fluxional_lambda_handler"] == "app.handler"
+    assert environment["fluxional_lambda_runtime"] == "3.10"
+
+
+def write_lambda_dockerfiles(dockerfile: str, directory) -> str:
+    """Run the steps writing the lambda dockerfiles like the deploy image does"""
+    for line in dockerfile.splitlines():
+        if line.startswith("RUN echo"):
+            subprocess.run(line[4:], shell=True, cwd=directory, check=True)
+
+    return (directory / "Dockerfile").read_text()
+
+
+def test_builder_fallback(tmp_path):
+    with patch("docker.APIClient"), patch("docker.from_env"):
+        engine = CDKEngine(
+            aws_access_key_id="1",
+            aws_secret_access_key="1",
+            aws_account_id="1",
+            aws_region="1",
+        )
+
+    built = []
+
+    engine.build_image = lambda dockerfile, **kwargs: built.append(dockerfile) or []
+    engine.run_container = Mock()
+    engine.remove_built_image = Mock()
+
+    engine.deploy("app.handler", dependencies=["app.py"], requirements_file=None)
+
+    lambda_dockerfile = write_lambda_dockerfiles(built[0], tmp_path)
+    assert "--mount=type=cache" in lambda_dockerfile
+
+    # Only runs when buildx is missing
+    (step,) = [line for line in built[0].splitlines() if "buildx" in line]
+    assert step.startswith("RUN docker buildx version > /dev/null 2>&1 || ")
+
+    subprocess.run(step.split(" || ", 1)[1], shell=True, cwd=tmp_path, check=True)
+
+    lambda_dockerfile = (tmp_path / "Dockerfile").read_text()
+    assert "--mount" not in lambda_dockerfile
+    assert lambda_dockerfile.startswith("FROM public.ecr.aws/lambda/python:3.10\n")
+
+
+def buildx_installed() -> bool:
+    try:
+        return subprocess.run(["docker", "buildx", "version"]).returncode == 0
+    except FileNotFoundError:
+        return False
+
+
+@pytest.mark.skipif(not buildx_installed(), reason="Requires docker buildx")
+@pytest.mark.parametrize(
+    "architecture, platform", [("x86_64", "linux/amd64"), ("arm64", "linux/arm64")]
+)
+def test_lambda_dockerfile_builds(tmp_path, architecture, platform):
+    # Building for arm64 on x86_64 requires emulation (ex: tonistiigi/binfmt)
+    with patch("docker.APIClient"), patch("docker.from_env"):
+        engine = CDKEngine(
+            aws_access_key_id="1",
+            aws_secret_access_key="1",
+            aws_account_id="1",
+            aws_region="1",
+        )
+
+    built = []
+
+    engine.build_image = lambda dockerfile, **kwargs: built.append(dockerfile) or []
+    engine.run_container = Mock()
+    engine.remove_built_image = Mock()
+
+    engine.deploy(
+        "app.handler", dependencies=["app.py"], requirements_file="requirements.txt"
+    )
+
+    (tmp_path / "requirements.txt").write_text("")
+    (tmp_path / "app.py").write_text("def handler(event, context): ...")
+    write_lambda_dockerfiles(built[0], tmp_path)
+
+    # As cdk builds the image of a function with this architecture
+    subprocess.run(
+        ["docker", "buildx", "build", "--platform", platform, "."],
+        cwd=tmp_path,
+        check=True,
+    )
@@ -0,0 +1,136 @@
+from fluxional.deployment import CDKEngine
+from fluxional.deployment.exceptions import FailedContainerBuild
+from fluxional.deployment.state import DeployState, Fingerprint, hash_files
+from functools import partial
+from unittest.mock import Mock, patch
+import os
+import pytest
+
+
+def test_hash_files(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "__pycache__").mkdir()
+    (tmp_path / "app.py").write_text("a = 1")
+    (tmp_path / "pkg" / "module.py").write_text("b = 1")
+
+    digest = hash_files(["app.py", "pkg"], str(tmp_path))
+    assert digest == hash_files(["pkg", "app.py", "app.py"], str(tmp_path))
+
+    # Bytecode is ignored
+    (tmp_path / "pkg" / "__pycache__" / "module.pyc").write_bytes(b"\0")
+    assert digest == hash_files(["app.py", "pkg"], str(tmp_path))
+
+    (tmp_path / "pkg" / "module.py").write_text("b = 2")
+    assert digest != hash_files(["app.py", "pkg"], str(tmp_path))
+
+    # Missing and empty files differ
+    (tmp_path / "empty.txt").touch()
+    assert hash_files(["empty.txt"], str(tmp_path)) != hash_files(
+        ["missing.txt"], str(tmp_path)
+    )
+
+
+def test_deploy_state(tmp_path):
+    state = DeployState(str(tmp_path / ".fluxional" / "deployments.json"))
+    fingerprint = Fingerprint(code="a", infrastructure="b")
+
+    assert state.get("stack") is None
+
+    state.save("stack", fingerprint)
+    state.save("other", Fingerprint(code="c", infrastructure="d"))
+    assert state.get("stack") == fingerprint
+
+    state.remove("stack")
+    assert state.get("stack") is None
+    assert state.get("other") == Fingerprint(code="c", infrastructure="d")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    (tmp_path / "app.py").write_text("handler = None")
+
+    with patch("docker.APIClient"), patch("docker.from_env"):
+        engine = CDKEngine(
+            aws_access_key_id="1",
+            aws_secret_access_key="1",
+            aws_account_id="1",
+            aws_region="us-east-1",
+            build_path=str(tmp_path),
+        )
+
+    commands = []
+    engine.build_image = lambda *args, **kwargs: None  # type: ignore
+    engine.remove_built_image = lambda *args, **kwargs: None  # type: ignore
+    engine.run_container = lambda **kwargs: commands.append(kwargs["command"])  # type: ignore
+    engine.commands = commands  # type: ignore
+
+    return engine
+
+
+def test_incremental_deploy(engine, tmp_path):
+    def deploy(resources, **kwargs):
+        return engine.deploy(
+            "app.handler",
+            requirements_file=None,
+            stack_name="Stack",
+            resources=resources,
+            hotswap=True,
+            **kwargs,
+        )
+
+    resources = {"api": {"memory_size": 128}}
+
+    assert deploy(resources)
+    assert os.path.exists(tmp_path / ".fluxional" / "deployments.json")
+
+    # Nothing changed
+    assert not deploy(resources)
+    assert len(engine.commands) == 1
+
+    # Only the code changed
+    (tmp_path / "app.py").write_text("handler = print")
+    assert deploy(resources)
+    assert engine.commands[-1].endswith(" --hotswap-fallback")
+
+    # The infrastructure changed
+    assert deploy({"api": {"memory_size": 256}})
+    assert not engine.commands[-1].endswith(" --hotswap-fallback")
+
+    # Forced and destroyed stacks are deployed again
+    assert deploy({"api": {"memory_size": 256}}, force=True)
+    engine.destroy("app.handler", requirements_file=None, stack_name="Stack")
+    assert deploy({"api": {"memory_size": 256}})
+    assert len(engine.commands) == 6
+
+
+def test_failed_deploy_is_not_saved(engine):
+    # The real run_container, with a container exiting with an error
+    del engine.run_container
+    container = Mock()
+    container.logs.return_value = [b"Stack failed"]
+    container.wait.return_value = {"StatusCode": 1}
+    engine._client.containers.run.return_value = container
+    removed = []
+    engine.remove_built_image = lambda *args, **kwargs: removed.append(True)
+
+    deploy = partial(
+        engine.deploy,
+        "app.handler",
+        requirements_file=None,
+        stack_name="Stack",
+        resources={"api": {"memory_size": 128}},
+    )
+
+    with pytest.raises(FailedContainerBuild):
+        deploy()
+
+    # Waited for even without the logs, the image is still cleaned up
+    container.wait.assert_called_once()
+    container.remove.assert_called_once()
+    assert removed == [True]
+    assert engine.state.get(engine.state_key("Stack")) is None
+
+    # The next deploy runs again
+    container.wait.return_value = {"StatusCode": 0}
+    assert deploy()
+    assert engine.state.get(engine.state_key("Stack")) is not None
@@ -15,6 +15,7 @@ def test_aws_iot_connection():
     assert isinstance(connection.get_connection(), mqtt.Connection)
     assert connection.on_connection_interrupted(None, None) is None
     assert connection.on_connection_resumed(None, None, None) is None
+    assert connection.state_changed.is_set() and not connection.interrupted
 
     with patch("boto3.client") as mock_boto3_client:
         # Create a mock response
@@ -1,6 +1,17 @@
-from fluxional.dev import run_dev, run_container, worker, Workers, run_forever
+from fluxional.dev import (
+    run_dev,
+    run_container,
+    worker,
+    Workers,
+    run_forever,
+    RunnerPool,
+    DevStats,
+)
 from unittest.mock import MagicMock
 import pytest
+import queue as q
+import threading
+import time
 
 
 class DevClient:
@@ -47,6 +58,9 @@ def test_run_container():
 
 def test_run_dev():
     class MockWorkers:
+        def __init__(self, **kwargs):
+            self.kwargs = kwargs
+
         def start(self):
             pass
 
@@ -63,8 +77,135 @@ def test_run_dev():
         build_function=lambda *args, **kwargs: None,
         workers_provider=MockWorkers,
         run_forever=lambda *args, **kwargs: None,
+        pool_size=0,
+    )
+
+    pools = []
+
+    class MockPool(RunnerPool):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.started = self.stopped = False
+            pools.append(self)
+
+        def start(self):
+            self.started = True
+
+        def stop(self):
+            self.stopped = True
+
+    def run_forever(workers, client, interval):
+        assert workers.kwargs == {
+            "num_workers": 2,
+            "max_workers": 10,
+            "max_queue_size": 100,
+            "worker": pools[0].worker,
+        }
+
+    run_dev(
+        stack_name="test",
+        handler="app.handler",
+        dev_client=DevClient,
+        build_function=lambda *args, **kwargs: None,
+        workers_provider=MockWorkers,
+        run_forever=run_forever,
+        pool_size=2,
+        runner_port=9200,
+        pool_provider=MockPool,
+    )
+
+    assert pools[0].size == 2 and pools[0].port == 9200
+    assert pools[0].started and pools[0].stopped
+
+    # Hot reload doesn't build nor start containers
+    reloaders = []
+
+    class MockReloader:
+        def __init__(self, handler, path, *, client):
+            self.handler, self.path = handler, path
+            self.stopped = False
+            reloaders.append(self)
+
+        def start(self):
+            pass
+
+        def stop(self):
+            self.stopped = True
+
+    def build_function(*args, **kwargs):
+        raise AssertionError("Should not build")
+
+    def run_forever(workers, client, interval):
+        assert workers.kwargs["num_workers"] == 1
+
+    run_dev(
+        stack_name="test",
+        handler="app.handler",
+        dev_client=DevClient,
+        build_function=build_function,
+        workers_provider=MockWorkers,
+        run_forever=run_forever,
+        pool_provider=MockPool,
+        hot_reload=True,
+        path="project",
+        reloader_provider=MockReloader,
     )
 
+    assert len(pools) == 1
+    assert reloaders[0].path == "project" and reloaders[0].stopped
+
+
+def test_runner_pool():
+    class MockRunner:
+        def __init__(self, stack_name, handler, *, port):
+            self.port = port
+            self.events = []
+            self.running = False
+
+        def start(self):
+            self.running = True
+
+        def stop(self):
+            self.running = False
+
+        def send(self, request):
+            self.events.append(request)
+
+    pool = RunnerPool(
+        "test", "app.handler", size=2, port=9200, runner_provider=MockRunner
+    )
+    pool.start()
+
+    assert [r.port for r in pool.runners] == [9200, 9201]
+    assert all(r.running for r in pool.runners)
+
+    queue = MagicMock()
+    queue.get.side_effect = [
+        {
+            "stack_name": "test",
+            "subscriber_id": "sub",
+            "kwargs": {
+                "payload": b'{"event_id": "1", "event": {"httpMethod": "GET"}, "execution_context": {"fluxional_handler_context": "development", "AWS_REGION": "us-east-1"}}'
+            },
+        },
+        None,
+    ]
+    pool.worker(queue, 1, "red")
+
+    assert pool.runners[0].events == []
+    assert pool.runners[1].events == [
+        {
+            "type": "event",
+            "event_id": "1",
+            "event": {"httpMethod": "GET"},
+            "subscriber_id": "sub",
+            "environment": {"AWS_REGION": "us-east-1"},
+        }
+    ]
+
+    pool.stop()
+    assert not any(r.running for r in pool.runners)
+
 
 def test_worker():
     mock = MagicMock()
@@ -94,7 +235,7 @@ def test_worker():
 
 
 def test_workers():
-    def worker(queue, index, color):
+    def worker(queue, index, color, stats):
         while True:
             item = queue.get()
             if item is None:
@@ -114,16 +255,182 @@ def test_workers():
     # Stop the workers
     workers.stop()
 
-    # Assert that the last thread is not alive
-    assert not workers.thread.is_alive()
+    # Assert that every thread is stopped
+    assert len(workers.threads) == 2
+    assert not any(t.is_alive() for t in workers.threads.values())
+    assert workers.stats.received == 1
+
+    # Each pool has its own queue
+    assert Workers().queue is not Workers().queue
+
+
+def test_workers_scaling():
+    release = threading.Event()
+    handled = []
+
+    def container_provider(**kwargs):
+        release.wait()
+        handled.append(kwargs["payload"])
+
+    def failing_provider(**kwargs):
+        raise RuntimeError("Failed")
+
+    workers = Workers(
+        num_workers=1,
+        max_workers=3,
+        max_queue_size=2,
+        scale_interval=0.01,
+        colors=["red"],
+        worker=lambda *args, **kwargs: worker(
+            *args, container_provider=container_provider, **kwargs
+        ),
+    )
+    workers.start()
+
+    item = {"stack_name": "test", "subscriber_id": "sub"}
+
+    def add(i):
+        return workers.add_to_queue({**item, "kwargs": {"payload": i}})
+
+    def wait_for_workers():
+        deadline = time.monotonic() + 5
+        while workers.queue.qsize() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    # A worker is added for each waiting event, up to 3
+    added = []
+    for i in range(3):
+        added.append(add(i))
+        wait_for_workers()
+
+    assert workers.size == 3
+
+    # 3 busy workers and 2 waiting events, the rest is dropped
+    added += [add(i) for i in range(3, 6)]
+    assert added == [True] * 5 + [False]
+    assert workers.stats.dropped == 1
+
+    release.set()
+    workers.queue.join()
+    assert sorted(handled) == [i for i, ok in enumerate(added) if ok]
+
+    # The extra workers are retired once idle
+    deadline = time.monotonic() + 5
+    while workers.size > 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert workers.size == 1
+    workers.stop()
+    assert workers.size == 0
+
+    # A failing event doesn't stop the worker
+    queue: q.Queue = q.Queue()
+    queue.put({**item, "kwargs": {"payload": 0}})
+    queue.put(None)
+    worker(queue, 0, "red", container_provider=failing_provider)
+    assert queue.unfinished_tasks == 0
+
+
+class ClosableClient:
+    def __init__(self):
+        self.closed = threading.Event()
+        self.interrupted = False
+        self.state_changed = threading.Event()
+        self.disconnected = False
+
+    def disconnect(self):
+        self.disconnected = True
 
 
 def test_run_forever():
     loop_function = MagicMock()
     loop_function.side_effect = KeyboardInterrupt
+    workers = MagicMock()
+    client = ClosableClient()
 
     run_forever(
-        workers=MagicMock(),
-        client=MagicMock(),
+        workers=workers,
+        client=client,
         loop_function=loop_function,
+        interval=0,
+    )
+
+    assert workers.stop.called and client.disconnected
+
+    # Returns when the server closes the connection, without disconnecting
+    workers = MagicMock()
+    workers.stats = DevStats()
+    client = ClosableClient()
+    calls = []
+
+    def loop_function():
+        calls.append(workers.stats.summary(0))
+        client.closed.set()
+
+    run_forever(workers, client, loop_function, interval=0)
+
+    assert calls == ["Events: 0 received, 0 handled | Queue: 0 | Latency: p50 -, p95 -"]
+    assert not client.disconnected
+
+
+class ScriptedEvent:
+    """Runs the next step each time it is waited on"""
+
+    def __init__(self, steps):
+        self._steps = iter(steps)
+
+    def wait(self, timeout=None):
+        next(self._steps)()
+        return True
+
+    def clear(self):
+        pass
+
+
+def test_run_forever_interrupted(capsys):
+    client = ClosableClient()
+
+    def interrupt():
+        client.interrupted = True
+
+    def resume():
+        client.interrupted = False
+
+    # Woken up by the connection changes, the stats are not due yet
+    client.state_changed = ScriptedEvent([interrupt, resume, client.closed.set])
+    loop_function = MagicMock()
+
+    run_forever(MagicMock(), client, loop_function, interval=60)
+
+    out = capsys.readouterr().out
+    assert out.index("Connection interrupted") < out.index("Connection resumed")
+    assert out.index("Connection resumed") < out.index(
+        "Connection closed by the server"
+    )
+    assert not loop_function.called and not client.disconnected
+
+    # Stops once the connection could not be resumed in time
+    client = ClosableClient()
+    client.interrupted = True
+    client.state_changed.set()
+
+    run_forever(MagicMock(), client, loop_function, interval=60, reconnect_timeout=0)
+
+    out = capsys.readouterr().out
+    assert "Could not reconnect to the server" in out
+    assert "Connection closed by the server" not in out
+    assert client.disconnected
+
+
+def test_dev_stats():
+    stats = DevStats(window=100)
+    stats.record_received()
+
+    for latency in range(1, 101):
+        stats.record_handled(latency / 1000)
+
+    assert stats.percentile(50) == 0.051
+    assert stats.percentile(95) == 0.096
+    assert stats.summary(3) == (
+        "Events: 1 received, 100 handled | Queue: 3 | Latency: p50 51ms, p95 96ms"
     )
@@ -0,0 +1,144 @@
+from fluxional.dev import run_in_runner
+from fluxional.core.tools import Event
+from fluxional.dev.launcher import handle_event, load_handler, serve
+from fluxional.dev.runner import WarmRunner, build_serve_command
+from unittest.mock import MagicMock
+import json
+import os
+import pytest
+import socket
+import sys
+import types
+
+
+class DevClient:
+    def __init__(self):
+        self.connections = 0
+        self.published = []
+
+    def connect(self):
+        self.connections += 1
+
+    def disconnect(self):
+        pass
+
+    def publish(self, topic, payload):
+        self.published.append((topic, payload))
+        return MagicMock()
+
+
+def handler(event, context):
+    if event.get("fail"):
+        raise Exception("Error")
+
+    return {"statusCode": 200, "body": os.environ["FLUXIONAL_TEST_VALUE"]}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_load_handler():
+    assert load_handler("json.dumps") is json.dumps
+
+
+def test_warm_runner(monkeypatch):
+    monkeypatch.setitem(
+        sys.modules, "fluxional_dev_app", types.SimpleNamespace(handler=handler)
+    )
+    monkeypatch.setenv("FLUXIONAL_TEST_VALUE", "before")
+
+    client = DevClient()
+    port = free_port()
+    commands = []
+
+    # Stands for the runner container
+    def run(stack_name, command, environment, port):
+        commands.append(command)
+        serve("fluxional_dev_app.handler", port, client_provider=lambda: client)
+
+    runner = WarmRunner(
+        "test", "fluxional_dev_app.handler", port=port, runner_function=run
+    )
+    runner.start()
+
+    for event_id, event in [("1", {}), ("2", {"fail": True})]:
+        payload = {
+            "event_id": event_id,
+            "event": event,
+            "execution_context": {
+                "fluxional_handler_context": "development",
+                "FLUXIONAL_TEST_VALUE": "after",
+            },
+        }
+        run_in_runner(
+            stack_name="test",
+            payload=json.dumps(payload).encode("utf-8"),
+            subscriber_id="sub",
+            runner=runner,
+        )
+
+    runner.stop()
+
+    # One container, one connection for every event
+    assert commands == [build_serve_command("fluxional_dev_app.handler", port)]
+    assert client.connections == 1
+    assert client.published == [
+        ("fluxional/acknowledge/1", {"subscriber_id": "sub"}),
+        (
+            "fluxional/response/1",
+            {"subscriber_id": "sub", "response": {"statusCode": 200, "body": "after"}},
+        ),
+        ("fluxional/acknowledge/2", {"subscriber_id": "sub"}),
+        (
+            "fluxional/response/2",
+            {
+                "subscriber_id": "sub",
+                "response": {"statusCode": 500, "body": "Internal Server Error"},
+            },
+        ),
+    ]
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_warm_runner_exited():
+    def run(stack_name, command, environment, port):
+        raise Exception("No image")
+
+    runner = WarmRunner("test", "app.handler", port=free_port(), runner_function=run)
+
+    # Fails as soon as the runner exits instead of waiting for the connect timeout
+    with pytest.raises(ConnectionError):
+        runner.send({"type": "event"})
+
+
+def test_credentials_change(monkeypatch):
+    # Restored after the test
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "initial")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "secret")
+    monkeypatch.setenv("AWS_REGION", "us-east-1")
+    Event.clear_clients()
+
+    def handler(event, context):
+        # The access key the sqs client signs with
+        return Event()._sqs._request_signer._credentials.access_key
+
+    results = [
+        handle_event(
+            handler,
+            DevClient(),
+            {
+                "event_id": key,
+                "event": {},
+                "subscriber_id": "sub",
+                "environment": {"AWS_ACCESS_KEY_ID": key},
+            },
+        )
+        for key in ["first", "second"]
+    ]
+
+    Event.clear_clients()
+
+    assert results == ["first", "second"]
@@ -0,0 +1,115 @@
+from fluxional.dev.reloader import (
+    HotReloadRunner,
+    InotifyWatcher,
+    PollingWatcher,
+    get_watcher,
+    modules_to_reload,
+)
+from unittest.mock import MagicMock
+import os
+import pytest
+import sys
+import threading
+
+
+class DevClient:
+    def publish(self, topic, payload):
+        return MagicMock()
+
+
+class MockWatcher:
+    def __init__(self, path):
+        pass
+
+    def close(self):
+        pass
+
+
+def write(path, content: str):
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def test_polling_watcher(tmp_path):
+    file = tmp_path / "app.py"
+    write(file, "VALUE = 1")
+
+    watcher = PollingWatcher(str(tmp_path), interval=0.01)
+    assert watcher.wait(timeout=0) == set()
+
+    write(file, "VALUE = 2")
+    os.utime(file, ns=(0, 0))
+    write(tmp_path / "new.py", "")
+    write(tmp_path / "README.md", "")
+
+    assert watcher.wait(timeout=1) == {str(file), str(tmp_path / "new.py")}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify")
+def test_inotify_watcher(tmp_path):
+    watcher = get_watcher(str(tmp_path))
+    assert isinstance(watcher, InotifyWatcher)
+    assert watcher.wait(timeout=0.01) == set()
+
+    # Files in new directories are watched too
+    os.mkdir(tmp_path / "package")
+    assert watcher.wait(timeout=0.01) == set()
+
+    threading.Timer(0.05, write, args=(tmp_path / "package" / "a.py", "")).start()
+    assert watcher.wait(timeout=5) == {str(tmp_path / "package" / "a.py")}
+
+    watcher.close()
+
+
+def test_hot_reload_runner(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+
+    write(tmp_path / "hr_helper.py", "VALUE = 1")
+    write(tmp_path / "hr_other.py", "OTHER = 1")
+    write(
+        tmp_path / "hr_app.py",
+        "from hr_helper import VALUE\n"
+        "import hr_other\n\n"
+        "def handler(event, context):\n"
+        "    return {'statusCode': 200, 'body': VALUE}\n",
+    )
+
+    monkeypatch.delenv("AWS_SESSION_TOKEN", raising=False)
+    monkeypatch.setenv("AWS_REGION", "eu-west-1")
+    request = {
+        "event_id": "1",
+        "event": {},
+        "subscriber_id": "sub",
+        "environment": {"AWS_SESSION_TOKEN": "lambda", "AWS_REGION": "us-east-1"},
+    }
+    runner = HotReloadRunner(
+        "hr_app.handler",
+        str(tmp_path),
+        client=DevClient(),
+        watcher_provider=MockWatcher,
+    )
+
+    try:
+        assert runner.dispatch(request)["body"] == 1
+
+        # The lambda execution context does not outlive the event
+        assert "AWS_SESSION_TOKEN" not in os.environ
+        assert os.environ["AWS_REGION"] == "eu-west-1"
+
+        # Only the changed module and the ones importing it are reloaded
+        write(tmp_path / "hr_helper.py", "VALUE = 2")
+        changed = [str(tmp_path / "hr_helper.py")]
+
+        assert modules_to_reload(changed, str(tmp_path)) == ["hr_helper", "hr_app"]
+        assert runner.reload(changed) == ["hr_helper", "hr_app"]
+        assert runner.dispatch(request)["body"] == 2
+
+        # A broken module keeps the previous version
+        write(tmp_path / "hr_helper.py", "VALUE = ")
+        assert runner.reload(changed) == []
+        assert runner.dispatch(request)["body"] == 2
+
+    finally:
+        for name in ["hr_app", "hr_helper", "hr_other"]:
+            sys.modules.pop(name, None)
@@ -1,4 +1,7 @@
+from fluxional.deployment.exceptions import FailedToRunContainer
 from fluxional.dev.runner import FunctionEngine, build_launcher, build_runner_image, run
+from unittest.mock import Mock
+import pytest
 
 
 def test_function_engine():
@@ -40,3 +43,17 @@ def test_run():
             pass
 
     run("test", "test.test", engine_provider=MockEngine)
+
+
+def test_run_publishes_the_port():
+    engine = Mock()
+
+    run("test", "test.test", engine_provider=lambda **kwargs: engine, port=9100)
+
+    kwargs = engine.run_container.call_args.kwargs
+    assert kwargs["network_mode"] == "bridge"
+    assert kwargs["ports"] == {"9100/tcp": ("127.0.0.1", 9100)}
+
+    engine.image_exists.return_value = False
+    with pytest.raises(FailedToRunContainer):
+        run("test", "test.test", engine_provider=lambda **kwargs: engine)
@@ -0,0 +1,187 @@
+from fluxional import Fluxional
+from fluxional.core.handlers import cli_local_handler
+from fluxional.core.settings import Settings
+from fluxional.core.tools import Environment, Event, LookupKey
+from fluxional.local import LocalEmulator
+from fluxional.local.events import api_event
+from fluxional.local.queue import LocalQueue
+from fluxional.local.server import LocalHttpServer
+from fluxional.local.storage import LocalStorage
+from unittest.mock import patch
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError
+import json
+import pytest
+import threading
+import time
+
+
+def test_api_event():
+    event = api_event(
+        "POST",
+        "/items",
+        headers=[("Accept", "a"), ("Accept", "b")],
+        query="q=1&q=2&x=",
+        body=b"\xff",
+    )
+
+    assert event["httpMethod"] == "POST"
+    assert event["headers"] == {"Accept": "b"}
+    assert event["multiValueHeaders"] == {"Accept": ["a", "b"]}
+    assert event["queryStringParameters"] == {"q": "2", "x": ""}
+    assert event["multiValueQueryStringParameters"] == {"q": ["1", "2"], "x": [""]}
+    assert event["isBase64Encoded"] and event["body"] == "/w=="
+
+    event = api_event("GET", "/")
+    assert event["queryStringParameters"] is None
+    assert event["body"] is None
+
+
+def test_http_server():
+    def invoke(event):
+        if event["path"] == "/error":
+            return None
+
+        return {
+            "statusCode": 201,
+            "headers": {"Content-Type": "application/json"},
+            "body": json.dumps([event["httpMethod"], event["body"]]),
+        }
+
+    server = LocalHttpServer(("127.0.0.1", 0), invoke)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        with urlopen(Request(f"{url}/items", data=b"hello", method="PUT")) as r:
+            assert r.status == 201
+            assert r.headers["Content-Type"] == "application/json"
+            assert json.loads(r.read()) == ["PUT", "hello"]
+
+        with pytest.raises(HTTPError) as e:
+            urlopen(f"{url}/error")
+
+        assert e.value.code == 502
+
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_local_queue():
+    attempts: dict[str, int] = {}
+
+    # The "fail" event always fails, the "retry" one on its first attempt
+    def invoke(event):
+        failures = []
+        for record in event["Records"]:
+            body = json.loads(record["body"])
+            attempts[body["data"]] = attempts.get(body["data"], 0) + 1
+
+            if body["data"] == "fail" or (
+                body["data"] == "retry" and attempts["retry"] == 1
+            ):
+                failures.append({"itemIdentifier": record["messageId"]})
+
+        return {"batchItemFailures": failures}
+
+    queue = LocalQueue(invoke, batch_size=2, max_receives=3)
+    Event.set_client(queue, Environment.snapshot().aws_region)
+
+    try:
+        Event().trigger("on_event", "ok")
+        assert Event().trigger_many("on_event", ["retry", "fail"]) == []
+        assert len(queue) == 3
+
+        queue.drain()
+
+    finally:
+        Event._clients.clear()
+
+    assert attempts == {"ok": 1, "retry": 2, "fail": 3}
+    assert len(queue) == 0
+
+
+def test_local_storage(tmp_path):
+    events = []
+    storage = LocalStorage(str(tmp_path / "bucket"), events.append)
+
+    def summary():
+        return [
+            (e["Records"][0]["eventName"], e["Records"][0]["s3"]["object"]["key"])
+            for e in storage.sync()
+        ]
+
+    storage.write("images/a b.png", b"data")
+    assert summary() == [("ObjectCreated:Put", "images/a+b.png")]
+    assert storage.read("images/a b.png") == b"data"
+    assert summary() == []
+
+    storage.delete("images/a b.png")
+    assert summary() == [("ObjectRemoved:Delete", "images/a+b.png")]
+    assert len(events) == 2
+
+    with pytest.raises(ValueError):
+        storage.write("../outside.txt", "data")
+
+
+def test_emulator(tmp_path, monkeypatch):
+    # Restored once the test is done
+    monkeypatch.setenv(LookupKey.event_queue_url, "")
+    monkeypatch.setenv(LookupKey.storage_bucket_name, "")
+
+    flux = Fluxional("Local")
+    received = []
+
+    @flux.api
+    def api(event, context):
+        Event().trigger("on_event", event["queryStringParameters"])
+        return {"statusCode": 200, "body": context.function_name}
+
+    @flux.event
+    def on_event(event, context):
+        received.append(event)
+
+    emulator = LocalEmulator(
+        flux.handler(),
+        app=flux._app,
+        settings=flux.settings,
+        port=0,
+        storage_path=str(tmp_path / "storage"),
+    )
+    emulator.start()
+
+    try:
+        port = emulator.server.server_address[1]
+        with urlopen(f"http://127.0.0.1:{port}/?id=1") as r:
+            assert r.read() == b"fluxional_local"
+
+        deadline = time.monotonic() + 5
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert received == [{"id": "1"}]
+
+    finally:
+        emulator.stop()
+        Event._clients.clear()
+        Environment.refresh()
+
+
+def test_cli_local_handler():
+    assert cli_local_handler({}, {}) is None
+    assert cli_local_handler({"fluxional_event": "cli_dev"}, {}) is None
+
+    with pytest.raises(ValueError):
+        cli_local_handler({"fluxional_event": "cli_local"}, {})
+
+    with patch("fluxional.local.run_local") as run_local:
+        assert cli_local_handler(
+            {"fluxional_event": "cli_local", "port": 4000},
+            {"handler": "app.handler"},
+            settings=Settings(),
+            app=object(),
+            handler=print,
+        )
+
+    assert run_local.call_args.kwargs["port"] == 4000
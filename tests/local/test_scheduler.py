@@ -0,0 +1,83 @@
+from fluxional.local.scheduler import CronMatcher, Scheduler, parse_cron_field
+from datetime import datetime, timezone
+import pytest
+
+
+def test_parse_cron_field():
+    assert parse_cron_field(None, 0, 59) is None
+    assert parse_cron_field("*", 0, 59) is None
+    assert parse_cron_field("?", 1, 7) is None
+    assert parse_cron_field("5", 0, 59) == {5}
+    assert parse_cron_field("1,3", 0, 59) == {1, 3}
+    assert parse_cron_field("10-12", 0, 59) == {10, 11, 12}
+    assert parse_cron_field("*/15", 0, 59) == {0, 15, 30, 45}
+    assert parse_cron_field("5/20", 0, 59) == {5, 25, 45}
+    assert parse_cron_field(
+        "MON-FRI", 1, 7, ["SUN", "MON", "TUE", "WED", "THU", "FRI", "SAT"]
+    ) == {2, 3, 4, 5, 6}
+
+    with pytest.raises(ValueError):
+        parse_cron_field("L", 1, 31)
+
+    with pytest.raises(ValueError):
+        parse_cron_field("MON#1", 1, 7)
+
+
+def test_cron_matcher():
+    # Every monday at 12:00
+    matcher = CronMatcher({"minute": "0", "hour": "12", "week_day": "MON"})
+
+    assert matcher.matches(datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc))
+    assert not matcher.matches(datetime(2024, 1, 1, 12, 1, tzinfo=timezone.utc))
+    assert not matcher.matches(datetime(2024, 1, 2, 12, 0, tzinfo=timezone.utc))
+
+    # Eventbridge counts week days from sunday = 1
+    assert CronMatcher({"week_day": "1"}).matches(
+        datetime(2023, 12, 31, tzinfo=timezone.utc)
+    )
+
+
+def test_scheduler():
+    start = datetime(2024, 1, 1, 11, 58, 30, tzinfo=timezone.utc).timestamp()
+    scheduler = Scheduler(
+        [{"schedule_name": "every", "value": 30, "unit": "seconds"}],
+        [{"schedule_name": "noon", "minute": "0", "hour": "12"}],
+        lambda event: None,
+        start=start,
+    )
+
+    assert scheduler.next_time() == start + 30
+    assert scheduler.due(start + 10) == []
+    assert scheduler.due(start + 30) == [
+        {"schedule_type": "RateSchedule", "schedule_name": "every"},
+    ]
+
+    # The missed runs are skipped, noon matches at 12:00
+    assert scheduler.due(start + 95) == [
+        {"schedule_type": "RateSchedule", "schedule_name": "every"},
+        {"schedule_type": "CronSchedule", "schedule_name": "noon"},
+    ]
+    assert scheduler.next_time() == start + 120
+    assert scheduler.due(start + 150) == [
+        {"schedule_type": "RateSchedule", "schedule_name": "every"},
+    ]
+
+    assert Scheduler([], [], lambda event: None).next_time() is None
+
+
+def test_scheduler_unsupported_cron(capsys):
+    start = datetime(2024, 1, 1, 11, 59, 30, tzinfo=timezone.utc).timestamp()
+    scheduler = Scheduler(
+        [],
+        [
+            {"schedule_name": "last_day", "day": "L"},
+            {"schedule_name": "noon", "minute": "0", "hour": "12"},
+        ],
+        lambda event: None,
+        start=start,
+    )
+
+    assert "Skipping the schedule last_day" in capsys.readouterr().out
+    assert scheduler.due(start + 30) == [
+        {"schedule_type": "CronSchedule", "schedule_name": "noon"},
+    ]
@@ -11,7 +11,7 @@ from fluxional.core.events import (
     is_cron_schedule_event,
     is_sqs_event,
 )
-from fluxional.core.tools import LookupKey
+from fluxional.core.tools import LookupKey, Environment
 from unittest.mock import patch
 import os
 
@@ -129,6 +129,7 @@ def test_is_dev_context():
         "environ",
         {LookupKey.handler_context: "development"},
     ):
+        Environment.refresh()
         assert is_dev_context(
             {
                 "httpMethod": "GET",
@@ -140,6 +141,7 @@ def test_is_dev_context():
         "environ",
         {LookupKey.handler_context: "production"},
     ):
+        Environment.refresh()
         assert not is_dev_context(
             {
                 "httpMethod": "GET",
@@ -147,6 +149,8 @@ def test_is_dev_context():
             {},
         )
 
+    Environment.refresh()
+
 
 def test_s3_events():
     assert is_s3_bucket_create_event(
@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+
+# Generous enough for slow CI runners, the runtime path currently takes ~75ms
+IMPORT_BUDGET_MS = float(os.environ.get("FLUXIONAL_IMPORT_BUDGET_MS", 250))
+
+BUILD_ONLY_MODULES = [
+    "fluxional.cli",
+    "fluxional.deployment",
+    "fluxional.dev",
+    "fluxional.local",
+    "fluxional.tune",
+    "fluxional.core.infrastructure.resources",
+    "fluxional.core.infrastructure.base",
+    "fluxional.core.infrastructure.cdk",
+    "boto3",
+    "docker",
+    "aws_cdk",
+]
+
+HANDLE_HTTP_EVENT = """
+import json, sys
+from fluxional import Fluxional
+
+flux = Fluxional("Test")
+flux.add_api(lambda event, context: "ok")
+handler = flux.handler()
+
+assert handler({"httpMethod": "GET"}, {}) == "ok"
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def _run(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _import_time_ms() -> float:
+    process = _run("-X", "importtime", "-c", "from fluxional import Fluxional")
+
+    cumulative_us = 0
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        if not name.startswith("  ") and name.strip().split(".")[0] == "fluxional":
+            cumulative_us += int(cumulative)
+
+    return cumulative_us / 1000
+
+
+def test_import_is_lazy():
+    loaded = _run(
+        "-c", "import fluxional, sys, json; print(json.dumps(sorted(sys.modules)))"
+    )
+
+    assert [m for m in json.loads(loaded.stdout) if m.startswith("fluxional.")] == []
+
+
+def test_runtime_path_does_not_import_build_modules():
+    modules = json.loads(_run("-c", HANDLE_HTTP_EVENT).stdout)
+
+    for name in BUILD_ONLY_MODULES:
+        assert name not in modules, name
+
+
+def test_import_time_budget():
+    # Best of a few runs to smooth out noisy neighbours
+    elapsed = min(_import_time_ms() for _ in range(3))
+
+    assert elapsed < IMPORT_BUDGET_MS, f"{elapsed:.1f}ms > {IMPORT_BUDGET_MS}ms"
@@ -0,0 +1,153 @@
+from fluxional import __version__
+from fluxional.core.handlers import cli_tune_handler
+from fluxional.core.settings import Settings
+from fluxional.tune import TuneEngine, run_tune
+from fluxional.tune.report import TuneResult, cheapest, parse_reports
+from unittest.mock import Mock, patch
+import json
+import pytest
+
+REPORTS = """START RequestId: 1 Version: $LATEST
+END RequestId: 1
+REPORT RequestId: 1\tInit Duration: 310.52 ms\tDuration: 120.00 ms\tBilled Duration: 120 ms\tMemory Size: {memory} MB\tMax Memory Used: {memory} MB
+REPORT RequestId: 2\tDuration: {duration} ms\tBilled Duration: {duration} ms\tMemory Size: {memory} MB\tMax Memory Used: {memory} MB
+REPORT RequestId: 3\tDuration: {duration} ms\tBilled Duration: {duration} ms\tMemory Size: {memory} MB\tMax Memory Used: {memory} MB
+"""
+
+
+def test_parse_reports():
+    reports = parse_reports(REPORTS.format(memory=128, duration=10))
+
+    assert reports[0] == {
+        "Init Duration": 310.52,
+        "Duration": 120.0,
+        "Billed Duration": 120.0,
+    }
+    assert reports[1] == {"Duration": 10.0, "Billed Duration": 10.0}
+    assert len(reports) == 3
+
+
+def test_cheapest():
+    fast = TuneResult(memory_size=1024, durations=[10], billed_durations=[10])
+    slow = TuneResult(memory_size=128, durations=[50], billed_durations=[50])
+
+    # 1 GB for 10 ms costs more than 128 MB for 50 ms
+    assert slow.cost < fast.cost
+    assert cheapest([fast, slow]) is slow
+    assert cheapest([fast, slow], target=20) is fast
+    assert cheapest([fast, slow], target=5) is None
+
+
+def test_get_tune_dockerfile():
+    with patch("docker.APIClient"), patch("docker.from_env"):
+        engine = TuneEngine()
+
+    assert engine.get_tune_dockerfile(
+        lambda_handler="app.handler",
+        requirements_file="requirements/api.txt",
+        lambda_dockerfile_pre_install="RUN yum install -y gcc",
+        lambda_dockerfile_ext="RUN echo done",
+    ) == (
+        "FROM public.ecr.aws/lambda/python:3.10\n"
+        "RUN yum install -y gcc\n"
+        "COPY requirements/api.txt ${LAMBDA_TASK_ROOT}/requirements/api.txt\n"
+        'RUN pip install -r requirements/api.txt --target "${LAMBDA_TASK_ROOT}"\n'
+        "COPY . ${LAMBDA_TASK_ROOT}\n"
+        "RUN echo done\n"
+        'CMD ["app.handler"]'
+    )
+
+    # Fluxional is always needed
+    assert engine.get_tune_dockerfile(
+        lambda_handler="app.handler", lambda_runtime="3.12"
+    ) == (
+        "FROM public.ecr.aws/lambda/python:3.12\n"
+        f'RUN pip install fluxional=={__version__} --target "${{LAMBDA_TASK_ROOT}}"\n'
+        "COPY . ${LAMBDA_TASK_ROOT}\n"
+        'CMD ["app.handler"]'
+    )
+
+
+def test_start_function_cpus():
+    with patch("docker.APIClient"), patch("docker.from_env"):
+        engine = TuneEngine()
+
+    with patch("fluxional.tune.os.cpu_count", return_value=1):
+        engine.start_function(memory_size=1769, port=9000, environment={})
+        assert engine._client.containers.run.call_args.kwargs["nano_cpus"] == 1e9
+
+        # Capped at the cpus of the machine
+        engine.start_function(memory_size=3538, port=9000, environment={})
+        assert engine._client.containers.run.call_args.kwargs["nano_cpus"] == 1e9
+
+
+def test_run_tune():
+    durations = {128: 40, 1024: 8}
+    started = []
+
+    class Engine(TuneEngine):
+        def __init__(self, **kwargs):
+            with patch("docker.APIClient"), patch("docker.from_env"):
+                super().__init__(**kwargs)
+
+        build_image = Mock()
+
+        def start_function(self, *, memory_size, port, environment):
+            started.append(memory_size)
+            logs = REPORTS.format(memory=memory_size, duration=durations[memory_size])
+            return Mock(logs=Mock(return_value=logs.encode("utf-8")))
+
+    with patch("fluxional.tune.invoke", return_value=1.0) as invoke:
+        results = run_tune(
+            "app.handler",
+            event={"key": "value"},
+            stack_name="Stack",
+            memory_sizes=[128, 1024],
+            invocations=2,
+            engine_provider=Engine,
+        )
+
+    # The first invocation of each size is the cold start
+    assert invoke.call_count == 6
+    assert started == [128, 1024]
+    assert Engine.build_image.call_args.kwargs["context"] == [
+        "app.py",
+        "requirements.txt",
+    ]
+
+    assert [r.durations for r in results] == [[40, 40], [8, 8]]
+    assert results[0].init_duration == 310.52
+
+    for memory_sizes in [[64], []]:
+        with pytest.raises(ValueError):
+            run_tune(
+                "app.handler",
+                event={},
+                stack_name="Stack",
+                memory_sizes=memory_sizes,
+                engine_provider=Engine,
+            )
+
+
+def test_cli_tune_handler(tmp_path):
+    assert cli_tune_handler({}, {}) is None
+    assert cli_tune_handler({"fluxional_event": "cli_dev"}, {}) is None
+
+    event_file = tmp_path / "event.json"
+    event_file.write_text(json.dumps({"path": "/"}))
+    event = {
+        "fluxional_event": "cli_tune",
+        "event": str(event_file),
+        "memory_sizes": [128],
+    }
+
+    with pytest.raises(ValueError):
+        cli_tune_handler(event, {"handler": "app.handler"})
+
+    with patch("fluxional.tune.run_tune") as run_tune:
+        assert cli_tune_handler(
+            event, {"handler": "app.handler"}, settings=Settings(stack_name="Stack")
+        )
+
+    assert run_tune.call_args.kwargs["event"] == {"path": "/"}
+    assert run_tune.call_args.kwargs["memory_sizes"] == [128]